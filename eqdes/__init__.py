@@ -1,6 +1,25 @@
-from eqdes import models
-from eqdes import dbd, dba
-from eqdes import design_spectra
-from eqdes import dbd_tools
-from eqdes import moment_equilibrium
-from eqdes import nonlinear_foundation
+"""
+Submodules are imported on first access (e.g. `eqdes.dbd`), so that `import eqdes` and the numerical
+modules (`dbd_tools`, `design_spectra`, `nonlinear_foundation`) do not import sfsimodels or geofound.
+"""
+import importlib
+
+from eqdes.__about__ import __version__
+
+_submodules = [
+    "aggregators", "batch", "cache", "cli", "dba", "dbd", "dbd_tools", "design_spectra", "foundation_sizing",
+    "fragility", "inventory", "models", "moment_equilibrium", "nonlinear_foundation", "screening",
+    "section_designer", "sensitivity", "store", "uncertainty",
+]
+
+
+def __getattr__(name):
+    if name in _submodules:
+        module = importlib.import_module(f"eqdes.{name}")
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module 'eqdes' has no attribute '{name}'")
+
+
+def __dir__():
+    return sorted(list(globals()) + _submodules)
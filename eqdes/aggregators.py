@@ -0,0 +1,295 @@
+"""
+Streaming statistics of design and assessment results.
+
+Aggregators are updated with batches of values as results arrive, so distributions of large runs are summarised
+without holding the results in memory. All aggregators can be merged, e.g. the aggregators of chunks evaluated by
+different worker processes, and merging gives the same counts and moments as a single aggregator that saw all the
+values (up to round-off).
+
+ - `Moments`: count, mean, variance, min and max (Chan et al. parallel update of the mean and variance)
+ - `QuantileSketch`: approximate quantiles with a relative accuracy `alpha` from logarithmic bins (DDSketch,
+   Masson et al. 2019), merged exactly by adding the bin counts
+ - `Aggregator`: moments and quantiles of one output
+ - `GroupedAggregator`: aggregators of several outputs for each group (e.g. archetype, soil class, hazard zone)
+
+nan values (failed designs) are not included.
+
+Example::
+
+    agg = aggregators.GroupedAggregator(['v_base', 't_eff'], by=['archetype', 'soil_class'])
+    agg.update({'v_base': v_base, 't_eff': t_eff}, {'archetype': arch, 'soil_class': soil})
+    agg.merge(other_agg)
+    summary = agg.summary(quantiles=(0.1, 0.5, 0.9))
+"""
+import numpy as np
+
+
+def _finite(values):
+    values = np.asarray(values, dtype=float).ravel()
+    return values[~np.isnan(values)]
+
+
+class Moments(object):
+    """Count, mean, variance, min and max of a stream of values"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared differences from the mean
+        self.min = np.inf
+        self.max = -np.inf
+
+    def _combine(self, count, mean, m2, v_min, v_max):
+        if not count:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+        self.min = min(self.min, v_min)
+        self.max = max(self.max, v_max)
+
+    def update(self, values):
+        values = _finite(values)
+        if len(values):
+            mean = np.mean(values)
+            self._combine(len(values), mean, np.sum((values - mean) ** 2), np.min(values), np.max(values))
+
+    def merge(self, other):
+        self._combine(other.count, other.mean, other.m2, other.min, other.max)
+        return self
+
+    @property
+    def variance(self):
+        """Sample variance (nan for less than two values)"""
+        return self.m2 / (self.count - 1) if self.count > 1 else np.nan
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    def to_dict(self):
+        return {"count": self.count, "mean": self.mean, "m2": self.m2, "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, values):
+        obj = cls()
+        obj.count = int(values["count"])
+        for name in ["mean", "m2", "min", "max"]:
+            setattr(obj, name, float(values[name]))
+        return obj
+
+
+class QuantileSketch(object):
+    """
+    Approximate quantiles with a relative accuracy of `alpha`.
+
+    Values are counted in logarithmic bins, where bin i holds the magnitudes between gamma^(i - 1) and gamma^i
+    (gamma = (1 + alpha) / (1 - alpha)), and the quantiles are returned as the bin centres.
+
+    :param alpha: relative accuracy of the quantiles
+    :param min_value: magnitudes less than this are counted as zero
+    """
+
+    def __init__(self, alpha=0.01, min_value=1.0e-9):
+        self.alpha = alpha
+        self.min_value = min_value
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+
+    @property
+    def count(self):
+        return self.zero_count + sum(self.positive.values()) + sum(self.negative.values())
+
+    def _add(self, bins, magnitudes):
+        keys, counts = np.unique(np.ceil(np.log(magnitudes) / np.log(self.gamma)).astype(np.int64),
+                                 return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            bins[key] = bins.get(key, 0) + count
+
+    def update(self, values):
+        values = _finite(values)
+        small = np.abs(values) < self.min_value
+        self.zero_count += int(np.sum(small))
+        self._add(self.positive, values[~small & (values > 0)])
+        self._add(self.negative, -values[~small & (values < 0)])
+
+    def merge(self, other):
+        if other.alpha != self.alpha or other.min_value != self.min_value:
+            raise ValueError("Can not merge quantile sketches with different accuracy")
+        for bins, other_bins in [(self.positive, other.positive), (self.negative, other.negative)]:
+            for key, count in other_bins.items():
+                bins[key] = bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        return self
+
+    def quantile(self, q):
+        """
+        Approximate quantile(s) of the values.
+
+        :param q: quantile or array of quantiles (between 0 and 1)
+        :return: value(s), nan if no values were added
+        """
+        neg_keys = np.array(sorted(self.negative, reverse=True), dtype=np.int64)
+        pos_keys = np.array(sorted(self.positive), dtype=np.int64)
+        centres = 2 * self.gamma ** np.concatenate([neg_keys, pos_keys]).astype(float) / (self.gamma + 1)
+        centres = np.concatenate([-centres[:len(neg_keys)], [0.0], centres[len(neg_keys):]])
+        counts = np.array([self.negative[k] for k in neg_keys.tolist()] + [self.zero_count] +
+                          [self.positive[k] for k in pos_keys.tolist()], dtype=float)
+        cum = np.cumsum(counts)
+        if not len(cum) or cum[-1] == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        rank = np.asarray(q, dtype=float) * (cum[-1] - 1)
+        vals = centres[np.searchsorted(cum, rank, side="right")]
+        if np.ndim(vals) == 0:
+            return vals.item()
+        return vals
+
+    def to_dict(self):
+        return {"alpha": self.alpha, "min_value": self.min_value, "zero_count": self.zero_count,
+                "positive": {str(k): c for k, c in self.positive.items()},
+                "negative": {str(k): c for k, c in self.negative.items()}}
+
+    @classmethod
+    def from_dict(cls, values):
+        obj = cls(values["alpha"], values["min_value"])
+        obj.zero_count = int(values["zero_count"])
+        obj.positive = {int(k): int(c) for k, c in values["positive"].items()}
+        obj.negative = {int(k): int(c) for k, c in values["negative"].items()}
+        return obj
+
+
+class Aggregator(object):
+    """
+    Moments and approximate quantiles of one output.
+
+    :param alpha: relative accuracy of the quantiles
+    """
+
+    def __init__(self, alpha=0.01):
+        self.moments = Moments()
+        self.sketch = QuantileSketch(alpha)
+
+    def update(self, values):
+        self.moments.update(values)
+        self.sketch.update(values)
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+        return self
+
+    def summary(self, quantiles=(0.05, 0.5, 0.95)):
+        """dict of 'count', 'mean', 'std', 'min', 'max' and 'q<quantile>' values"""
+        m = self.moments
+        out = {"count": m.count, "mean": m.mean if m.count else np.nan, "std": m.std,
+               "min": m.min if m.count else np.nan, "max": m.max if m.count else np.nan}
+        for q in quantiles:
+            out[f"q{q:g}"] = self.sketch.quantile(q)
+        return out
+
+    def to_dict(self):
+        return {"moments": self.moments.to_dict(), "sketch": self.sketch.to_dict()}
+
+    @classmethod
+    def from_dict(cls, values):
+        obj = cls()
+        obj.moments = Moments.from_dict(values["moments"])
+        obj.sketch = QuantileSketch.from_dict(values["sketch"])
+        return obj
+
+
+class GroupedAggregator(object):
+    """
+    Aggregators of several outputs for each group.
+
+    :param fields: names of the outputs
+    :param by: names of the group labels (e.g. 'archetype', 'soil_class'), empty for one group of all values
+    :param alpha: relative accuracy of the quantiles
+    """
+
+    def __init__(self, fields, by=(), alpha=0.01):
+        self.fields = list(fields)
+        self.by = list(by)
+        self.alpha = alpha
+        self.groups = {}  # tuple of labels: {field: Aggregator}
+
+    def _group(self, key):
+        if key not in self.groups:
+            self.groups[key] = {name: Aggregator(self.alpha) for name in self.fields}
+        return self.groups[key]
+
+    def update(self, data, labels=None):
+        """
+        Adds a batch of results.
+
+        :param data: dict of output name to array of values
+        :param labels: dict of group label name to array of labels (same length as the values)
+        """
+        n = len(next(iter(data.values()))) if data else 0
+        if not self.by:
+            keys = np.zeros(n, dtype=int)
+            groups = [()]
+        else:
+            cols = [np.asarray(labels[name]).astype(str) for name in self.by]
+            stacked = np.array(cols).T if n else np.empty((0, len(cols)), dtype=str)
+            uniques, keys = np.unique(stacked, axis=0, return_inverse=True)
+            keys = keys.ravel()
+            groups = [tuple(row.tolist()) for row in uniques]
+        for g, key in enumerate(groups):
+            sel = keys == g
+            aggs = self._group(key)
+            for name in self.fields:
+                aggs[name].update(np.asarray(data[name], dtype=float)[sel])
+
+    def merge(self, other):
+        for key, aggs in other.groups.items():
+            own = self._group(key)
+            for name in self.fields:
+                own[name].merge(aggs[name])
+        return self
+
+    def summary(self, quantiles=(0.05, 0.5, 0.95)):
+        """
+        Summary of each group.
+
+        :return: dict of group labels (tuple) to dict of output name to `Aggregator.summary`
+        """
+        return {key: {name: agg.summary(quantiles) for name, agg in aggs.items()}
+                for key, aggs in sorted(self.groups.items())}
+
+    def to_dict(self):
+        return {"fields": self.fields, "by": self.by, "alpha": self.alpha,
+                "groups": [{"labels": list(key), "aggregators": {name: agg.to_dict() for name, agg in aggs.items()}}
+                           for key, aggs in self.groups.items()]}
+
+    @classmethod
+    def from_dict(cls, values):
+        obj = cls(values["fields"], values["by"], values["alpha"])
+        for group in values["groups"]:
+            obj.groups[tuple(group["labels"])] = {name: Aggregator.from_dict(agg)
+                                                  for name, agg in group["aggregators"].items()}
+        return obj
+
+
+def aggregate_store(path, fields, by=(), chunk_size=100000, alpha=0.01):
+    """
+    Aggregates the outputs of a results store (see `eqdes.store`) in chunks of rows.
+
+    :param path: results store directory
+    :param fields: names of scalar columns
+    :param by: names of category columns of the group labels (e.g. 'group_archetype')
+    :param chunk_size: number of rows read at once
+    :return: GroupedAggregator
+    """
+    from eqdes import store
+    st = store.ResultsStore(path, mode="r")
+    agg = GroupedAggregator(fields, by, alpha)
+    for start in range(0, len(st), chunk_size):
+        stop = start + chunk_size
+        agg.update({name: st.get_rows(name, start, stop) for name in fields},
+                   {name: st.get_rows(name, start, stop) for name in by})
+    return agg
@@ -0,0 +1,355 @@
+"""
+Tools for evaluating many design or assessment problems, optionally in parallel worker processes.
+"""
+import functools
+import json
+import os
+import re
+import time
+from collections import deque
+
+import numpy as np
+
+from eqdes.extensions.exceptions import BudgetExceeded, DesignError
+
+
+def design_error_reason(err):
+    """
+    Reduces a DesignError message to a reason that can be used to group failures.
+
+    Numbers and bracketed values are removed, e.g. 'Design failed - footing rotation (0.012) exceeds
+    plastic rotation (~0.008)' becomes 'Design failed - footing rotation exceeds plastic rotation'.
+
+    :param err: DesignError or message
+    :return: str
+    """
+    msg = re.sub(r'\(.*?\)', '', str(err))
+    msg = re.sub(r'[-+]?\d*\.?\d+(e[-+]?\d+)?', '', msg)
+    msg = re.sub(r'[:,]\s*$', '', re.sub(r'\s+', ' ', msg).strip())
+    return msg
+
+
+def extract_outputs(obj, outputs):
+    """
+    Extracts named outputs from a designed or assessed object as floats.
+
+    :param obj: Designed or assessed object
+    :param outputs: list of attribute names
+    :return: array of floats (nan if the attribute is not set)
+    """
+    vals = np.full(len(outputs), np.nan)
+    for i, name in enumerate(outputs):
+        val = getattr(obj, name, None)
+        if val is not None:
+            vals[i] = val
+    return vals
+
+
+def map_chunks(func, chunks, n_workers=1, max_pending=None):
+    """
+    Evaluates `func` on each chunk and yields the results in order.
+
+    Chunks are submitted lazily so that only `max_pending` chunks are held in memory at once.
+    If `n_workers` is 1 the chunks are evaluated in the current process.
+
+    :param func: function of one argument (must be picklable if n_workers > 1)
+    :param chunks: iterable of arguments
+    :param n_workers: number of worker processes
+    :param max_pending: maximum number of chunks submitted but not yet yielded (default 2 * n_workers)
+    :return: generator of results
+    """
+    if n_workers is None or n_workers <= 1:
+        for chunk in chunks:
+            yield func(chunk)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    if max_pending is None:
+        max_pending = 2 * n_workers
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        for chunk in chunks:
+            pending.append(executor.submit(func, chunk))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def memory_usage():
+    """
+    Resident memory of the current process [bytes], the peak resident memory where the current value is not
+    available, or None if neither is available.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    import sys
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def chunk_indices(n, chunk_size):
+    """
+    Splits range(n) into consecutive (start, stop) pairs of at most `chunk_size`.
+    """
+    return [(i, min(i + chunk_size, n)) for i in range(0, n, chunk_size)]
+
+
+def evaluate_safely(func, *args, **kwargs):
+    """
+    Calls `func` and returns (result, None), or (None, reason) if a DesignError is raised.
+    """
+    try:
+        return func(*args, **kwargs), None
+    except DesignError as err:
+        return None, design_error_reason(err)
+
+
+class Budget(object):
+    """
+    Limit on the wall time or the number of evaluations (iterations of the design or assessment loops) of a call.
+
+    :param max_time: maximum wall time [s] from the creation of the budget, None for no limit
+    :param max_evaluations: maximum number of evaluations, None for no limit
+    """
+
+    def __init__(self, max_time=None, max_evaluations=None):
+        self.max_time = max_time
+        self.max_evaluations = max_evaluations
+        self.n_evaluations = 0
+        self.start = time.perf_counter()
+
+    @classmethod
+    def create(cls, budget=None):
+        """Budget from a Budget, a dict of Budget arguments (e.g. from a job file) or None (no limit)"""
+        if budget is None:
+            return cls()
+        if isinstance(budget, dict):
+            return cls(**budget)
+        return budget
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def spend(self, partial=None, n=1):
+        """
+        Counts `n` evaluations and raises BudgetExceeded if the budget is used up.
+
+        :param partial: the current (partial) result, returned by `budgeted` functions if the budget is used up
+        """
+        self.n_evaluations += n
+        if self.max_evaluations is not None and self.n_evaluations > self.max_evaluations:
+            raise BudgetExceeded(f"Evaluation budget exceeded ({self.max_evaluations} evaluations)", partial)
+        if self.max_time is not None and self.elapsed > self.max_time:
+            raise BudgetExceeded(f"Time budget exceeded ({self.max_time} s)", partial)
+
+
+def is_complete(obj, reason):
+    """
+    False if the result of `evaluate_safely` was cut short by its budget (a partial result that did not converge,
+    or a failure because the budget was used up).
+    """
+    if obj is None:
+        return "budget exceeded" not in (reason or "")
+    return bool(getattr(obj, "converged", False))
+
+
+def budgeted(func):
+    """
+    Adds a `budget` keyword argument (Budget, dict of Budget arguments or None) to a design or assessment function.
+
+    The function receives a Budget as `kwargs['budget']` and calls `budget.spend(obj)` in its iterations.
+    If the budget is used up, the last iterate is returned with `converged = False` and the reason in
+    `budget_exceeded`, otherwise the result has `converged = True`. The number of evaluations is set as
+    `n_evaluations`.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, budget=None, **kwargs):
+        budget = Budget.create(budget)
+        try:
+            obj = func(*args, budget=budget, **kwargs)
+            obj.converged = True
+        except BudgetExceeded as err:
+            if err.partial is None:
+                raise
+            obj = err.partial
+            obj.converged = False
+            obj.budget_exceeded = str(err)
+        obj.n_evaluations = budget.n_evaluations
+        return obj
+    return wrapper
+
+
+def deduplicate(keys):
+    """
+    Groups duplicate jobs by key (e.g. `models.fingerprint`) so each unique job is evaluated once.
+
+    :param keys: list of hashable keys
+    :return: tuple of (indices of the first job with each key, index into the unique jobs of each job),
+        results of the unique jobs are fanned out with `[results[i] for i in inverse]`
+    """
+    first = {}
+    unique = []
+    inverse = np.empty(len(keys), dtype=int)
+    for i, key in enumerate(keys):
+        if key not in first:
+            first[key] = len(unique)
+            unique.append(i)
+        inverse[i] = first[key]
+    return np.array(unique, dtype=int), inverse
+
+
+# prior evaluation time per storey [s] of each method type, refined by the recorded times of previous runs
+PRIOR_COSTS = {"fixed": 2.0e-4, "sfsi": 5.0e-3, "assess": 2.0e-3}
+PAD_FACTOR = 5.0  # pad foundations include the footing and tie beam checks
+SOFT_SOIL_FACTOR = 2.0  # more foundation rotation iterations on soft soil
+SOFT_SOIL_G_MOD = 20.0e6  # [Pa]
+
+
+class CostModel(object):
+    """
+    Estimates of the evaluation time of jobs from the method, number of storeys, foundation type and soil stiffness.
+
+    Jobs are grouped by method, foundation type and soil class (soft if the shear modulus is less than
+    SOFT_SOIL_G_MOD), and the time per storey of each group is the mean of the recorded times, starting from a
+    prior estimate (weight of one job).
+
+    :param fname: optional JSON file of recorded times from previous runs (see `save`)
+    """
+
+    def __init__(self, fname=None):
+        self.totals = {}  # group: [total time per storey, number of jobs]
+        if fname is not None and os.path.exists(fname):
+            with open(fname) as f:
+                self.totals = {key: list(value) for key, value in json.load(f).items()}
+
+    @staticmethod
+    def group(method, ftype=None, g_mod=None):
+        soil = "none" if g_mod is None else ("soft" if g_mod < SOFT_SOIL_G_MOD else "stiff")
+        return f"{method}|{ftype}|{soil}"
+
+    @staticmethod
+    def prior(method, ftype=None, g_mod=None):
+        if method.startswith("assess"):
+            cost = PRIOR_COSTS["assess"]
+        elif ftype is None:
+            cost = PRIOR_COSTS["fixed"]
+        else:
+            cost = PRIOR_COSTS["sfsi"]
+        if ftype == "pad":
+            cost *= PAD_FACTOR
+        if g_mod is not None and g_mod < SOFT_SOIL_G_MOD:
+            cost *= SOFT_SOIL_FACTOR
+        return cost
+
+    def estimate(self, method, n_storeys, ftype=None, g_mod=None):
+        """
+        Estimated evaluation time [s] of a job.
+
+        :param method: name of the design or assessment function
+        :param n_storeys: number of storeys
+        :param ftype: foundation type ('raft', 'pad'), None for fixed base
+        :param g_mod: soil shear modulus [Pa]
+        """
+        total, count = self.totals.get(self.group(method, ftype, g_mod), (0.0, 0))
+        return n_storeys * (self.prior(method, ftype, g_mod) + total) / (1 + count)
+
+    def update(self, method, n_storeys, seconds, ftype=None, g_mod=None):
+        """Records the evaluation time of a job"""
+        entry = self.totals.setdefault(self.group(method, ftype, g_mod), [0.0, 0])
+        entry[0] += seconds / max(n_storeys, 1)
+        entry[1] += 1
+
+    def save(self, fname):
+        with open(fname, "w") as f:
+            json.dump(self.totals, f, indent=1)
+
+
+def _run_batch(args):
+    """Evaluates a batch of jobs and records the time of each job"""
+    func, items = args
+    out = []
+    for i, job in items:
+        start = time.perf_counter()
+        res = func(job)
+        out.append((i, res, time.perf_counter() - start))
+    return out
+
+
+def schedule(func, jobs, costs, n_workers=1, min_batch_cost=0.05, executor=None):
+    """
+    Evaluates `func` on each job, largest estimated cost first, and yields the results as they complete.
+
+    The jobs are split over one queue per worker, largest first to the least loaded queue. Each worker takes
+    jobs from the front of its queue (the largest), and an idle worker steals from the back (the smallest)
+    of the queue with the most remaining cost, so workers are not left idle at the end of the batch.
+    Cheap jobs are sent in batches of at least `min_batch_cost` estimated seconds.
+
+    :param func: function of one job (must be picklable if n_workers > 1)
+    :param jobs: list of jobs
+    :param costs: estimated cost of each job (e.g. from `CostModel.estimate`)
+    :param n_workers: number of worker processes
+    :param min_batch_cost: minimum estimated cost of a batch of jobs sent to a worker
+    :param executor: optional concurrent.futures executor to reuse (with n_workers workers)
+    :return: generator of (job index, result, evaluation time [s])
+    """
+    costs = np.asarray(costs, dtype=float)
+    order = np.argsort(-costs, kind="stable")
+    if n_workers is None or n_workers <= 1:
+        for i in order:
+            yield _run_batch((func, [(i, jobs[i])]))[0]
+        return
+    queues = [deque() for _ in range(n_workers)]
+    loads = np.zeros(n_workers)
+    for i in order:
+        w = int(np.argmin(loads))
+        queues[w].append(i)
+        loads[w] += costs[i]
+
+    def next_batch(w):
+        if not queues[w]:  # steal from the back of the most loaded queue
+            victim = int(np.argmax(loads))
+            if not queues[victim]:
+                return None
+            i = queues[victim].pop()
+            loads[victim] -= costs[i]
+            queues[w].append(i)
+            loads[w] += costs[i]
+        items = []
+        batch_cost = 0.0
+        while queues[w] and (not items or batch_cost < min_batch_cost):
+            i = queues[w].popleft()
+            loads[w] -= costs[i]
+            batch_cost += costs[i]
+            items.append((i, jobs[i]))
+        return items
+
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=n_workers)
+    try:
+        running = {}
+        for w in range(n_workers):
+            items = next_batch(w)
+            if items:
+                running[executor.submit(_run_batch, (func, items))] = w
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                w = running.pop(future)
+                for res in future.result():
+                    yield res
+                items = next_batch(w)
+                if items:
+                    running[executor.submit(_run_batch, (func, items))] = w
+    finally:
+        if own_executor:
+            executor.shutdown()
@@ -0,0 +1,194 @@
+"""
+Persistent cache of design and assessment outputs.
+
+Results are stored in a SQLite database keyed by the fingerprint (see `models.fingerprint`) of the function name,
+the input objects, the keyword arguments and the eqdes version, so a new version of eqdes does not reuse old
+results. Only the requested outputs are stored (as JSON), and failed designs are stored with their reason. The
+least recently used entries are removed when the database exceeds `max_bytes`. Each process opens its own
+connection, so the cache can be shared by worker processes.
+
+Example::
+
+    rc = cache.ResultCache('results.sqlite')
+    res, reason = rc.evaluate(dbd.design_rc_frame_w_sfsi_via_millen_et_al_2020, fb, hz, sl, fd,
+                              outputs=('v_base', 'theta_f'))
+    print(res.v_base, rc.stats())
+"""
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from eqdes import batch
+from eqdes.__about__ import __version__
+
+
+def hash_call(func, *args, **kwargs):
+    """
+    Hash of a function call from the function name, the input fingerprint (see `models.fingerprint`) and the
+    eqdes version. The `budget` keyword argument is not included, since only complete results are cached.
+    """
+    from eqdes import models as em
+    kwargs = {name: val for name, val in kwargs.items() if name != "budget"}
+    return em.fingerprint(f"{func.__module__}.{func.__qualname__}", __version__, *args, **kwargs)
+
+
+class CachedResult(object):
+    """Outputs of a cached call as attributes"""
+
+    def __init__(self, outputs):
+        for name, value in outputs.items():
+            setattr(self, name, np.array(value) if isinstance(value, list) else value)
+
+
+class ResultCache(object):
+    """
+    SQLite cache of design and assessment outputs.
+
+    :param path: database file
+    :param max_bytes: maximum size of the stored outputs, least recently used entries are removed above this
+    :param timeout: time [s] to wait for other processes that are writing to the database
+    """
+
+    def __init__(self, path, max_bytes=1.0e9, timeout=60.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._pid = None
+        with self._transaction() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT, size INTEGER, "
+                         "last_access REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS stats (id INTEGER PRIMARY KEY, hits INTEGER, misses INTEGER, "
+                         "size INTEGER)")
+            conn.execute("INSERT OR IGNORE INTO stats VALUES (0, 0, 0, 0)")
+
+    def __getstate__(self):  # connections are opened in each process
+        state = self.__dict__.copy()
+        state["_conn"] = None
+        state["_pid"] = None
+        return state
+
+    @property
+    def connection(self):
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._pid = os.getpid()
+        return self._conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self.connection
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def get(self, key):
+        """
+        Cached outputs of `key` as a dict, or None if not cached.
+        """
+        row = self.connection.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        with self._transaction() as conn:
+            if row is None:
+                self.misses += 1
+                conn.execute("UPDATE stats SET misses = misses + 1 WHERE id = 0")
+                return None
+            self.hits += 1
+            conn.execute("UPDATE stats SET hits = hits + 1 WHERE id = 0")
+            conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key, outputs):
+        """
+        Stores a dict of outputs (floats, lists of floats, str or None).
+        """
+        value = json.dumps(outputs)
+        with self._transaction() as conn:
+            cur = conn.execute("INSERT OR IGNORE INTO results VALUES (?, ?, ?, ?)",
+                               (key, value, len(value), time.time()))
+            if cur.rowcount:
+                conn.execute("UPDATE stats SET size = size + ? WHERE id = 0", (len(value),))
+        if self.size > self.max_bytes:
+            self.evict(0.9 * self.max_bytes)
+
+    @property
+    def size(self):
+        """Size of the stored outputs [bytes]"""
+        return self.connection.execute("SELECT size FROM stats WHERE id = 0").fetchone()[0]
+
+    def evict(self, target_bytes):
+        """
+        Removes the least recently used entries until the size of the stored outputs is below `target_bytes`.
+        """
+        with self._transaction() as conn:
+            size = conn.execute("SELECT size FROM stats WHERE id = 0").fetchone()[0]
+            keys = []
+            removed = 0
+            for key, entry_size in conn.execute("SELECT key, size FROM results ORDER BY last_access").fetchall():
+                if size - removed <= target_bytes:
+                    break
+                keys.append((key,))
+                removed += entry_size
+            conn.executemany("DELETE FROM results WHERE key = ?", keys)
+            conn.execute("UPDATE stats SET size = size - ? WHERE id = 0", (removed,))
+        return len(keys)
+
+    def evaluate(self, func, *args, outputs=("v_base",), arrays=(), **kwargs):
+        """
+        Calls `func` (see `batch.evaluate_safely`) or returns the cached outputs.
+
+        :param func: design or assessment function
+        :param outputs: names of scalar outputs to store
+        :param arrays: names of array outputs to store (e.g. 'storey_forces')
+        :return: tuple of (CachedResult or None, failure reason or None)
+
+        Calls with a `budget` (see `batch.Budget`) are only stored if they converged or failed for another
+        reason than the budget, since partial results depend on the run time.
+        """
+        key = hash_call(func, *args, outputs=list(outputs), arrays=list(arrays), **kwargs)
+        cached = self.get(key)
+        if cached is None:
+            obj, reason = batch.evaluate_safely(func, *args, **kwargs)
+            cached = {"reason": reason}
+            if obj is not None:
+                cached.update(zip(outputs, [None if np.isnan(val) else float(val)
+                                            for val in batch.extract_outputs(obj, outputs)]))
+                for name in arrays:
+                    val = getattr(obj, name, None)
+                    cached[name] = None if val is None else np.asarray(val, dtype=float).tolist()
+            if kwargs.get("budget") is None or batch.is_complete(obj, reason):
+                self.put(key, cached)
+        reason = cached.pop("reason")
+        if reason is not None:
+            return None, reason
+        return CachedResult(cached), None
+
+    def stats(self):
+        """
+        Hit and miss counts of this cache object ('hits', 'misses', 'hit_rate') and of all processes that
+        used the database ('total_hits', 'total_misses', 'total_hit_rate'), and the number and size of entries.
+        """
+        conn = self.connection
+        total_hits, total_misses, size = conn.execute("SELECT hits, misses, size FROM stats WHERE id = 0").fetchone()
+        n_entries = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / max(self.hits + self.misses, 1),
+                "total_hits": total_hits, "total_misses": total_misses,
+                "total_hit_rate": total_hits / max(total_hits + total_misses, 1),
+                "n_entries": n_entries, "size": size}
+
+    def clear(self):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM results")
+            conn.execute("UPDATE stats SET hits = 0, misses = 0, size = 0 WHERE id = 0")
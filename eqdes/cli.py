@@ -0,0 +1,604 @@
+"""
+Command line batch design and assessment.
+
+The inventory is a JSON lines file with one job per line, or a BuildingTable CSV/NPZ file or table store directory
+(see `inventory.BuildingTable.to_store`) of frame buildings.
+Each job has the input objects as dicts of attributes and the keyword arguments of the method::
+
+    {"id": "b1", "building": {"n_storeys": 3, "n_bays": 2, "interstorey_heights": [3.4, 3.4, 3.4], ...},
+     "hazard": {"z_factor": 0.3, ...}, "soil": {...}, "foundation": {"ftype": "raft", ...},
+     "kwargs": {"design_drift": 0.02}}
+
+Values missing from a job are taken from the `--defaults` JSON file (same keys as a job).
+Results are written to a results store (see `eqdes.store`) chunk by chunk, the failed jobs to a JSON lines
+failure log and the time and memory use of each chunk to 'chunks.jsonl'. With `--group-by`, streaming statistics of
+the outputs for each group of the jobs' "groups" labels (e.g. {"groups": {"archetype": "RC6", "soil_class": "C"}})
+are written to 'aggregates.json' (see `eqdes.aggregators`). Inventories are read one chunk at a time,
+so the memory use is bounded by the chunk size. With `--vectorised`, the frames of each chunk of a building table
+are designed together with `dbd.design_rc_frame_table`.
+
+Example::
+
+    eqdes design_rc_frame buildings.jsonl -o results --defaults hazard.json --workers 8
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+from eqdes import batch
+
+# method name: (module, inputs)
+METHODS = {
+    "design_rc_frame": ("dbd", ("building", "hazard")),
+    "design_rc_frame_w_sfsi_via_millen_et_al_2018": ("dbd", ("building", "hazard", "soil", "foundation")),
+    "design_rc_frame_w_sfsi_via_millen_et_al_2020": ("dbd", ("building", "hazard", "soil", "foundation")),
+    "design_rc_wall": ("dbd", ("building", "hazard")),
+    "design_rc_wall_via_millen_et_al_2020": ("dbd", ("building", "hazard", "soil", "foundation")),
+    "assess_rc_frame": ("dba", ("building", "hazard")),
+    "assess_rc_frame_w_sfsi_via_millen_et_al_2020": ("dba", ("building", "hazard", "soil", "foundation")),
+}
+DESIGN_OUTPUTS = ("design_drift", "delta_d", "mass_eff", "height_eff", "mu", "xi", "t_eff", "v_base")
+ASSESS_OUTPUTS = ("assessed_drift", "delta_max", "mass_eff", "height_eff", "mu", "xi", "t_eff", "v_base")
+
+
+def _set_attributes(obj, values):
+    for name, value in values.items():
+        setattr(obj, name, np.array(value) if isinstance(value, list) else value)
+    return obj
+
+
+def build_material(values):
+    from eqdes import models as em
+    return _set_attributes(em.ReinforcedConcrete(), values)
+
+
+def build_building(values):
+    """
+    Creates a FrameBuilding (if 'n_bays' is given) or WallBuilding from a dict of attributes, 'beam_depths'
+    are the depths of the beams in each bay, 'material' is a dict of ReinforcedConcrete attributes.
+    """
+    from eqdes import models as em
+    values = dict(values)
+    material = build_material(values.pop("material", {}))
+    if "n_bays" in values:
+        bd = em.FrameBuilding(n_storeys=values.pop("n_storeys"), n_bays=values.pop("n_bays"))
+        bd.bay_lengths = values.pop("bay_lengths")
+        bd.set_beam_prop("depth", values.pop("beam_depths"))
+    else:
+        bd = em.WallBuilding(values.pop("n_storeys"))
+    bd.material = material
+    return _set_attributes(bd, values)
+
+
+def build_hazard(values):
+    from eqdes import models as em
+    return _set_attributes(em.Hazard(), values)
+
+
+def build_soil(values):
+    from eqdes import models as em
+    return _set_attributes(em.Soil(), values)
+
+
+def build_foundation(values):
+    """Creates a RaftFoundation or PadFoundation ('ftype': 'pad') from a dict of attributes"""
+    from eqdes import models as em
+    values = dict(values)
+    if values.pop("ftype", "raft") == "pad":
+        return _set_attributes(em.PadFoundation(), values)
+    return _set_attributes(em.RaftFoundation(), values)
+
+
+BUILDERS = {"building": build_building, "hazard": build_hazard, "soil": build_soil, "foundation": build_foundation}
+
+
+def _is_table(fname):
+    return os.path.isdir(fname) or fname.endswith((".csv", ".npz"))
+
+
+def read_jobs(fname, defaults=None):
+    """
+    Generator of job dicts from a JSON lines inventory or a BuildingTable CSV/NPZ file or table store.
+
+    :param fname: inventory file
+    :param defaults: dict of default job values
+    """
+    defaults = defaults or {}
+
+    def merge(job):
+        for key, values in defaults.items():
+            if key not in job:
+                job[key] = values
+            elif isinstance(values, dict):
+                job[key] = {**values, **job[key]}
+        return job
+
+    if _is_table(fname):
+        from eqdes import inventory
+        n = 0
+        for bt in inventory.iter_chunks(fname):
+            for i in range(len(bt)):
+                yield merge({"id": str(n + i), "building": bt.get_frame_building(i)})
+            n += len(bt)
+        return
+    with open(fname) as f:
+        for i, line in enumerate(f):
+            if line.strip():
+                job = json.loads(line)
+                job.setdefault("id", str(i))
+                yield merge(job)
+
+
+def count_jobs(fname):
+    if _is_table(fname):
+        from eqdes import inventory
+        return inventory.count_buildings(fname)
+    with open(fname) as f:
+        return sum(1 for line in f if line.strip())
+
+
+_caches = {}
+
+
+def _get_cache(path):
+    """Result cache of the current process"""
+    if path not in _caches:
+        from eqdes import cache
+        _caches[path] = cache.ResultCache(path)
+    return _caches[path]
+
+
+def _job_args(method, job):
+    """Input objects of a job, built from dicts of attributes"""
+    return [job[name] if not isinstance(job[name], dict) else BUILDERS[name](job[name]) for name in METHODS[method][1]]
+
+
+def job_key(method, job):
+    """
+    Fingerprint of the inputs of a job (see `models.fingerprint`), used to run duplicate jobs once. None for jobs
+    with invalid inputs or a budget (partial results depend on the run time), these are always run.
+    """
+    from eqdes import models as em
+    kwargs = job.get("kwargs", {})
+    if kwargs.get("budget") is not None:
+        return None
+    try:
+        args = _job_args(method, job)
+    except Exception:  # invalid inputs, recorded in the failure log when the job is run
+        return None
+    return em.fingerprint(method, *args, **kwargs)
+
+
+def run_job(method, job, cache_path=None, outputs=(), arrays=(), memo=None):
+    """
+    Runs one job and returns (result, None) or (None, reason) if the job failed.
+
+    :param cache_path: if not None, the `outputs` and `arrays` are taken from (and stored in) this result cache
+    :param memo: if not None, dict of results by input fingerprint (see `models.fingerprint`), jobs with the
+        same inputs as a previous job are not re-run (unless the previous job was cut short by its budget)
+    """
+    import importlib
+    from eqdes import models as em
+    module_name, inputs = METHODS[method]
+    func = getattr(importlib.import_module(f"eqdes.{module_name}"), method)
+    try:
+        args = _job_args(method, job)
+        kwargs = job.get("kwargs", {})
+        if memo is not None:
+            key = em.fingerprint(method, *args, **kwargs)
+            if key in memo:
+                return memo[key]
+        if cache_path is not None:
+            res = _get_cache(cache_path).evaluate(func, *args, outputs=outputs, arrays=arrays, **kwargs)
+        else:
+            res = batch.evaluate_safely(func, *args, **kwargs)
+        if memo is not None and (kwargs.get("budget") is None or batch.is_complete(*res)):
+            memo[key] = res  # partial results of budgeted jobs depend on run time and are not reused
+        return res
+    except Exception as err:  # invalid inputs, recorded in the failure log
+        return None, f"{type(err).__name__}: {err}"
+
+
+def _job_row(method, job, outputs, arrays, cache_path):
+    obj, reason = run_job(method, job, cache_path, outputs, arrays)
+    vals = [np.asarray(getattr(obj, name), dtype=float).ravel() if obj is not None and
+            getattr(obj, name, None) is not None else None for name in arrays]
+    return job["id"], batch.extract_outputs(obj, outputs), vals, reason
+
+
+def _run_chunk(args):
+    method, items, outputs, arrays, cache_path = args
+    return [(i,) + _job_row(method, job, outputs, arrays, cache_path) for i, job in items]
+
+
+def _run_scheduled_job(args):
+    return _job_row(*args)
+
+
+def job_features(method, job):
+    """
+    Number of storeys, foundation type and soil shear modulus of a job, used to estimate its cost
+    (see `batch.CostModel`).
+    """
+    def value(name, attr):
+        obj = job.get(name)
+        if isinstance(obj, dict):
+            return obj.get(attr)
+        return getattr(obj, attr, None)
+
+    inputs = METHODS[method][1]
+    n_storeys = value("building", "n_storeys") or 1
+    ftype = None
+    if "foundation" in inputs:
+        fd = job.get("foundation")
+        if isinstance(fd, dict):
+            ftype = fd.get("ftype", "raft")
+        else:
+            ftype = "pad" if hasattr(fd, "pad") else "raft"
+    g_mod = value("soil", "g_mod") if "soil" in inputs else None
+    return n_storeys, ftype, g_mod
+
+
+def _run_chunk_scheduled(method, items, outputs, arrays, cache_path, n_workers, cost_model, executor):
+    """Runs the jobs of a chunk largest estimated cost first, and records the job times in the cost model"""
+    jobs = [job for i, job in items]
+    features = [job_features(method, job) for job in jobs]
+    costs = [cost_model.estimate(method, n, ftype, g_mod) for n, ftype, g_mod in features]
+    tasks = [(method, job, outputs, arrays, cache_path) for job in jobs]
+    rows = [None] * len(jobs)
+    for i, row, seconds in batch.schedule(_run_scheduled_job, tasks, costs, n_workers, executor=executor):
+        rows[i] = (items[i][0],) + row
+        n, ftype, g_mod = features[i]
+        cost_model.update(method, n, seconds, ftype, g_mod)
+    return rows
+
+
+def _chunks(jobs, chunk_size):
+    chunk = []
+    for job in jobs:
+        chunk.append(job)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+CHECKPOINT_FILE = "checkpoint.json"
+CHUNK_LOG_FILE = "chunks.jsonl"
+AGGREGATES_FILE = "aggregates.json"
+
+
+def write_aggregates(fname, agg, quantiles=(0.05, 0.5, 0.95)):
+    """Writes the summary of each group of a GroupedAggregator to a JSON file"""
+    summary = [{"labels": dict(zip(agg.by, key)), "outputs": outputs}
+               for key, outputs in agg.summary(quantiles).items()]
+    with open(fname, "w") as f:
+        json.dump({"by": agg.by, "groups": summary}, f, indent=1)
+
+
+def _log_chunk(flog, chunk, n_jobs, seconds):
+    """Writes the number of jobs, time and memory use of a chunk to the chunk log, returns the memory use"""
+    memory = batch.memory_usage()
+    flog.write(json.dumps({"chunk": chunk, "n_jobs": n_jobs, "seconds": seconds, "memory": memory}) + "\n")
+    flog.flush()
+    return memory
+
+
+def _progress_message(n_done, n_total, n_failed, start, memory):
+    msg = f"{n_done}/{n_total} jobs, {n_failed} failed, {time.time() - start:.1f} s"
+    if memory is not None:
+        msg += f", {memory / 1e6:.0f} MB"
+    return msg + "\n"
+
+
+def read_checkpoint(output_dir):
+    """Checkpoint of a run (see `run`), None if the run has no checkpoint"""
+    fname = os.path.join(output_dir, CHECKPOINT_FILE)
+    if not os.path.exists(fname):
+        return None
+    with open(fname) as f:
+        return json.load(f)
+
+
+def _write_checkpoint(output_dir, checkpoint):
+    tmp = os.path.join(output_dir, CHECKPOINT_FILE + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(checkpoint, f, indent=1)
+    os.replace(tmp, os.path.join(output_dir, CHECKPOINT_FILE))
+
+
+def _resume_failure_log(failure_log, completed):
+    """Keeps the failures of the completed jobs, failures of a chunk that was not stored are removed"""
+    failures = []
+    if os.path.exists(failure_log):
+        with open(failure_log) as f:
+            failures = [line for line in f if line.strip() and json.loads(line)["job"] in completed]
+    with open(failure_log, "w") as f:
+        f.writelines(failures)
+    return len(failures)
+
+
+def run(method, inventory_file, output_dir, defaults=None, n_workers=1, chunk_size=100, outputs=None,
+        arrays=("storey_forces",), failure_log=None, progress=None, cache_path=None, cost_model_path=None,
+        budget=None, resume=False, group_by=None):
+    """
+    Runs a method on all jobs of an inventory and writes the results chunk by chunk.
+
+    After each chunk, the results are appended to the store, the failures to the failure log and a checkpoint
+    ('checkpoint.json' with the method, inputs and number of completed jobs) is written to the output directory.
+    The store can be read (mode='r') while the run is in progress. A run that was interrupted is continued with
+    `resume=True`: the completed jobs (the 'job' column of the store) are skipped.
+
+    The inventory is read once before the run to find duplicate jobs (same fingerprint, see `job_key`), each
+    distinct job is run once and its results are copied to its duplicates.
+
+    :param method: name in METHODS
+    :param inventory_file: JSON lines or BuildingTable CSV/NPZ file
+    :param output_dir: results store directory
+    :param defaults: dict of default job values
+    :param n_workers: number of worker processes
+    :param chunk_size: number of jobs per chunk
+    :param outputs: names of scalar outputs (default depends on the method)
+    :param arrays: names of array outputs
+    :param failure_log: JSON lines file of the failed jobs (default '<output_dir>/failures.jsonl')
+    :param progress: stream for progress messages (e.g. sys.stderr), None for no messages
+    :param cache_path: result cache database (see `eqdes.cache`), None to not use a cache
+    :param cost_model_path: if not None, the jobs of each chunk are scheduled largest estimated cost first
+        over the workers (see `batch.schedule`) and the job times are saved to this JSON file to refine
+        the estimates of later runs
+    :param budget: dict of `batch.Budget` arguments ('max_time', 'max_evaluations') of each job, jobs that use up
+        their budget return their last iterate with 'converged' = 0
+    :param resume: if True, continue the run in `output_dir` from its checkpoint
+    :param group_by: if not None, names of the job "groups" labels, the labels are stored as 'group_<name>'
+        columns and the statistics of the outputs of each group are written to 'aggregates.json'
+    :return: tuple of (number of jobs, number of failed jobs)
+    """
+    from eqdes import store
+    if method not in METHODS:
+        raise ValueError(f"Unknown method {method}, must be one of {sorted(METHODS)}")
+    if outputs is None:
+        outputs = ASSESS_OUTPUTS if method.startswith("assess") else DESIGN_OUTPUTS
+        if "sfsi" in method or method.endswith("millen_et_al_2020"):
+            outputs += ("theta_f",)
+        if budget is not None:
+            outputs += ("converged",)
+    if budget is not None:
+        defaults = dict(defaults or {})
+        defaults["kwargs"] = {"budget": budget, **defaults.get("kwargs", {})}
+    st = store.ResultsStore(output_dir)
+    if failure_log is None:
+        failure_log = os.path.join(output_dir, "failures.jsonl")
+    label_columns = [f"group_{name}" for name in group_by or ()]
+    checkpoint = {"method": method, "inventory": os.path.abspath(inventory_file), "outputs": list(outputs),
+                  "arrays": list(arrays), "group_by": label_columns, "n_done": 0, "n_failed": 0,
+                  "complete": False}
+    completed = set()
+    if resume and len(st):
+        previous = read_checkpoint(output_dir)
+        if previous is None:
+            raise ValueError(f"Results store {output_dir} has no checkpoint")
+        for name in ("method", "outputs", "arrays", "group_by"):
+            if previous.get(name, []) != checkpoint[name]:
+                raise ValueError(f"Can not resume, {name} {checkpoint[name]} differs from checkpoint "
+                                 f"{previous[name]}")
+        completed = set(np.asarray(st["job"]).astype(int).tolist())
+        checkpoint["n_failed"] = _resume_failure_log(failure_log, completed)
+    elif len(st):
+        raise ValueError(f"Results store {output_dir} is not empty")
+    else:
+        for fname in (failure_log, os.path.join(output_dir, CHUNK_LOG_FILE)):
+            if os.path.exists(fname):
+                os.remove(fname)
+    n_total = count_jobs(inventory_file) if progress is not None else None
+    agg = None
+    if group_by is not None:
+        from eqdes import aggregators
+        if completed:  # statistics of the completed jobs
+            agg = aggregators.aggregate_store(output_dir, outputs, label_columns)
+        else:
+            agg = aggregators.GroupedAggregator(outputs, label_columns)
+    labels = {}  # group labels of the jobs that are running
+
+    # duplicate jobs (same inputs) are run once and their results are copied to the duplicates
+    pending = []
+    keys = []
+    for i, job in enumerate(read_jobs(inventory_file, defaults)):
+        if i not in completed:
+            pending.append(i)
+            keys.append(job_key(method, job) or i)
+    unique, inverse = batch.deduplicate(keys)
+    representative = dict(zip(pending, np.array(pending, dtype=int)[unique][inverse].tolist()))
+    n_copies = Counter(rep for i, rep in representative.items() if rep != i)
+    shared = {}  # rows of the jobs with duplicates that are not yet written
+    duplicates = {}  # chunk number: list of (job index, job id, index of the job that is run)
+
+    def items():
+        for i, job in enumerate(read_jobs(inventory_file, defaults)):
+            if i not in completed:
+                if group_by is not None:
+                    labels[i] = [str(job.get("groups", {}).get(name, "")) for name in group_by]
+                yield i, job
+
+    def unique_chunks():
+        for k, chunk in enumerate(_chunks(items(), chunk_size)):
+            duplicates[k] = [(i, job["id"], representative[i]) for i, job in chunk if representative[i] != i]
+            yield [(i, job) for i, job in chunk if representative[i] == i]
+
+    chunks = unique_chunks()
+    executor = None
+    try:
+        if cost_model_path is not None:
+            cost_model = batch.CostModel(cost_model_path)
+            if n_workers > 1:
+                from concurrent.futures import ProcessPoolExecutor
+                executor = ProcessPoolExecutor(max_workers=n_workers)
+            results = (_run_chunk_scheduled(method, chunk, outputs, arrays, cache_path, n_workers, cost_model, executor)
+                       for chunk in chunks)
+        else:
+            tasks = ((method, chunk, outputs, arrays, cache_path) for chunk in chunks)
+            results = batch.map_chunks(_run_chunk, tasks, n_workers)
+        n_done = len(completed)
+        n_failed = checkpoint["n_failed"]
+        start = time.time()
+        chunk_start = start
+        with open(failure_log, "a") as flog, open(os.path.join(output_dir, CHUNK_LOG_FILE), "a") as clog:
+            for k, rows in enumerate(results):
+                rows = list(rows)
+                for row in rows:
+                    if n_copies[row[0]]:
+                        shared[row[0]] = row
+                for i, job_id, rep in duplicates.pop(k):
+                    rows.append((i, job_id) + shared[rep][2:])
+                    n_copies[rep] -= 1
+                    if not n_copies[rep]:
+                        del shared[rep]
+                rows.sort(key=lambda row: row[0])
+                # failures are logged before the results are stored, a resumed run removes the failures of
+                # jobs that are not in the store
+                for i, job_id, vals, arrs, reason in rows:
+                    if reason is not None:
+                        flog.write(json.dumps({"job": i, "id": job_id, "reason": reason}) + "\n")
+                        n_failed += 1
+                flog.flush()
+                data = {"job": np.array([row[0] for row in rows])}
+                values = np.array([row[2] for row in rows]).reshape(len(rows), len(outputs))
+                data.update({name: values[:, j] for j, name in enumerate(outputs)})
+                data.update({name: [row[3][j] for row in rows] for j, name in enumerate(arrays)})
+                data["reason"] = [row[4] for row in rows]
+                kinds = {name: "ragged" for name in arrays}
+                kinds["reason"] = "category"
+                if group_by is not None:
+                    job_labels = [labels.pop(row[0]) for row in rows]
+                    for j, name in enumerate(label_columns):
+                        data[name] = [lbls[j] for lbls in job_labels]
+                        kinds[name] = "category"
+                    agg.update({name: data[name] for name in outputs}, {name: data[name] for name in label_columns})
+                st.append(data, kinds=kinds)
+                n_done += len(rows)
+                checkpoint.update(n_done=n_done, n_failed=n_failed)
+                _write_checkpoint(output_dir, checkpoint)
+                if cost_model_path is not None:
+                    cost_model.save(cost_model_path)
+                memory = _log_chunk(clog, k, len(rows), time.time() - chunk_start)
+                chunk_start = time.time()
+                if progress is not None:
+                    progress.write(_progress_message(n_done, n_total, n_failed, start, memory))
+                    progress.flush()
+        if agg is not None:
+            write_aggregates(os.path.join(output_dir, AGGREGATES_FILE), agg)
+        checkpoint["complete"] = True
+        _write_checkpoint(output_dir, checkpoint)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return n_done, n_failed
+
+
+def run_table(inventory_file, output_dir, hz, design_drift=0.02, chunk_size=10000, outputs=DESIGN_OUTPUTS,
+              arrays=("storey_forces",), progress=None):
+    """
+    Designs the frames of a building table chunk by chunk with `dbd.design_rc_frame_table`.
+
+    Only one chunk of the inventory and its results are held in memory. The results are appended to the store
+    after each chunk, and the time and memory use of each chunk are written to 'chunks.jsonl'.
+
+    :param inventory_file: BuildingTable CSV/NPZ file or table store directory
+    :param output_dir: results store directory
+    :param hz: Hazard object
+    :param design_drift: design drift
+    :param chunk_size: number of buildings per chunk
+    :param outputs: names of scalar outputs
+    :param arrays: names of array outputs
+    :param progress: stream for progress messages, None for no messages
+    :return: tuple of (number of buildings, number of buildings without a compatible design)
+    """
+    from eqdes import dbd
+    from eqdes import inventory
+    from eqdes import store
+    st = store.ResultsStore(output_dir)
+    if len(st):
+        raise ValueError(f"Results store {output_dir} is not empty")
+    n_total = inventory.count_buildings(inventory_file) if progress is not None else None
+    n_done = 0
+    n_failed = 0
+    start = time.time()
+    chunk_start = start
+    with open(os.path.join(output_dir, CHUNK_LOG_FILE), "w") as clog:
+        for k, bt in enumerate(inventory.iter_chunks(inventory_file, chunk_size)):
+            res = dbd.design_rc_frame_table(bt, hz, design_drift=design_drift)
+            failed = np.isnan(res["v_base"])
+            data = {"job": np.arange(n_done, n_done + len(bt))}
+            data.update({name: res[name] for name in outputs})
+            data.update({name: [None if failed[i] else res[name][i] for i in range(len(bt))] for name in arrays})
+            data["reason"] = ["System displacements not compatible in design" if fail else None for fail in failed]
+            st.append(data, kinds={**{name: "ragged" for name in arrays}, "reason": "category"})
+            n_done += len(bt)
+            n_failed += int(np.sum(failed))
+            memory = _log_chunk(clog, k, len(bt), time.time() - chunk_start)
+            chunk_start = time.time()
+            if progress is not None:
+                progress.write(_progress_message(n_done, n_total, n_failed, start, memory))
+                progress.flush()
+    return n_done, n_failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="eqdes", description="Batch displacement-based design and assessment")
+    parser.add_argument("method", choices=sorted(METHODS))
+    parser.add_argument("inventory", help="JSON lines job file or BuildingTable CSV/NPZ file")
+    parser.add_argument("-o", "--output", required=True, help="results store directory")
+    parser.add_argument("--defaults", help="JSON file of default job values")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=100, help="number of jobs per chunk")
+    parser.add_argument("--outputs", help="comma separated names of the scalar outputs")
+    parser.add_argument("--failure-log", help="failure log file (default <output>/failures.jsonl)")
+    parser.add_argument("--cache", help="result cache database, previously computed jobs are not re-run")
+    parser.add_argument("--cost-model", help="JSON file of job times, jobs are scheduled largest estimated cost "
+                                             "first and the file is updated with the times of this run")
+    parser.add_argument("--max-time", type=float, help="maximum time [s] of each job")
+    parser.add_argument("--max-evaluations", type=int, help="maximum number of iterations of each job")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted run from its checkpoint")
+    parser.add_argument("--vectorised", action="store_true",
+                        help="design the frames of each chunk together (design_rc_frame with a building table)")
+    parser.add_argument("--group-by", help="comma separated names of the job group labels, statistics of the "
+                                           "outputs of each group are written to <output>/aggregates.json")
+    parser.add_argument("--quiet", action="store_true", help="do not report progress")
+    args = parser.parse_args(argv)
+    defaults = None
+    if args.defaults:
+        with open(args.defaults) as f:
+            defaults = json.load(f)
+    outputs = tuple(args.outputs.split(",")) if args.outputs else None
+    budget = None
+    if args.max_time is not None or args.max_evaluations is not None:
+        budget = {"max_time": args.max_time, "max_evaluations": args.max_evaluations}
+    if args.vectorised:
+        if args.method != "design_rc_frame" or not _is_table(args.inventory):
+            parser.error("--vectorised requires design_rc_frame and a building table inventory")
+        defaults = defaults or {}
+        kwargs = {"outputs": outputs} if outputs else {}
+        n_jobs, n_failed = run_table(args.inventory, args.output, build_hazard(defaults.get("hazard", {})),
+                                     design_drift=defaults.get("kwargs", {}).get("design_drift", 0.02),
+                                     chunk_size=args.chunk_size, progress=None if args.quiet else sys.stderr,
+                                     **kwargs)
+        if not args.quiet:
+            sys.stderr.write(f"Completed {n_jobs} jobs, {n_failed} failed\n")
+        return 0
+    n_jobs, n_failed = run(args.method, args.inventory, args.output, defaults=defaults, n_workers=args.workers,
+                           chunk_size=args.chunk_size, outputs=outputs, failure_log=args.failure_log,
+                           progress=None if args.quiet else sys.stderr, cache_path=args.cache,
+                           cost_model_path=args.cost_model, budget=budget, resume=args.resume,
+                           group_by=args.group_by.split(",") if args.group_by is not None else None)
+    if not args.quiet:
+        sys.stderr.write(f"Completed {n_jobs} jobs, {n_failed} failed\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,15 @@
 import numpy as np
 
 from sfsimodels import loader as ml
-from sfsimodels import output as mo
 
 from eqdes import models as em
-import sfsimodels as sm
 from eqdes import dbd_tools as dt
 from eqdes import nonlinear_foundation as nf
 from eqdes import moment_equilibrium
-import geofound as gf
-
-from eqdes.extensions.exceptions import DesignError
-
-from eqdes.nonlinear_foundation import calc_moment_capacity_via_millen_et_al_2020, calc_fd_rot_via_millen_et_al_2020, \
-    calc_fd_rot_via_millen_et_al_2020_w_tie_beams
+from eqdes import batch
 
 
+@batch.budgeted
 def assess_rc_frame(fb, hz, theta_max, otm_max, **kwargs):
     """
     Displacement-based assessment of a frame building
@@ -24,7 +18,7 @@ def assess_rc_frame(fb, hz, theta_max, otm_max, **kwargs):
     :param hz: Hazard Object
     :param theta_max: [degrees], maximum structural interstorey drift
     :param otm_max: [N], maximum overturning moment
-    :param kwargs:
+    :param kwargs: 'budget': time or evaluation budget (see `batch.Budget`)
     :return:
     """
 
@@ -32,10 +26,12 @@ def assess_rc_frame(fb, hz, theta_max, otm_max, **kwargs):
     af.otm_max = otm_max
     af.theta_max = theta_max
     verbose = kwargs.get('verbose', af.verbose)
+    budget = kwargs['budget']
 
     ductility_reduction_factors = 100
     theta_c = theta_max
     for i in range(ductility_reduction_factors):
+        budget.spend(af)
         mu_reduction_factor = 1.0 - float(i) / ductility_reduction_factors
         theta_c = theta_max * mu_reduction_factor
         displacements = dt.displacement_profile_frame(theta_c, af.heights, af.hm_factor)
@@ -76,6 +72,7 @@ def assess_rc_frame(fb, hz, theta_max, otm_max, **kwargs):
     return af
 
 
+@batch.budgeted
 def assess_rc_frame_w_sfsi_via_millen_et_al_2020(dfb, hz, sl, fd, theta_max, mcbs=None, **kwargs):
     """
     Displacement-based assessment of a frame building considering SFSI
@@ -87,15 +84,17 @@ def assess_rc_frame_w_sfsi_via_millen_et_al_2020(dfb, hz, sl, fd, theta_max, mcb
     :param otm_max: [N],Maximum overturning moment
     :param mcbs: [Nm], Column base moments (required if foundation is PadFoundation)
     :param found_rot: [rad], initial guess of foundation rotation
-    :param kwargs:
+    :param kwargs: 'budget': time or evaluation budget (see `batch.Budget`), 'fd_static_values': soil and
+        foundation values (see `models.calc_fd_static_values`)
     :return:
     """
     horz2vert_mass = kwargs.get('horz2vert_mass', 1.0)
-    af = em.AssessedSFSIRCFrame(dfb, hz, sl, fd)
+    af = em.AssessedSFSIRCFrame(dfb, hz, sl, fd, fd_static_values=kwargs.get('fd_static_values'))
 
     af.theta_max = theta_max
 
     verbose = kwargs.get('verbose', af.verbose)
+    budget = kwargs['budget']
 
     af.static_values()
 
@@ -117,6 +116,7 @@ def assess_rc_frame_w_sfsi_via_millen_et_al_2020(dfb, hz, sl, fd, theta_max, mcb
     otm_max = moment_equilibrium.calc_otm_capacity(af)
 
     for i in range(iterations_ductility):
+        budget.spend(af)
         mu_reduction_factor = 1.0 - float(i) / ductility_reduction_factors
         theta_c = theta_max * mu_reduction_factor
         displacements = dt.displacement_profile_frame(theta_c, heights, af.hm_factor, foundation=True,
@@ -179,61 +179,13 @@ def assess_rc_frame_w_sfsi_via_millen_et_al_2020(dfb, hz, sl, fd, theta_max, mcb
             if verbose > 1:
                 print("drift %.2f is not compatible" % theta_c)
     if fd.type == 'pad_foundation':
-        # assert isinstance(fd, em.PadFoundation)
-        ip_axis = 'length'
-
         af.storey_forces = dt.calculate_storey_forces(af.storey_mass_p_frame, displacements, af.v_base, btype='frame')
-        # moment_beams_cl, moment_column_bases, axial_seismic = moment_equilibrium.assess(af, af.storey_forces, mom_ratio)
         mom_ratio = 0.6  # TODO: need to validate !
         moment_column_bases = af.get_column_base_moments()
-        # TODO: need to account for minimum column base moment which shifts mom_ratio
-        h_eff = af.interstorey_heights[0] * mom_ratio + fd.height
-        pad = af.fd.pad
-        pad.n_ult = af.soil_q * pad.area
-        col_loads = af.get_column_vert_loads()
-        ext_nloads = max(col_loads[0])
-        int_nloads = np.max(col_loads[1:-1])
-
-        m_foot_int = np.max(moment_column_bases[1:-1]) * h_eff / af.interstorey_heights[0]
-        pad.n_load = int_nloads
-        tb_sect = getattr(fd, f'tie_beam_sect_in_{ip_axis}_dir')
-        tb_length = (fd.length - (fd.pad_length * fd.n_pads_l)) / (fd.n_pads_l - 1)
-        if tb_sect is not None:
-            assert isinstance(tb_sect, sm.sections.RCBeamSection)
-            # See supporting_docs/tie-beam-stiffness-calcs.pdf
-            k_ties = (6 * tb_sect.i_rot_ww_cracked * tb_sect.rc_mat.e_mod_conc) / tb_length
-        else:
-            k_ties = 0
-        l_in = getattr(pad, ip_axis)
-        k_f_0_pad = gf.stiffness.calc_rotational_via_gazetas_1991(sl, pad, ip_axis=ip_axis)
-        rot_ipad = calc_fd_rot_via_millen_et_al_2020_w_tie_beams(k_f_0_pad, l_in, int_nloads, pad.n_ult, psi,
-                                                                 m_foot_int, h_eff, 2 * k_ties)
-        # TODO: change to cycle through all
-        # Exterior footings
-        if rot_ipad is None:  # First try moment ratio of 0.5
-            # m_cap = pad.n_load * getattr(pad, ip_axis) / 2 * (1 - pad.n_load / pad.n_ult)
-            m_cap = calc_moment_capacity_via_millen_et_al_2020(l_in, pad.n_load, pad.n_ult, psi, h_eff)
-            raise DesignError(f"Design failed - interior footing moment demand ({m_foot_int/1e3:.3g})"
-                              f" kNm exceeds capacity (~{m_cap/1e3:.3g} kNm)")
-        m_foot_ext = np.max(moment_column_bases[np.array([0, -1])]) * h_eff / af.interstorey_heights[0]
-        pad.n_load = ext_nloads
-        # rot_epad = check_local_footing_rotations(sl, pad, m_foot_ext, h_eff, ip_axis=ip_axis, k_ties=k_ties)
-        rot_epad = calc_fd_rot_via_millen_et_al_2020_w_tie_beams(k_f_0_pad, l_in, ext_nloads, pad.n_ult, psi,
-                                                                 m_foot_ext, h_eff, k_ties)
-        if rot_epad is None:
-            m_cap = pad.n_load * getattr(pad, ip_axis) / 2 * (1 - pad.n_load / pad.n_ult)
-            raise DesignError(f"Design failed - interior footing moment demand ({m_foot_ext/1e3:.3g})"
-                              f" kNm exceeds capacity (~{m_cap/1e3:.3g} kNm)")
-        if max([rot_ipad, rot_epad]) - found_rot > theta_c - af.theta_y:
-            # footing should be increased or design drift increased
-            pad_rot = max([rot_ipad, rot_epad])
-            plastic_rot = theta_c - af.theta_y
-            raise DesignError(f"Design failed - footing rotation ({pad_rot:.3g}) "
-                              f"exceeds plastic rotation (~{plastic_rot:.3g})")
-        af.m_foot = np.zeros(af.n_bays + 1)
-        af.m_foot[0] = m_foot_ext
-        af.m_foot[-1] = m_foot_ext
-        af.m_foot[1:-1] = m_foot_int
+        af.pads = em.calc_pad_footing_rotations(af, af.fd, moment_column_bases, psi, af.fd_static_values['k_f_0_pad'],
+                                                af.soil_q, mom_ratio=mom_ratio)
+        em.check_pad_footing_rotations(af.pads, found_rot, theta_c - af.theta_y)
+        af.m_foot = af.pads['m_foot'][:, 0]
 
     af.theta_f = found_rot
     af.assessed_drift = theta_c
@@ -241,6 +193,81 @@ def assess_rc_frame_w_sfsi_via_millen_et_al_2020(dfb, hz, sl, fd, theta_max, mcb
     return af
 
 
+def calc_capacity_curve(fb, hz, theta_max, otm_max, n_points=100):
+    """
+    Capacity curve of a frame building from the displacement-based assessment relations, evaluated along a
+    grid of drifts in one vectorised pass.
+
+    The drift grid is the same as the ductility reduction steps of `assess_rc_frame` for `n_points=100`.
+
+    :param fb: FrameBuilding Object
+    :param hz: Hazard Object
+    :param theta_max: [degrees], maximum structural interstorey drift
+    :param otm_max: [N], maximum overturning moment
+    :param n_points: number of drift levels between theta_max / n_points and theta_max
+    :return: dict of arrays (n_points,) of 'theta', 'delta', 'v_base', 'k_eff', 't_eff', 'xi', 'eta', 'mu',
+        'mass_eff' and 'height_eff'
+    """
+    af = em.AssessedRCFrame(fb, hz)
+    thetas = np.linspace(theta_max / n_points, theta_max, n_points)
+    # storey values as (n_storeys, n_points)
+    heights = np.asarray(af.heights)[:, np.newaxis]
+    displacements = dt.cal_displaced_shape(thetas, heights, btype="frame") * af.hm_factor
+    masses = np.asarray(af.storey_mass_p_frame)[:, np.newaxis]
+    delta, mass_eff, height_eff = dt.equivalent_sdof(masses, displacements, heights)
+    theta_y = dt.conc_frame_yield_drift(af.fye, af.concrete.e_mod_steel, af.av_bay, af.av_beam)
+    delta_y = dt.yield_displacement(theta_y, height_eff)
+    mu = dt.ductility(delta, delta_y)
+    xi = dt.equivalent_viscous_damping(mu)
+    eta = dt.reduction_factor(xi)
+    otm = otm_max * dt.bilinear_load_factor(mu, mu[-1], af.post_yield_stiffness_ratio)
+    v_base = otm / height_eff
+    k_eff = v_base / delta
+    t_eff = dt.effective_period_from_stiffness(mass_eff, k_eff)
+    return {'theta': thetas, 'delta': delta, 'v_base': v_base, 'k_eff': k_eff, 't_eff': t_eff, 'xi': xi,
+            'eta': eta, 'mu': mu, 'mass_eff': mass_eff, 'height_eff': height_eff}
+
+
+def calc_capacity_spectrum_intersection(curve, corner_disp, corner_period):
+    """
+    Performance point where the displacement demand equals the displacement of the capacity curve.
+
+    The demand at each point of the capacity curve is the displacement spectrum reduced for the damping at that
+    point. The performance point is interpolated between the largest drift where the demand exceeds the capacity
+    and the next drift on the grid. Capacity curves of many buildings (or hazard levels) can be stacked, the
+    last axis is the drift grid.
+
+    :param curve: dict of arrays from `calc_capacity_curve` (or stacked arrays (..., n_points))
+    :param corner_disp: corner spectral displacement (scalar or array broadcastable to the leading dimensions)
+    :param corner_period: corner period
+    :return: dict of arrays of the leading dimensions of 'theta', 'delta', 'v_base', 't_eff' and 'xi' at the
+        performance point, and 'exceeded' (True if the demand exceeds the capacity at the maximum drift, then the
+        values are at the maximum drift). If the demand is less than the capacity at every drift of the grid (the
+        performance point is below the first drift) the values are nan.
+    """
+    corner_disp = np.asarray(corner_disp, dtype=float)[..., np.newaxis]
+    demand = dt.displacement_from_effective_period(curve['eta'], corner_disp, curve['t_eff'], corner_period)
+    excess = demand - curve['delta']
+    n_points = excess.shape[-1]
+    exceeded = excess[..., -1] > 0
+    intersected = np.any(excess > 0, axis=-1)
+    # index of the largest drift where the demand exceeds the capacity (0 if it is never exceeded)
+    idx = n_points - 1 - np.argmax((excess > 0)[..., ::-1], axis=-1)
+    idx = np.where(intersected, idx, 0)
+    idx = np.minimum(idx, n_points - 2)
+    e0 = np.take_along_axis(excess, idx[..., np.newaxis], axis=-1)[..., 0]
+    e1 = np.take_along_axis(excess, idx[..., np.newaxis] + 1, axis=-1)[..., 0]
+    frac = np.where(exceeded, 1.0, np.clip(e0 / np.where(e0 != e1, e0 - e1, 1.0), 0.0, 1.0))
+    point = {}
+    for name in ['theta', 'delta', 'v_base', 't_eff', 'xi']:
+        vals = np.broadcast_to(curve[name], excess.shape)
+        v0 = np.take_along_axis(vals, idx[..., np.newaxis], axis=-1)[..., 0]
+        v1 = np.take_along_axis(vals, idx[..., np.newaxis] + 1, axis=-1)[..., 0]
+        point[name] = np.where(intersected, v0 + frac * (v1 - v0), np.nan)
+    point['exceeded'] = exceeded
+    return point
+
+
 def run_frame_dba_fixed():
     fb = em.FrameBuilding()
     hz = em.Hazard()
@@ -8,11 +8,12 @@ from eqdes import dbd_tools as dt
 from eqdes import nonlinear_foundation as nf
 from eqdes.extensions.exceptions import DesignError
 from eqdes import moment_equilibrium
+from eqdes import batch
 
-from eqdes.nonlinear_foundation import calc_moment_capacity_via_millen_et_al_2020, calc_fd_rot_via_millen_et_al_2020, \
-    calc_fd_rot_via_millen_et_al_2020_w_tie_beams
+from eqdes.nonlinear_foundation import calc_fd_rot_via_millen_et_al_2020
 
 
+@batch.budgeted
 def design_rc_frame(fb, hz, design_drift=0.02, **kwargs):
     """
     Displacement-based design of a reinforced concrete frame building.
@@ -20,15 +21,17 @@ def design_rc_frame(fb, hz, design_drift=0.02, **kwargs):
     :param fb: sfsimodels.FrameBuilding
     :param hz:
     :param design_drift:
-    :param kwargs:
+    :param kwargs: 'budget': time or evaluation budget (see `batch.Budget`)
     :return:
     """
 
     df = em.DesignedRCFrame(fb, hz)
     df.design_drift = design_drift
     verbose = kwargs.get('verbose', df.verbose)
+    budget = kwargs['budget']
 
     for i in range(100):
+        budget.spend(df)
         mu_reduction_factor = 1.0 - float(i) / 100
         theta_c = df.design_drift * mu_reduction_factor
         displacements = dt.displacement_profile_frame(theta_c, df.heights, df.hm_factor)
@@ -61,12 +64,70 @@ def design_rc_frame(fb, hz, design_drift=0.02, **kwargs):
     return df
 
 
+def design_rc_frame_table(bt, hz, design_drift=0.02):
+    """
+    Displacement-based design of all reinforced concrete frames in a building table.
+
+    Same procedure as `design_rc_frame`, evaluated on arrays of (storeys, buildings) without building the
+    FrameBuilding objects. Buildings without a compatible drift have nan outputs.
+
+    :param bt: inventory.BuildingTable
+    :param hz: Hazard object
+    :param design_drift: Design drift (scalar or array of n_buildings)
+    :return: dict of arrays of n_buildings (names of DesignedRCFrame), 'storey_forces' is a list of arrays
+    """
+    n_storeys = bt['n_storeys']
+    n_builds = len(bt)
+    mask = bt.storey_mask
+    heights = np.cumsum(bt.padded('interstorey_heights'), axis=0)  # roof height repeated above the roof
+    masses = bt.padded('storey_masses') / bt['n_seismic_frames']  # zero above the roof
+    max_height = np.max(heights, axis=0, initial=0.0)
+    hm_factor = dt.cal_higher_mode_factor(n_storeys, btype="frame")
+    theta_y = dt.conc_frame_yield_drift(1.1 * bt['fy'], bt['e_mod_steel'], bt.average('bay_lengths'),
+                                        bt.average('beam_depths'))
+    design_drift = np.broadcast_to(np.asarray(design_drift, dtype=float), (n_builds,))
+    res = {name: np.full(n_builds, np.nan) for name in ['delta_d', 'mass_eff', 'height_eff', 'mu', 'xi', 'eta',
+                                                       't_eff', 'v_base']}
+    res['design_drift'] = design_drift.copy()
+    res['theta_y'] = theta_y
+    displacements = np.zeros_like(heights)
+    pending = np.arange(n_builds)
+    for i in range(100):
+        if not len(pending):
+            break
+        theta_c = design_drift[pending] * (1.0 - float(i) / 100)
+        h = heights[:, pending]
+        h_max = max_height[pending]
+        disps = theta_c * h * (4 * h_max - h) / (4 * h_max - h[0]) * hm_factor[pending]
+        delta_d, mass_eff, height_eff = dt.equivalent_sdof(masses[:, pending], disps, h, mask=mask[:, pending])
+        mu = dt.ductility(delta_d, dt.yield_displacement(theta_y[pending], height_eff))
+        xi = dt.equivalent_viscous_damping(mu, mtype="concrete", btype="frame")
+        eta = dt.reduction_factor(xi)
+        t_eff = dt.effective_period(delta_d, eta, hz.corner_disp, hz.corner_period)
+        ok = t_eff > 0
+        idx = pending[ok]
+        for name, vals in zip(['delta_d', 'mass_eff', 'height_eff', 'mu', 'xi', 'eta', 't_eff'],
+                              [delta_d, mass_eff, height_eff, mu, xi, eta, t_eff]):
+            res[name][idx] = vals[ok]
+        displacements[:, idx] = disps[:, ok]
+        pending = pending[~ok]
+    k_eff = dt.effective_stiffness(res['mass_eff'], res['t_eff'])
+    res['v_base'] = dt.design_base_shear(k_eff, res['delta_d'])
+    mass_x_disp = masses * displacements
+    with np.errstate(invalid='ignore', divide='ignore'):
+        forces = 0.9 * res['v_base'] * mass_x_disp / np.sum(mass_x_disp, axis=0)  # see calculate_storey_forces
+    forces[n_storeys - 1, np.arange(n_builds)] += 0.1 * res['v_base']
+    res['storey_forces'] = [forces[:n, j] for j, n in enumerate(n_storeys)]
+    return res
+
+
+@batch.budgeted
 def design_rc_frame_w_sfsi_via_millen_et_al_2020(fb, hz, sl, fd, design_drift=0.02, found_rot=0.00001,
                                          found_rot_tol=0.02, found_rot_iterations=20, **kwargs):
-    import geofound as gf
-    df = em.DesignedSFSIRCFrame(fb, hz, sl, fd)
+    df = em.DesignedSFSIRCFrame(fb, hz, sl, fd, fd_static_values=kwargs.get('fd_static_values'))
     df.design_drift = design_drift
     verbose = kwargs.get('verbose', df.verbose)
+    budget = kwargs['budget']
     df.static_values()
     psi = 0.75 * np.tan(df.sl.phi_r)
 
@@ -86,7 +147,7 @@ def design_rc_frame_w_sfsi_via_millen_et_al_2020(fb, hz, sl, fd, design_drift=0.
         temp_found_rot = found_rot
         temp_delta_fshear = 0
         for iteration in range(found_rot_iterations):  # iterate the foundation rotation
-
+            budget.spend(df)
             displacements = dt.displacement_profile_frame(theta_c, heights, df.hm_factor, foundation=True,
                                                     fd_height=df.fd.height, theta_f=temp_found_rot)
             df.delta_d, df.mass_eff, df.height_eff = dt.equivalent_sdof(df.storey_mass_p_frame, displacements, heights)
@@ -145,6 +206,9 @@ def design_rc_frame_w_sfsi_via_millen_et_al_2020(fb, hz, sl, fd, design_drift=0.
 
                 temp_found_rot = calc_fd_rot_via_millen_et_al_2020(df.k_f_0, df.fd.length, df.total_weight, n_ult,
                                                                    psi, moment_f, df.height_eff)
+                if temp_found_rot is None:
+                    raise DesignError(f"Design failed - foundation moment demand ({moment_f/1e3:.3g} kNm) "
+                                      f"exceeds capacity")
                 if abs(prev_delta_fshear - temp_delta_fshear) / df.delta_d < 0.01 and abs(prev_found_rot - temp_found_rot) * hf / df.delta_d < 0.01:
                     fd_compatible = True
                     break
@@ -157,8 +221,8 @@ def design_rc_frame_w_sfsi_via_millen_et_al_2020(fb, hz, sl, fd, design_drift=0.
         if disp_compatible:
             break
     if not fd_compatible:
-        print(i, iteration)
-        raise DesignError(f'Foundation displacements not compatible in design (prev: {prev_found_rot}, last: {found_rot})')
+        raise DesignError(f'Foundation displacements not compatible in design (prev: {prev_found_rot}, '
+                          f'last: {found_rot}, iteration: {i}, foundation iteration: {iteration})')
     if not disp_compatible:
         raise DesignError('System displacements not compatible in design')
 
@@ -170,62 +234,23 @@ def design_rc_frame_w_sfsi_via_millen_et_al_2020(fb, hz, sl, fd, design_drift=0.
 
     if fd.type == 'pad_foundation':
         assert isinstance(fd, sm.PadFoundation)
-        ip_axis = 'length'
         mom_ratio = 0.6
         moment_beams_cl, moment_column_bases, axial_seismic = moment_equilibrium.assess(df, df.storey_forces, mom_ratio)
-        # TODO: need to account for minimum column base moment which shifts mom_ratio
-        h_eff = df.interstorey_heights[0] * mom_ratio + fd.height
-        pad = df.fd.pad
-        pad.n_ult = df.soil_q * pad.area
-        col_loads = df.get_column_vert_loads()
-        ext_nloads = max(col_loads[0])
-        int_nloads = np.max(col_loads[1:-1])
-
-        m_foot_int = np.max(moment_column_bases[1:-1]) * h_eff / df.interstorey_heights[0]
-        pad.n_load = int_nloads
-        tb_sect = getattr(fd, f'tie_beam_sect_in_{ip_axis}_dir')
-        tb_length = (fd.length - (fd.pad_length * fd.n_pads_l)) / (fd.n_pads_l - 1)
-        if tb_sect is not None:
-            assert isinstance(tb_sect, sm.sections.RCBeamSection)
-            # See supporting_docs/tie-beam-stiffness-calcs.pdf
-            k_ties = (6 * tb_sect.i_rot_ww_cracked * tb_sect.rc_mat.e_mod_conc) / tb_length
-        else:
-            k_ties = 0
-        l_in = getattr(pad, ip_axis)
-        k_f_0_pad = gf.stiffness.calc_rotational_via_gazetas_1991(sl, pad, ip_axis=ip_axis)
-        rot_ipad = calc_fd_rot_via_millen_et_al_2020_w_tie_beams(k_f_0_pad, l_in, int_nloads, pad.n_ult, psi,
-                                                                 m_foot_int, h_eff, 2 * k_ties)
-        # Exterior footings
-        if rot_ipad is None:  # First try moment ratio of 0.5
-            # m_cap = pad.n_load * getattr(pad, ip_axis) / 2 * (1 - pad.n_load / pad.n_ult)
-            m_cap = calc_moment_capacity_via_millen_et_al_2020(l_in, pad.n_load, pad.n_ult, psi, h_eff)
-            raise DesignError(f"Design failed - interior footing moment demand ({m_foot_int/1e3:.3g})"
-                              f" kNm exceeds capacity (~{m_cap/1e3:.3g} kNm)")
-        m_foot_ext = np.max(moment_column_bases[np.array([0, -1])]) * h_eff / df.interstorey_heights[0]
-        pad.n_load = ext_nloads
-        # rot_epad = check_local_footing_rotations(sl, pad, m_foot_ext, h_eff, ip_axis=ip_axis, k_ties=k_ties)
-        rot_epad = calc_fd_rot_via_millen_et_al_2020_w_tie_beams(k_f_0_pad, l_in, ext_nloads, pad.n_ult, psi,
-                                                                 m_foot_ext, h_eff, k_ties)
-        if rot_epad is None:
-            m_cap = pad.n_load * getattr(pad, ip_axis) / 2 * (1 - pad.n_load / pad.n_ult)
-            raise DesignError(f"Design failed - interior footing moment demand ({m_foot_ext/1e3:.3g})"
-                              f" kNm exceeds capacity (~{m_cap/1e3:.3g} kNm)")
-        if max([rot_ipad, rot_epad]) - found_rot > theta_c - df.theta_y:
-            # footing should be increased or design drift increased
-            pad_rot = max([rot_ipad, rot_epad])
-            plastic_rot = theta_c - df.theta_y
-            raise DesignError(f"Design failed - footing rotation ({pad_rot:.3g}) "
-                              f"exceeds plastic rotation (~{plastic_rot:.3g})")
+        df.pads = em.calc_pad_footing_rotations(df, df.fd, moment_column_bases, psi, df.fd_static_values['k_f_0_pad'],
+                                                df.soil_q, mom_ratio=mom_ratio)
+        em.check_pad_footing_rotations(df.pads, found_rot, theta_c - df.theta_y)
 
     return df
 
 
+@batch.budgeted
 def design_rc_frame_w_sfsi_via_millen_et_al_2018(fb, hz, sl, fd, design_drift=0.02, found_rot=0.00001, found_rot_tol=0.02, found_rot_iterations=20, **kwargs):
 
     df = em.DesignedSFSIRCFrame(fb, hz, sl, fd)
     df.design_drift = design_drift
     df.theta_f = found_rot
     verbose = kwargs.get('verbose', df.verbose)
+    budget = kwargs['budget']
     df.static_values()
 
     # add foundation to heights and masses
@@ -237,6 +262,7 @@ def design_rc_frame_w_sfsi_via_millen_et_al_2018(fb, hz, sl, fd, design_drift=0.
         df.delta_fshear = 0
 
         for i in range(100):
+            budget.spend(df)
             mu_reduction_factor = 1.0 - float(i) / 100
             theta_c = df.design_drift * mu_reduction_factor
             displacements = dt.displacement_profile_frame(theta_c, heights, df.hm_factor, foundation=True,
@@ -318,21 +344,15 @@ def design_rc_frame_w_sfsi_via_millen_et_al_2018(fb, hz, sl, fd, design_drift=0.
 
 
 
-def design_rc_wall(wb, hz, design_drift=0.025, **kwargs):
+def calc_wall_plastic_hinge(dw, design_drift):
     """
-    Displacement-based design of a reinforced concrete wall.
+    Plastic hinge properties of a reinforced concrete wall, sets the yield drift of the wall.
 
-    :param wb: WallBuilding object
-    :param hz: Hazard Object
+    :param dw: DesignedRCWall object (after `static_dbd_values`)
     :param design_drift: Design drift
-    :param kwargs:
-    :return: DesignedWall object
+    :return: tuple of (plastic hinge length, strain penetration length, yield curvature,
+        maximum plastic rotation)
     """
-
-    dw = em.DesignedRCWall(wb, hz)
-    dw.design_drift = design_drift
-    verbose = kwargs.get('verbose', dw.verbose)
-    dw.static_dbd_values()
     # k = min(0.2 * (fu / fye - 1), 0.08)  # Eq 4.31b
     k = min(0.15 * (dw.fu / dw.fye - 1), 0.06)  # Eq 6.5a from DDBD code
     l_c = dw.max_height
@@ -340,18 +360,109 @@ def design_rc_wall(wb, hz, design_drift=0.025, **kwargs):
     l_sp = 0.022 * dw.fye * long_db / 1.0e6  # Eq 4.30
     l_p = max(k * l_c + l_sp + 0.1 * dw.wall_depth, 2 * l_sp)
     phi_y = dt.yield_curvature(dw.epsilon_y, dw.wall_depth, btype="wall")
-    delta_y = dt.yield_displacement_wall(phi_y, dw.heights, dw.max_height)
     phi_p = dw.phi_material - phi_y
     # determine whether code limit or material strain governs
     theta_ss_code = design_drift
     dw.theta_y = dw.epsilon_y * dw.max_height / dw.wall_depth
     theta_p_code = (theta_ss_code - dw.theta_y)
     theta_p = min(theta_p_code, phi_p * l_p)
+    return l_p, l_sp, phi_y, theta_p
+
+
+def calc_wall_response(theta_p, delta_y, plastic_heights, hm_factor, storey_masses, heights, phi_y, max_height):
+    """
+    Equivalent SDOF response of walls at a plastic hinge rotation.
+
+    Storey values are arrays of (n_storeys,) for one wall or (n_storeys, n_walls) to evaluate many walls together.
+
+    :param theta_p: plastic hinge rotation (scalar or array of n_walls)
+    :param delta_y: yield displacement profile
+    :param plastic_heights: lever arm of the plastic rotation at each storey
+    :return: tuple of (displacements, delta_d, mass_eff, height_eff, mu, xi, eta)
+    """
+    displacements = (delta_y + theta_p * plastic_heights) * hm_factor
+    delta_d, mass_eff, height_eff = dt.equivalent_sdof(storey_masses, displacements, heights)
+    delta_y_eff = dt.yield_displacement_wall(phi_y, height_eff, max_height)
+    mu = dt.ductility(delta_d, delta_y_eff)
+    xi = dt.equivalent_viscous_damping(mu, mtype="concrete", btype="wall")
+    eta = dt.reduction_factor(xi)
+    return displacements, delta_d, mass_eff, height_eff, mu, xi, eta
+
+
+def is_wall_response_compatible(theta_p, corner_disp, *args):
+    """
+    True where the design displacement of the wall is within the reduced corner displacement of the spectrum
+    (i.e. t_eff > 0), see `calc_wall_response` for the remaining arguments.
+    """
+    res = calc_wall_response(theta_p, *args)
+    return res[1] <= corner_disp * res[6]
+
+
+def calc_compatible_wall_plastic_rotation(theta_p_max, is_compatible, tol=1.0e-4, max_iter=50):
+    """
+    Largest plastic hinge rotation up to `theta_p_max` for which the wall design is compatible, found by bisection.
+
+    Alternative to reducing the plastic rotation in 20 fixed increments. Many walls are solved together if
+    `theta_p_max` is an array and `is_compatible` evaluates all walls at once.
+
+    :param theta_p_max: plastic rotation from the code drift limit or the material strain limit
+    :param is_compatible: function(theta_p) that returns True where the design is compatible
+    :param tol: tolerance on the plastic rotation relative to `theta_p_max`
+    :return: plastic rotation (scalar or array of n_walls), nan if no positive plastic rotation is compatible
+    """
+    theta_p_max = np.asarray(theta_p_max, dtype=float)
+    lower = np.zeros_like(theta_p_max)
+    upper = np.where(theta_p_max > 0, theta_p_max, 0.0)
+    done = is_compatible(upper) | (upper <= 0)
+    lower = np.where(done, upper, lower)
+    for i in range(max_iter):
+        if np.all(upper - lower <= tol * np.abs(theta_p_max)):
+            break
+        mid = (lower + upper) / 2
+        ok = is_compatible(mid)
+        lower = np.where(ok, mid, lower)
+        upper = np.where(ok, upper, mid)
+    theta_p = np.where(lower > 0, lower, np.nan)
+    if theta_p.ndim == 0:
+        return theta_p.item()
+    return theta_p
+
+
+@batch.budgeted
+def design_rc_wall(wb, hz, design_drift=0.025, **kwargs):
+    """
+    Displacement-based design of a reinforced concrete wall.
+
+    :param wb: WallBuilding object
+    :param hz: Hazard Object
+    :param design_drift: Design drift
+    :param kwargs: 'theta_p_solver': 'increments' (default) reduces the plastic rotation in 20 steps until the
+        design is compatible, 'bracket' finds the largest compatible plastic rotation by bisection,
+        'budget': time or evaluation budget (see `batch.Budget`)
+    :return: DesignedWall object
+    """
+
+    dw = em.DesignedRCWall(wb, hz)
+    dw.design_drift = design_drift
+    verbose = kwargs.get('verbose', dw.verbose)
+    budget = kwargs['budget']
+    dw.static_dbd_values()
+    l_p, l_sp, phi_y, theta_p = calc_wall_plastic_hinge(dw, design_drift)
+    delta_y = dt.yield_displacement_wall(phi_y, dw.heights, dw.max_height)
 
     # Assume no torsional effects
-    increments = theta_p + dw.theta_y
-    for i in range(20):
-        reduced_theta_p = theta_p - increments * float(i) / 20
+    if kwargs.get('theta_p_solver', 'increments') == 'bracket':
+        args = (delta_y, dw.heights - (0.5 * l_p - l_sp), dw.hm_factor, dw.storey_mass_p_wall, dw.heights, phi_y,
+                dw.max_height)
+        def is_compatible(theta):
+            budget.spend(dw)
+            return is_wall_response_compatible(theta, dw.hz.corner_disp, *args)
+        theta_ps = [calc_compatible_wall_plastic_rotation(theta_p, is_compatible)]
+    else:
+        increments = theta_p + dw.theta_y
+        theta_ps = theta_p - increments * np.arange(20) / 20
+    for reduced_theta_p in theta_ps:
+        budget.spend(dw)
         if reduced_theta_p > 0.0:
             non_linear = 1
 
@@ -398,99 +509,271 @@ def design_rc_wall(wb, hz, design_drift=0.025, **kwargs):
     return dw
 
 
-def design_rc_wall_via_millen_et_al_2020(wb, hz, sl, fd, design_drift=0.025, **kwargs):
+def design_rc_walls(wbs, hz, design_drift=0.025, **kwargs):
+    """
+    Displacement-based design of many reinforced concrete walls with the same number of storeys.
+
+    The compatible plastic rotations of all walls are found together with the bracketed solver,
+    see `design_rc_wall` with `theta_p_solver='bracket'`.
+
+    :param wbs: list of WallBuilding objects
+    :param hz: Hazard Object
+    :param design_drift: Design drift
+    :param kwargs:
+    :return: list of DesignedWall objects
+    """
+    dws = [em.DesignedRCWall(wb, hz) for wb in wbs]
+    n_storeys = set(dw.n_storeys for dw in dws)
+    if len(n_storeys) > 1:
+        raise ValueError(f"Walls must have the same number of storeys, not {sorted(n_storeys)}")
+    hinges = []
+    for dw in dws:
+        dw.design_drift = design_drift
+        dw.static_dbd_values()
+        hinges.append(calc_wall_plastic_hinge(dw, design_drift))
+    l_p, l_sp, phi_y, theta_p = [np.array(vals) for vals in zip(*hinges)]
+    # storey values as (n_storeys, n_walls)
+    heights = np.array([dw.heights for dw in dws]).T
+    storey_masses = np.array([dw.storey_mass_p_wall for dw in dws]).T
+    hm_factor = np.array([dw.hm_factor for dw in dws])
+    max_height = np.array([dw.max_height for dw in dws])
+    delta_y = dt.yield_displacement_wall(phi_y, heights, max_height)
+    plastic_heights = heights - (0.5 * l_p - l_sp)
+    args = (delta_y, plastic_heights, hm_factor, storey_masses, heights, phi_y, max_height)
+    theta_ps = calc_compatible_wall_plastic_rotation(
+        theta_p, lambda theta: is_wall_response_compatible(theta, dws[0].hz.corner_disp, *args))
+    failed = np.where(np.isnan(theta_ps))[0]
+    if len(failed):
+        raise DesignError(f'can not handle linear design of walls {list(failed)}')
+    res = calc_wall_response(theta_ps, *args)
+    displacements, delta_d, mass_eff, height_eff, mu, xi, eta = res
+    for i, dw in enumerate(dws):
+        dw.design_drift = theta_ps[i] + dw.theta_y
+        dw.delta_d = delta_d[i]
+        dw.mass_eff = mass_eff[i]
+        dw.height_eff = height_eff[i]
+        dw.mu = mu[i]
+        dw.xi = xi[i]
+        dw.eta = eta[i]
+        dw.t_eff = dt.effective_period(dw.delta_d, dw.eta, dw.hz.corner_disp, dw.hz.corner_period)
+        k_eff = dt.effective_stiffness(dw.mass_eff, dw.t_eff)
+        dw.v_base = dt.design_base_shear(k_eff, dw.delta_d)
+        dw.storey_forces = dt.calculate_storey_forces(dw.storey_mass_p_wall, displacements[:, i], dw.v_base,
+                                                      btype='wall')
+    return dws
+
+
+def calc_sfsi_wall_response(dw, theta_p, theta_f, delta_fshear, delta_y, plastic_heights, heights, phi_y):
+    """
+    Equivalent SDOF response of a wall on a shallow foundation at a plastic hinge rotation and foundation
+    displacement, the values are set on the designed wall.
+
+    :param dw: DesignedSFSIRCWall object
+    :param theta_p: plastic hinge rotation
+    :param theta_f: foundation rotation
+    :param delta_fshear: displacement due to soil-foundation shear deformation
+    :param delta_y: yield displacement profile (zero at the foundation)
+    :param plastic_heights: lever arm of the plastic rotation at each level (zero at the foundation)
+    :param heights: heights of the foundation and storeys from the underside of the foundation
+    :param phi_y: yield curvature
+    :return: displacements
+    """
+    displacements = (delta_y + theta_p * plastic_heights + theta_f * heights) * dw.hm_factor + delta_fshear
+    dw.delta_d, dw.mass_eff, dw.height_eff = dt.equivalent_sdof(dw.storey_mass_p_wall, displacements, heights)
+    dw.delta_frot = theta_f * dw.height_eff
+    dw.delta_f = dw.delta_frot + delta_fshear
+    dw.delta_ss = dw.delta_d - dw.delta_f
+    delta_y_eff = dt.yield_displacement_wall(phi_y, dw.height_eff - dw.fd.height, dw.max_height)
+    dw.mu = dt.ductility(dw.delta_ss, delta_y_eff)
+    if dw.mu < 0:
+        raise DesignError('foundation rotation to large, Mu < 0.0')
+    xi_ss = dt.equivalent_viscous_damping(dw.mu, mtype="concrete", btype="wall")
+    eta_ss = dt.reduction_factor(xi_ss)
+    norm_rot = theta_f / dw.theta_pseudo_up
+    bhr = dw.fd.width / dw.height_eff
+    cor_norm_rot = nf.calculate_corrected_normalised_rotation(norm_rot, bhr)
+    eta_frot = nf.foundation_rotation_reduction_factor(cor_norm_rot)
+    eta_fshear = nf.foundation_shear_reduction_factor()
+    dw.eta = nf.system_reduction_factor(dw.delta_ss, dw.delta_frot, delta_fshear, eta_ss, eta_frot, eta_fshear)
+    dw.xi = dt.damping_from_reduction_factor(dw.eta)
+    dw.t_eff = dt.effective_period(dw.delta_d, dw.eta, dw.hz.corner_disp, dw.hz.corner_period)
+    return displacements
+
+
+def aitken_relaxation(relax, prev_res, res, relax_min=0.05, relax_max=2.0):
+    """
+    Aitken's dynamic relaxation factor of a fixed-point iteration.
+
+    The factor is reset to one if the residual did not change (e.g. when the iterate is clamped) or the update
+    is not finite, and limited to between `relax_min` and `relax_max`.
+
+    :param relax: relaxation factor of the previous update
+    :param prev_res: residual of the previous iteration
+    :param res: residual of the current iteration
+    :return: relaxation factor
+    """
+    d_res = res - prev_res
+    denom = np.dot(d_res, d_res)
+    if not denom > 0:
+        return 1.0
+    relax = -relax * np.dot(prev_res, d_res) / denom
+    if not np.isfinite(relax):
+        return 1.0
+    return float(np.clip(relax, relax_min, relax_max))
+
+
+@batch.budgeted
+def design_rc_wall_via_millen_et_al_2020(wb, hz, sl, fd, design_drift=0.025, found_rot=0.0, found_rot_tol=0.01,
+                                         found_rot_iterations=20, **kwargs):
     """
     Displacement-based design of a concrete wall.
 
+    The foundation rotation and shear displacement are found by fixed-point iteration: the structure is designed
+    for the current foundation displacements, which are then updated from the design base shear using the
+    Millen et al. (2020) foundation model. The updates are accelerated with Aitken's dynamic relaxation.
+    The iterations are stored in `dw.fd_iterations`.
+
     :param wb: WallBuilding object
     :param hz: Hazard Object
+    :param sl: Soil Object
+    :param fd: Foundation Object
     :param design_drift: Design drift
-    :param kwargs:
+    :param found_rot: initial estimate of the foundation rotation
+    :param found_rot_tol: tolerance on the change in foundation displacement relative to the design displacement
+    :param found_rot_iterations: maximum number of foundation iterations
+    :param kwargs: 'theta_p_solver': 'increments' (default) reduces the plastic rotation in 20 steps until the
+        design is compatible, 'bracket' finds the largest compatible plastic rotation by bisection,
+        'budget': time or evaluation budget (see `batch.Budget`)
     :return: DesignedWall object
     """
-    dw = em.DesignedSFSIRCWall(wb, hz, sl, fd)
+    dw = em.DesignedSFSIRCWall(wb, hz, sl, fd, fd_static_values=kwargs.get('fd_static_values'))
     dw.design_drift = design_drift
     verbose = kwargs.get('verbose', dw.verbose)
+    budget = kwargs['budget']
+    theta_p_solver = kwargs.get('theta_p_solver', 'increments')
     dw.static_dbd_values()
-    print("udw: ", dw.sl.unit_dry_weight)
     dw.static_values()
+    psi = 0.75 * np.tan(dw.sl.phi_r)
 
     # add foundation to heights and masses
     heights, storey_masses = dt.add_foundation(dw.heights, dw.storey_masses, dw.fd.height, dw.fd.mass)
     dw.storey_mass_p_wall = storey_masses / dw.n_walls
 
-    # k = min(0.2 * (fu / fye - 1), 0.08)  # Eq 4.31b
-    k = min(0.15 * (dw.fu / dw.fye - 1), 0.06)  # Eq 6.5a from DDBD code
-    l_c = dw.max_height
-    long_db = dw.preferred_bar_diameter
-    l_sp = 0.022 * dw.fye * long_db / 1.0e6  # Eq 4.30
-    l_p = max(k * l_c + l_sp + 0.1 * dw.wall_depth, 2 * l_sp)
-    phi_y = dt.yield_curvature(dw.epsilon_y, dw.wall_depth, btype="wall")
-    delta_y = dt.yield_displacement_wall(phi_y, heights, dw.max_height)
-    phi_p = dw.phi_material - phi_y
-    # determine whether code limit or material strain governs
-    theta_ss_code = design_drift
-    dw.theta_y = dw.epsilon_y * dw.max_height / dw.wall_depth
-    theta_p_code = (theta_ss_code - dw.theta_y)
-    theta_p = min(theta_p_code, phi_p * l_p)
-
-    # Assume no torsional effects
-    increments = theta_p + dw.theta_y
-    for i in range(20):
-        reduced_theta_p = theta_p - increments * float(i) / 20
-        if reduced_theta_p > 0.0:
-            non_linear = 1
-
-            delta_p = reduced_theta_p * (dw.heights - (0.5 * l_p - l_sp))
-            delta_p = np.insert(delta_p, 0, 0)  # no plastic deformation at foundation
-            if verbose > 2:
-                print('reduced_theta_p: ', reduced_theta_p)
-                print('delta_p: ', delta_p)
-
-            delta_st = delta_y + delta_p
+    l_p, l_sp, phi_y, theta_p = calc_wall_plastic_hinge(dw, design_drift)
+    delta_y = dt.yield_displacement_wall(phi_y, heights - dw.fd.height, dw.max_height)
+    plastic_heights = np.insert(dw.heights - (0.5 * l_p - l_sp), 0, 0)  # no plastic deformation at foundation
+
+    def design_structure(theta_f, delta_fshear):
+        # Assume no torsional effects
+        if theta_p_solver == 'bracket':
+            def is_compatible(theta):
+                budget.spend(dw)
+                calc_sfsi_wall_response(dw, theta, theta_f, delta_fshear, delta_y, plastic_heights, heights, phi_y)
+                return dw.t_eff > 0
+            theta_ps = [calc_compatible_wall_plastic_rotation(theta_p, is_compatible)]
         else:
-            raise DesignError('can not handle linear design, resize footing')
-
-        dw.design_drift = reduced_theta_p + dw.theta_y
+            increments = theta_p + dw.theta_y
+            theta_ps = theta_p - increments * np.arange(20) / 20
+        delta_y_trial = delta_y
+        for reduced_theta_p in theta_ps:
+            budget.spend(dw)
+            if not reduced_theta_p > 0.0:
+                raise DesignError('can not handle linear design, resize footing')
+            dw.design_drift = reduced_theta_p + dw.theta_y
+            displacements = calc_sfsi_wall_response(dw, reduced_theta_p, theta_f, delta_fshear, delta_y_trial,
+                                                    plastic_heights, heights, phi_y)
+            # as in `design_rc_wall`, the reduction steps use the yield displacement at the effective height
+            delta_y_trial = dt.yield_displacement_wall(phi_y, dw.height_eff - dw.fd.height, dw.max_height)
+            if verbose > 1:
+                print('Delta_D: ', dw.delta_d)
+                print('Effective mass: ', dw.mass_eff)
+                print('Effective height: ', dw.height_eff)
+                print('Mu: ', dw.mu)
+                print('theta yield', dw.theta_y)
+                print('xi: ', dw.xi)
+                print('Reduction Factor: ', dw.eta)
+                print('t_eff', dw.t_eff)
+            if dw.t_eff > 0:
+                return displacements
+            if verbose > 1:
+                print("drift %.2f is not compatible" % reduced_theta_p)
+        raise DesignError('System displacements not compatible in design')
 
-        delta_ls = delta_st
+    # fixed-point iteration on the foundation displacements (theta_f * h_eff, delta_fshear)
+    fd_disps = np.array([found_rot, 0.0])
+    prev_res = None
+    relax = 1.0
+    dw.fd_iterations = []
+    converged = False
+    for iteration in range(found_rot_iterations):
+        theta_f, delta_fshear = fd_disps
+        displacements = design_structure(theta_f, delta_fshear)
+        k_eff = dt.effective_stiffness(dw.mass_eff, dw.t_eff)
+        dw.v_base = dt.design_base_shear(k_eff, dw.delta_d)
+        moment_f = dw.v_base * dw.height_eff
+        theta_f_new = calc_fd_rot_via_millen_et_al_2020(dw.k_f_0, dw.fd.length, dw.total_weight,
+                                                        dw.bearing_capacity, psi, moment_f, dw.height_eff)
+        if theta_f_new is None:
+            raise DesignError(f"Design failed - foundation moment demand ({moment_f/1e3:.3g} kNm) "
+                              f"exceeds capacity")
+        delta_fshear_new = dw.v_base / (0.5 * dw.k_f0_shear)
+        scale = np.array([dw.height_eff, 1.0])  # residual as displacements at the effective height
+        res = (np.array([theta_f_new, delta_fshear_new]) - fd_disps) * scale
+        error = np.sum(np.abs(res)) / dw.delta_d
+        dw.fd_iterations.append({'theta_f': theta_f, 'delta_fshear': delta_fshear, 'theta_p': dw.design_drift -
+                                 dw.theta_y, 'v_base': dw.v_base, 'error': error, 'relaxation': relax})
+        if verbose:
+            print('iteration: ', iteration, 'theta_f: ', theta_f, 'error: ', error)
+        if error < found_rot_tol:
+            converged = True
+            fd_disps = np.array([theta_f_new, delta_fshear_new])  # foundation response to the design base shear
+            break
+        if prev_res is not None:
+            relax = aitken_relaxation(relax, prev_res, res)
+        prev_res = res
+        fd_disps = np.maximum(fd_disps + relax * res / scale, 0.0)
+    if not converged:
+        raise DesignError(f'Foundation displacements not compatible in design (last error: {error:.3g})')
+    dw.theta_f, dw.delta_fshear = fd_disps
+    dw.storey_forces = dt.calculate_storey_forces(dw.storey_mass_p_wall, displacements, dw.v_base, btype='wall')
+    return dw
 
-        displacements = delta_ls * dw.hm_factor
 
-        dw.delta_d, dw.mass_eff, dw.height_eff = dt.equivalent_sdof(dw.storey_mass_p_wall, displacements, heights)
-        delta_y = dt.yield_displacement_wall(phi_y, dw.height_eff, dw.max_height)
-        dw.mu = dt.ductility(dw.delta_d, delta_y)
-        dw.xi = dt.equivalent_viscous_damping(dw.mu, mtype="concrete", btype="wall")
-        dw.eta = dt.reduction_factor(dw.xi)
-        dw.t_eff = dt.effective_period(dw.delta_d, dw.eta, dw.hz.corner_disp, dw.hz.corner_period)
+def _design_direction(args):
+    design_func, inputs, kwargs = args
+    return design_func(*inputs, **kwargs)
 
-        if verbose > 1:
-            print('Delta_D: ', dw.delta_d)
-            print('Effective mass: ', dw.mass_eff)
-            print('Effective height: ', dw.height_eff)
-            print('Mu: ', dw.mu)
-            print('theta yield', dw.theta_y)
-            print('xi: ', dw.xi)
-            print('Reduction Factor: ', dw.eta)
-            print('t_eff', dw.t_eff)
 
-        if dw.t_eff > 0:
-            break
-        else:
-            if verbose > 1:
-                print("drift %.2f is not compatible" % reduced_theta_p)
-    k_eff = dt.effective_stiffness(dw.mass_eff, dw.t_eff)
-    dw.v_base = dt.design_base_shear(k_eff, dw.delta_d)
-    moment_f = dw.v_base * dw.height_eff
-    psi = 0.75 * np.tan(dw.sl.phi_r)
-    theta_f = calc_fd_rot_via_millen_et_al_2020(dw.k_f_0, dw.fd.length, dw.total_weight, dw.bearing_capacity, psi, moment_f,
-                                                dw.height_eff)
-    print("theta_f: ", theta_f)
+def design_rc_building_w_sfsi_via_millen_et_al_2020(fb, bd_w, hz, sl, fd, design_drift=0.02, n_workers=1, **kwargs):
+    """
+    Displacement-based design of a building on a shallow foundation in both plan directions.
 
-    # TODO: ADD calculation of rotation
+    The bearing pressure of the soil is computed once and shared by both directions, the foundation
+    stiffness is computed once per direction. The width direction is designed on the rotated foundation.
 
-    dw.storey_forces = dt.calculate_storey_forces(dw.storey_mass_p_wall, displacements, dw.v_base, btype='wall')
-    return dw
+    :param fb: FrameBuilding object with the frames along the floor length
+    :param bd_w: FrameBuilding or WallBuilding object with the frames or walls along the floor width
+    :param hz: Hazard Object
+    :param sl: Soil Object
+    :param fd: Foundation Object
+    :param design_drift: Design drift
+    :param n_workers: if 2, the directions are designed concurrently in separate processes
+    :param kwargs: passed to the design function of each direction
+    :return: DesignedBidirectionalBuilding object
+    """
+    fd_w = em.rotate_foundation(fd)
+    fd_static_values = em.calc_fd_static_values(sl, fd)
+    fd_w_static_values = em.calc_fd_static_values(sl, fd_w, soil_q=fd_static_values['soil_q'])
+    if bd_w.type == 'wall_building':
+        design_func_w = design_rc_wall_via_millen_et_al_2020
+    else:
+        design_func_w = design_rc_frame_w_sfsi_via_millen_et_al_2020
+    tasks = [(design_rc_frame_w_sfsi_via_millen_et_al_2020, (fb, hz, sl, fd),
+              dict(kwargs, design_drift=design_drift, fd_static_values=fd_static_values)),
+             (design_func_w, (bd_w, hz, sl, fd_w),
+              dict(kwargs, design_drift=design_drift, fd_static_values=fd_w_static_values))]
+    designs = list(batch.map_chunks(_design_direction, tasks, n_workers))
+    return em.DesignedBidirectionalBuilding(*designs)
 
 
 def run_frame_fixed():
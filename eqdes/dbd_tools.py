@@ -13,10 +13,8 @@ def displacement_profile_frame(theta_c, heights, hm_factor, foundation=False,
                          fd_height=0.0, theta_f=0.0, verbose=0):
     heights = np.array(heights)
     if foundation:
-        displaced_shape = np.zeros(len(heights))
-        heights_ss = heights[1:] - fd_height
-        displaced_shape[1:] += cal_displaced_shape(theta_c, heights_ss, btype="frame")
-        displaced_shape += theta_f * heights
+        shape_ss = cal_displaced_shape(theta_c, heights[1:] - fd_height, btype="frame")
+        displaced_shape = np.concatenate([np.zeros_like(shape_ss[:1]), shape_ss]) + theta_f * heights
     else:
         displaced_shape = cal_displaced_shape(theta_c, heights, btype="frame")
     displacements = displaced_shape * hm_factor
@@ -30,10 +28,17 @@ def displacement_profile_frame(theta_c, heights, hm_factor, foundation=False,
 def cal_higher_mode_factor(n_storeys, btype="frame"):
     """
     Calculates the higher mode factor according to DDBD12 CL.
-    :param n_storeys:
+    :param n_storeys: number of storeys (scalar or array)
     :param btype:
     :return:
     """
+    if np.ndim(n_storeys):  # array of storey numbers
+        n_storeys = np.asarray(n_storeys, dtype=float)
+        if btype == "frame":
+            factor = np.where(n_storeys < 6, 1.0, 1.0 - 0.15 * (n_storeys - 6.0) / (16.0 - 6.0))
+        else:
+            factor = np.where(n_storeys < 10, 1.0, 1.0 - 0.06 * (n_storeys - 10.0) / (16.0 - 10.0))
+        return np.where(n_storeys <= 16, factor, 0.85)
     # Higher mode factor for frame structures
     if btype == "frame":
         if n_storeys < 6:
@@ -54,19 +59,35 @@ def cal_higher_mode_factor(n_storeys, btype="frame"):
 
 def cal_displaced_shape(theta_c, heights, btype="frame"):
     heights = np.array(heights)
-    max_height = max(heights)
+    max_height = np.max(heights, axis=0)  # storeys along the first axis
     if btype == "frame":
         return theta_c * heights * (4 * max_height - heights) / (4 * max_height - heights[0])
 
 
-def equivalent_sdof(masses, displacements, heights):
-    mass_x_disp = masses * displacements
-    mass_x_disp2 = masses * displacements ** 2
-    mass_x_disp_x_height = masses * displacements * heights
+def equivalent_sdof(masses, displacements, heights, mask=None, axis=0):
+    """
+    Equivalent single-degree-of-freedom displacement, mass and height of a displacement profile.
 
-    delta_d = sum(mass_x_disp2) / sum(mass_x_disp)
-    mass_eff = sum(mass_x_disp) / delta_d
-    height_eff = sum(mass_x_disp_x_height) / sum(mass_x_disp)
+    Storey values can be stacks of profiles (e.g. (n_storeys, n_items) with `axis=0`, or (n_items, n_storeys)
+    with `axis=-1`), that broadcast together.
+
+    :param masses: storey masses
+    :param displacements: storey displacements
+    :param heights: storey heights
+    :param mask: optional bool array, False for padded storeys of stacks with different numbers of storeys
+    :param axis: storey axis
+    :return: tuple of (delta_d, mass_eff, height_eff), arrays of the stacked profiles
+    """
+    mass_x_disp = np.asarray(masses) * displacements
+    if mask is not None:
+        mass_x_disp = np.where(mask, mass_x_disp, 0.0)
+        displacements = np.where(mask, displacements, 0.0)
+        heights = np.where(mask, heights, 0.0)
+    sum_mass_x_disp = np.sum(mass_x_disp, axis=axis)
+
+    delta_d = np.sum(mass_x_disp * displacements, axis=axis) / sum_mass_x_disp
+    mass_eff = sum_mass_x_disp / delta_d
+    height_eff = np.sum(mass_x_disp * heights, axis=axis) / sum_mass_x_disp
 
     return delta_d, mass_eff, height_eff
 
@@ -109,6 +130,8 @@ def ductility(delta_current, delta_y):
 
 
 def reduction_factor(xi, near_field=False):
+    if np.ndim(xi) or np.ndim(near_field):  # arrays
+        return (0.07 / (0.02 + np.asarray(xi))) ** np.where(np.asarray(near_field) > 1.0, 0.25, 0.5)
     if near_field > 1.0:
         # Damping reduction factor
         return (0.07 / (0.02 + xi)) ** 0.25
@@ -135,19 +158,27 @@ def equivalent_viscous_damping(mu, mtype="concrete", btype="frame"):
     :return:
     """
     pie = 3.141
-    if mu < 1:
+    if np.ndim(mu) == 0 and mu < 1:
         return 0.05
     if mtype == "concrete":
         if btype == "frame":
             # Equivalent viscous damping for concrete frame
-            return 0.05 + 0.565 * (mu - 1) / (mu * pie)
-        if btype == "wall":
+            xi = 0.05 + 0.565 * (mu - 1) / (mu * pie)
+        elif btype == "wall":
             # Equivalent viscous damping for concrete wall (Sullivan et al., 2010)
-            return 0.05 + 0.444 * (mu - 1) / (mu * pie)
+            xi = 0.05 + 0.444 * (mu - 1) / (mu * pie)
+        else:
+            return None
+        if np.ndim(mu):  # array of ductilities
+            return np.where(np.asarray(mu) < 1, 0.05, xi)
+        return xi
 
 
 def effective_period(delta_d, eta, corner_disp, corner_period):
     corner_disp_eff = corner_disp * eta
+    if np.ndim(delta_d) or np.ndim(corner_disp_eff):  # arrays, zero where the displacement is not compatible
+        delta_d = np.asarray(delta_d, dtype=float)
+        return np.where(delta_d > corner_disp_eff, 0.0, corner_period * delta_d / corner_disp_eff)
     if delta_d > corner_disp_eff:
         return 0.0
     else:
@@ -184,6 +215,8 @@ def displacement_from_effective_period(eta, corner_disp, t_eff, corner_period):
     :param corner_period:
     :return:
     """
+    if np.ndim(t_eff):  # array of periods
+        return eta * corner_disp * np.minimum(np.asarray(t_eff) / corner_period, 1.0)
     if t_eff > corner_period:
         return eta * corner_disp
     return eta * corner_disp * t_eff / corner_period
@@ -215,6 +248,13 @@ def bilinear_load_factor(ductility_current, ductility_max, r):
     :return: factor to reduce maximum load
     """
     hardening_load = r * (ductility_max - 1)
+    if np.ndim(ductility_current) or np.ndim(ductility_max) or np.ndim(r):  # arrays
+        ductility_current = np.asarray(ductility_current, dtype=float)
+        if np.any(ductility_current > ductility_max):
+            raise DesignError("Current ductility: {0}, exceeds maximum ductility {1}".format(
+                np.max(ductility_current), ductility_max))
+        return np.where(ductility_current > 1.0, 1.0 - hardening_load + r * (ductility_current - 1),
+                        (1.0 - hardening_load) * ductility_current)
     if ductility_current > ductility_max:
         raise DesignError("Current ductility: {0}, exceeds maximum ductility {1}".format(ductility_current,
                                                                                          ductility_max))
@@ -230,7 +270,7 @@ def calculate_storey_forces(masses, displacements, v_base, btype):
     else:
         k = 1.0
     mass_x_disp = np.array(masses) * np.array(displacements)
-    storey_forces = k * v_base * mass_x_disp / sum(mass_x_disp)  # Newtons per storey
+    storey_forces = k * v_base * mass_x_disp / np.sum(mass_x_disp, axis=0)  # Newtons per storey
     storey_forces[-1] += (1 - k) * v_base
     return storey_forces
 
@@ -243,6 +283,8 @@ def p_delta_base_shear(mass_eff, delta_d, h_eff, v_base):
 
     moment_pd = p_delta_moment(mass_eff, delta_d)
     pd_factor = moment_pd / v_base * h_eff
+    if np.ndim(pd_factor):  # arrays
+        return np.where(pd_factor > 0.1, 0.5 * moment_pd / h_eff, 0.0)
     if pd_factor > 0.1:
         c_p_delta = 0.5
         return c_p_delta * moment_pd / h_eff
@@ -256,6 +298,12 @@ def yield_curvature(epsilon_y, length, btype="wall"):
 
 
 def add_foundation(ss_heights, ss_masses, fd_height, fd_mass):
+    if np.ndim(ss_heights) > 1:  # storeys along the first axis of (n_storeys, n_items) arrays
+        ss_heights = np.asarray(ss_heights, dtype=float)
+        ss_masses = np.asarray(ss_masses, dtype=float)
+        heights = np.concatenate([np.zeros_like(ss_heights[:1]), ss_heights]) + fd_height
+        fd_masses = np.broadcast_to(fd_mass, ss_masses.shape[1:])[np.newaxis]
+        return heights, np.concatenate([fd_masses, ss_masses])
     # add foundation to heights
     heights = list(ss_heights)
     heights.insert(0, 0)
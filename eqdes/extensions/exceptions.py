@@ -1,2 +1,10 @@
 class DesignError(Exception):
-    pass
\ No newline at end of file
+    pass
+
+
+class BudgetExceeded(DesignError):
+    """Raised when the time or evaluation budget of a design or assessment is used up"""
+
+    def __init__(self, msg, partial=None):
+        super(BudgetExceeded, self).__init__(msg)
+        self.partial = partial
@@ -0,0 +1,206 @@
+"""
+Search for the smallest pad or raft foundation that passes the SFSI frame design.
+
+The foundation dimensions are scaled by a single factor and the smallest passing factor is found with a bracketed
+search, assuming that a larger foundation does not cause the design to fail. At each step `n_workers` candidates
+inside the bracket are evaluated in parallel and the bracket is reduced to the gap between the largest failing and
+the smallest passing candidate.
+"""
+import numpy as np
+
+from eqdes import batch
+from eqdes import dbd
+from eqdes import models as em
+from eqdes.extensions.exceptions import DesignError
+
+
+def _evaluate_candidate(args):
+    design_func, fb, hz, sl, fd, fd_static_values, kwargs = args
+    df, reason = batch.evaluate_safely(design_func, fb, hz, sl, fd, fd_static_values=fd_static_values, **kwargs)
+    return reason
+
+
+def scale_pad_foundation(fd, scale, tie_beam_depth=None):
+    """
+    Creates a copy of a pad foundation with the pad plan dimensions scaled.
+
+    :param fd: PadFoundation object
+    :param scale: factor applied to the pad length and width
+    :param tie_beam_depth: if not None, depth and width of the tie beams
+    :return: PadFoundation object
+    """
+    fd_new = fd.deepcopy()
+    fd_new.pad_length = fd.pad_length * scale
+    fd_new.pad_width = fd.pad_width * scale
+    if tie_beam_depth is not None:
+        for tb_sect in [fd_new.tie_beam_sect_in_length_dir, fd_new.tie_beam_sect_in_width_dir]:
+            if tb_sect is None:
+                raise ValueError("Tie beam sections must be set on the foundation to size the tie beams")
+            tb_sect.depth = tie_beam_depth
+            tb_sect.width = tie_beam_depth
+    return fd_new
+
+
+def scale_raft_foundation(fd, scale):
+    """
+    Creates a copy of a raft foundation with the plan dimensions scaled.
+    """
+    fd_new = fd.deepcopy()
+    fd_new.width = fd.width * scale
+    fd_new.length = fd.length * scale
+    return fd_new
+
+
+def calc_foundation_volume(fd):
+    """
+    Concrete volume of the pads and tie beams (or the raft).
+    """
+    if fd.type != 'pad_foundation':
+        return fd.width * fd.length * fd.height
+    vol = fd.n_pads_l * fd.n_pads_w * fd.pad_length * fd.pad_width * fd.height
+    tb_sect = fd.tie_beam_sect_in_length_dir
+    if tb_sect is not None and fd.n_pads_l > 1:
+        tb_length = (fd.length - (fd.pad_length * fd.n_pads_l)) / (fd.n_pads_l - 1)
+        vol += (fd.n_pads_l - 1) * fd.n_pads_w * tb_length * tb_sect.depth * tb_sect.width
+    tb_sect = fd.tie_beam_sect_in_width_dir
+    if tb_sect is not None and fd.n_pads_w > 1:
+        tb_length = (fd.width - (fd.pad_width * fd.n_pads_w)) / (fd.n_pads_w - 1)
+        vol += (fd.n_pads_w - 1) * fd.n_pads_l * tb_length * tb_sect.depth * tb_sect.width
+    return vol
+
+
+class FoundationSizer(object):
+    """
+    Evaluates foundation candidates and keeps the history and cached values.
+
+    :param fb: FrameBuilding object
+    :param hz: Hazard object
+    :param sl: Soil object
+    :param scale_func: function(scale, option) that returns a foundation candidate
+    :param design_func: SFSI design function that accepts `fd_static_values`
+    :param n_workers: number of candidates evaluated in parallel
+    :param kwargs: passed to the design function
+    """
+
+    def __init__(self, fb, hz, sl, scale_func, design_func=None, n_workers=1, **kwargs):
+        self.fb = fb
+        self.hz = hz
+        self.sl = sl
+        self.scale_func = scale_func
+        if design_func is None:
+            design_func = dbd.design_rc_frame_w_sfsi_via_millen_et_al_2020
+        self.design_func = design_func
+        self.n_workers = n_workers
+        self.kwargs = kwargs
+        self.history = []
+        self._results = {}
+        self._static_values = {}
+
+    def evaluate(self, scales, option=None):
+        """
+        Evaluates the design for each scale factor, previously evaluated candidates are not re-run.
+
+        :return: list of bools, True if the design passed
+        """
+        keys = [(float(scale), option) for scale in scales]
+        new_keys = [key for key in dict.fromkeys(keys) if key not in self._results]
+        tasks = []
+        for scale, opt in new_keys:
+            fd = self.scale_func(scale, opt)
+            if scale not in self._static_values:  # soil and foundation values do not depend on the tie beams
+                self._static_values[scale] = em.calc_fd_static_values(self.sl, fd)
+            tasks.append((self.design_func, self.fb, self.hz, self.sl, fd, self._static_values[scale], self.kwargs))
+        reasons = batch.map_chunks(_evaluate_candidate, tasks, self.n_workers)
+        for (scale, opt), task, reason in zip(new_keys, tasks, reasons):
+            self._results[(scale, opt)] = reason is None
+            self.history.append({'scale': scale, 'option': opt, 'passed': reason is None, 'reason': reason,
+                                 'volume': calc_foundation_volume(task[4])})
+        return [self._results[key] for key in keys]
+
+    def search(self, scale_min, scale_max, option=None, tol=0.01):
+        """
+        Finds the smallest passing scale factor in [scale_min, scale_max].
+
+        :return: scale factor or None if the largest candidate fails
+        """
+        lo, hi = scale_min, scale_max
+        if not self.evaluate([hi], option)[0]:
+            return None
+        if self.evaluate([lo], option)[0]:
+            return lo
+        n_points = max(1, self.n_workers)
+        while (hi - lo) > tol * hi:
+            scales = lo + (hi - lo) * np.arange(1, n_points + 1) / (n_points + 1)
+            passed = self.evaluate(scales, option)
+            for scale, ok in zip(scales, passed):
+                if ok:
+                    hi = scale
+                    break
+                lo = scale
+        return hi
+
+
+def size_pad_foundation(fb, hz, sl, fd, scale_min=0.5, scale_max=3.0, tie_beam_depths=None, tol=0.01,
+                        n_workers=1, design_func=None, **kwargs):
+    """
+    Finds the smallest pads (and tie beams) that pass the SFSI design of a frame on a pad foundation.
+
+    For each tie beam depth, the smallest pad scale factor is found, then the candidate with the least
+    concrete volume is selected.
+
+    :param fb: FrameBuilding object
+    :param hz: Hazard object
+    :param sl: Soil object
+    :param fd: PadFoundation object, the initial pad dimensions are scaled
+    :param scale_min: smallest scale factor of the pad dimensions
+    :param scale_max: largest scale factor of the pad dimensions
+    :param tie_beam_depths: list of tie beam depths (width = depth) to consider, if None the current tie beams are used
+    :param tol: relative tolerance on the scale factor
+    :param n_workers: number of candidates evaluated in parallel
+    :param design_func: SFSI design function (default: dbd.design_rc_frame_w_sfsi_via_millen_et_al_2020)
+    :param kwargs: passed to the design function
+    :return: tuple of (PadFoundation, designed frame, list of candidate dicts)
+    """
+    max_scale_no_overlap = fd.length / (fd.pad_length * fd.n_pads_l)
+    scale_max = min(scale_max, 0.99 * max_scale_no_overlap)
+
+    def scale_func(scale, tie_beam_depth):
+        return scale_pad_foundation(fd, scale, tie_beam_depth)
+
+    sizer = FoundationSizer(fb, hz, sl, scale_func, design_func=design_func, n_workers=n_workers, **kwargs)
+    if tie_beam_depths is None:
+        tie_beam_depths = [None]
+    best = None
+    for tb_depth in tie_beam_depths:
+        scale = sizer.search(scale_min, scale_max, option=tb_depth, tol=tol)
+        if scale is None:
+            continue
+        vol = calc_foundation_volume(scale_func(scale, tb_depth))
+        if best is None or vol < best[0]:
+            best = (vol, scale, tb_depth)
+    if best is None:
+        raise DesignError(f"No pad foundation found up to a scale factor of {scale_max:.3g}")
+    fd_best = scale_func(best[1], best[2])
+    df = sizer.design_func(fb, hz, sl, fd_best, fd_static_values=sizer._static_values[best[1]], **kwargs)
+    return fd_best, df, sizer.history
+
+
+def size_raft_foundation(fb, hz, sl, fd, scale_min=0.5, scale_max=3.0, tol=0.01, n_workers=1, design_func=None,
+                         **kwargs):
+    """
+    Finds the smallest raft that passes the SFSI design of a frame.
+
+    See `size_pad_foundation` for the parameters, the raft width and length are scaled.
+
+    :return: tuple of (RaftFoundation, designed frame, list of candidate dicts)
+    """
+    def scale_func(scale, option):
+        return scale_raft_foundation(fd, scale)
+
+    sizer = FoundationSizer(fb, hz, sl, scale_func, design_func=design_func, n_workers=n_workers, **kwargs)
+    scale = sizer.search(scale_min, scale_max, tol=tol)
+    if scale is None:
+        raise DesignError(f"No raft foundation found up to a scale factor of {scale_max:.3g}")
+    fd_best = scale_func(scale, None)
+    df = sizer.design_func(fb, hz, sl, fd_best, fd_static_values=sizer._static_values[scale], **kwargs)
+    return fd_best, df, sizer.history
@@ -0,0 +1,195 @@
+"""
+Fragility curves from displacement-based assessment.
+
+The assessment is run for each realisation of the building at each intensity level, the intensity measure is the
+corner spectral displacement of the hazard (`hz.corner_disp`), which is set by scaling `hz.z_factor`.
+A lognormal fragility curve is fitted to the fraction of realisations that exceed each damage state drift limit
+by maximum likelihood (Baker, 2015), with bootstrap confidence bounds from resampling the realisations.
+
+Example::
+
+    inputs = {'fb': fb, 'hz': hz, 'theta_max': 0.05, 'otm_max': otm_max}
+    variables = [uc.RandomVariable('otm_max', 'lognormal', (1.0, 0.2), factor=True)]
+    fr = fragility.run_fragility_analysis(dba.assess_rc_frame, inputs, np.linspace(0.05, 1.0, 20),
+                                          ds_limits=[0.005, 0.01, 0.02], variables=variables, n_samples=100)
+    print(fr.median, fr.beta)
+
+Baker J.W. (2015) Efficient analytical fragility function fitting using dynamic structural analysis.
+Earthquake Spectra 31(1).
+"""
+import numpy as np
+
+from eqdes import batch
+from eqdes import uncertainty as uc
+
+
+def _norm_pdf(x):
+    return np.exp(-0.5 * x ** 2) / np.sqrt(2 * np.pi)
+
+
+def fit_lognormal_fragility(im_levels, n_trials, n_exceed, max_iter=100, tol=1.0e-8, beta_min=1.0e-3):
+    """
+    Maximum likelihood fit of a lognormal fragility curve to the number of exceedances at each intensity level.
+
+    The probit model P = Phi(a + b ln(im)) is fitted by iteratively reweighted least squares, all leading
+    dimensions of `n_exceed` are fitted together (e.g. damage states and bootstrap resamples).
+
+    :param im_levels: array (n_levels,) of intensity levels
+    :param n_trials: number of trials at each level (scalar or broadcastable to `n_exceed`)
+    :param n_exceed: array (..., n_levels) of the number of exceedances
+    :param beta_min: lower limit of the dispersion (the fit of a sharp step in the data)
+    :return: tuple of (median, dispersion), arrays of the leading dimensions of `n_exceed`
+    """
+    z = np.log(np.asarray(im_levels, dtype=float))
+    n_exceed = np.asarray(n_exceed, dtype=float)
+    n = np.broadcast_to(np.asarray(n_trials, dtype=float), n_exceed.shape)
+    frac = n_exceed / np.where(n > 0, n, 1)
+    eps = 1.0e-12
+
+    def solve(w, r):  # weighted least squares for (a, b) along the last axis
+        s0 = np.sum(w, axis=-1)
+        s1 = np.sum(w * z, axis=-1)
+        s2 = np.sum(w * z ** 2, axis=-1)
+        t0 = np.sum(w * r, axis=-1)
+        t1 = np.sum(w * z * r, axis=-1)
+        det = s0 * s2 - s1 ** 2
+        b = (s0 * t1 - s1 * t0) / np.where(det > 0, det, eps)
+        b = np.clip(b, eps, 1 / beta_min)
+        a = (t0 - b * s1) / np.where(s0 > 0, s0, eps)
+        return a, b
+
+    # initial estimate from the probit of the smoothed fractions
+    a, b = solve(n, uc.norm_ppf((n_exceed + 0.5) / (n + 1)))
+    for i in range(max_iter):
+        eta = a[..., np.newaxis] + b[..., np.newaxis] * z
+        mu = np.clip(uc.norm_cdf(eta), eps, 1 - eps)
+        phi = np.maximum(_norm_pdf(eta), eps)
+        w = n * phi ** 2 / (mu * (1 - mu))
+        r = eta + (frac - mu) / phi
+        a_new, b_new = solve(w, r)
+        converged = np.all(np.abs(b_new - b) <= tol * b) and np.all(np.abs(a_new - a) <= tol * (1 + np.abs(a)))
+        a, b = a_new, b_new
+        if converged:
+            break
+    return np.exp(-a / b), 1 / b
+
+
+def _evaluate_chunk(args):
+    return uc.evaluate_samples(*args)
+
+
+class FragilityResult(object):
+    """
+    Results of a fragility analysis.
+
+    :param im_levels: intensity levels (corner spectral displacement)
+    :param ds_limits: drift limit of each damage state
+    :param drifts: array (n_samples, n_levels) of assessed drifts (nan where the assessment failed)
+    :param invalid: optional bool array (n_samples, n_levels), True where the sampled inputs were invalid (see
+        `uncertainty.evaluate_samples`), these are excluded from the fit rather than counted as failures
+    """
+
+    def __init__(self, im_levels, ds_limits, drifts, invalid=None):
+        self.im_levels = np.asarray(im_levels, dtype=float)
+        self.ds_limits = np.asarray(ds_limits, dtype=float)
+        self.drifts = drifts
+        self.invalid = np.zeros(np.shape(drifts), dtype=bool) if invalid is None else np.asarray(invalid, dtype=bool)
+        self.failed = np.isnan(drifts) & ~self.invalid
+        self.median = None
+        self.beta = None
+        self.median_bounds = None
+        self.beta_bounds = None
+
+    @property
+    def exceeded(self):
+        """
+        Array (n_ds, n_samples, n_levels), failed assessments exceed all damage states and invalid samples
+        exceed none
+        """
+        return (self.drifts[np.newaxis] >= self.ds_limits[:, np.newaxis, np.newaxis]) | self.failed[np.newaxis]
+
+    @property
+    def n_valid(self):
+        """Number of samples with valid inputs at each level"""
+        return np.sum(~self.invalid, axis=0)
+
+    @property
+    def fractions(self):
+        """Fraction of the valid samples that exceed each damage state at each level, array (n_ds, n_levels)"""
+        return np.sum(self.exceeded, axis=1) / np.maximum(self.n_valid, 1)
+
+    def probability(self, im):
+        """Probability of exceeding each damage state from the fitted curves, array (n_ds, len(im))"""
+        im = np.atleast_1d(np.asarray(im, dtype=float))
+        return uc.norm_cdf(np.log(im / self.median[:, np.newaxis]) / self.beta[:, np.newaxis])
+
+    def fit(self, n_bootstrap=200, conf_level=0.9, seed=None):
+        """
+        Fits the fragility curves and the bootstrap confidence bounds.
+
+        :param n_bootstrap: number of bootstrap resamples of the realisations
+        :param conf_level: confidence level of the bounds
+        :param seed: seed for the bootstrap resampling
+        """
+        exceeded = self.exceeded.astype(float)
+        valid = (~self.invalid).astype(float)
+        n_samples = exceeded.shape[1]
+        self.median, self.beta = fit_lognormal_fragility(self.im_levels, self.n_valid, np.sum(exceeded, axis=1))
+        rng = np.random.default_rng(seed)
+        weights = rng.multinomial(n_samples, np.ones(n_samples) / n_samples, size=n_bootstrap)
+        n_exceed = np.einsum('bs,dsl->dbl', weights, exceeded)
+        medians, betas = fit_lognormal_fragility(self.im_levels, weights @ valid, n_exceed)
+        q = [(1 - conf_level) / 2, (1 + conf_level) / 2]
+        self.median_bounds = np.quantile(medians, q, axis=1).T
+        self.beta_bounds = np.quantile(betas, q, axis=1).T
+        return self
+
+
+def run_fragility_analysis(func, inputs, im_levels, ds_limits, variables=None, n_samples=1, output="assessed_drift",
+                           hazard_name="hz", method="lhs", seed=None, n_workers=1, chunk_size=100, func_kwargs=None,
+                           n_bootstrap=200, conf_level=0.9):
+    """
+    Fragility curves of a building from displacement-based assessment at a range of intensity levels.
+
+    :param func: assessment function, e.g. dba.assess_rc_frame
+    :param inputs: dict of input objects by function argument name,
+        e.g. {'fb': fb, 'hz': hz, 'theta_max': 0.05, 'otm_max': otm_max}
+    :param im_levels: corner spectral displacements [m] at which the building is assessed
+    :param ds_limits: drift limit of each damage state, `theta_max` should not be less than the largest limit
+    :param variables: list of uncertainty.RandomVariable of the building, if None a single realisation is assessed
+    :param n_samples: number of realisations of the building
+    :param output: name of the assessed drift
+    :param hazard_name: name of the hazard in `inputs`
+    :param method: sampling method, 'lhs' or 'random'
+    :param seed: seed of the random number generator
+    :param n_workers: number of worker processes
+    :param chunk_size: number of assessments per task
+    :param func_kwargs: additional keyword arguments to `func`
+    :param n_bootstrap: number of bootstrap resamples
+    :param conf_level: confidence level of the bounds
+    :return: FragilityResult, samples with invalid inputs (e.g. a negative sampled capacity) are reported in
+        `invalid` and are not included in the fit, failed assessments exceed all damage states
+    """
+    im_levels = np.asarray(im_levels, dtype=float)
+    n_levels = len(im_levels)
+    if variables is None:
+        variables = []
+        n_samples = 1
+    hz = inputs[hazard_name]
+    z_factors = hz.z_factor * im_levels / hz.corner_disp
+    samples = uc.sample_variables(variables, n_samples, method=method, seed=seed)
+    values = np.concatenate([np.repeat(samples, n_levels, axis=0),
+                             np.tile(z_factors, n_samples)[:, np.newaxis]], axis=1)
+    paths = [var.path for var in variables] + [f"{hazard_name}.z_factor"]
+    factors = [var.factor for var in variables] + [False]
+    bounds = batch.chunk_indices(len(values), chunk_size)
+    tasks = ((func, inputs, paths, values[start:stop], [output], func_kwargs, factors) for start, stop in bounds)
+    drifts = np.full(len(values), np.nan)
+    invalid = np.zeros(len(values), dtype=bool)
+    for (start, stop), (vals, reasons) in zip(bounds, batch.map_chunks(_evaluate_chunk, tasks, n_workers)):
+        drifts[start:stop] = vals[:, 0]
+        invalid[start:stop] = [reason is not None and reason.startswith(uc.INVALID_SAMPLE_REASON)
+                               for reason in reasons]
+    fr = FragilityResult(im_levels, ds_limits, drifts.reshape(n_samples, n_levels),
+                         invalid.reshape(n_samples, n_levels))
+    return fr.fit(n_bootstrap=n_bootstrap, conf_level=conf_level, seed=seed)
@@ -0,0 +1,296 @@
+"""
+Columnar inventory of frame buildings for bulk design.
+
+A `BuildingTable` holds the values that the displacement-based design of a frame needs, without the column and
+beam objects of `FrameBuilding`. Building values are stored in a structured array (one row per building) and the
+storey and bay values are stored as concatenated arrays, where the values of building i are between offsets[i]
+and offsets[i + 1]. The table can be sliced and filtered with numpy indexing and `FrameBuilding` objects are only
+built when they are requested.
+
+CSV files have one row per building, with the storey and bay values separated by ';'::
+
+    n_storeys,n_bays,n_seismic_frames,...,interstorey_heights,storey_masses,bay_lengths,beam_depths
+    3,2,2,...,3.4;3.4;3.4,4.0e4;4.0e4;4.0e4,6.0;6.0,0.5;0.5
+
+Example::
+
+    bt = inventory.BuildingTable.from_csv('buildings.csv')
+    tall = bt[bt['n_storeys'] > 5]
+    res = dbd.design_rc_frame_table(tall, hz)
+    fb = tall.get_frame_building(0)
+
+Inventories that do not fit in memory are read in chunks with `iter_chunks`, from a CSV file or from a table
+store directory (see `BuildingTable.to_store`), which is memory-mapped::
+
+    for chunk in inventory.iter_chunks('buildings.csv', chunk_size=10000):
+        res = dbd.design_rc_frame_table(chunk, hz)
+"""
+import csv
+import itertools
+import os
+
+import numpy as np
+
+BUILDING_DTYPE = np.dtype([
+    ("n_storeys", np.int64),
+    ("n_bays", np.int64),
+    ("n_seismic_frames", np.int64),
+    ("n_gravity_frames", np.int64),
+    ("floor_length", np.float64),
+    ("floor_width", np.float64),
+    ("horz2vert_mass", np.float64),
+    ("fc", np.float64),
+    ("fy", np.float64),
+    ("e_mod_steel", np.float64),
+    ("poissons_ratio", np.float64),
+])
+STOREY_FIELDS = ("interstorey_heights", "storey_masses")
+BAY_FIELDS = ("bay_lengths", "beam_depths")
+MATERIAL_FIELDS = ("fc", "fy", "e_mod_steel", "poissons_ratio")
+
+
+def _offsets(counts):
+    return np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+
+def _gather_index(offsets, idx):
+    """Indices of the ragged values of the rows `idx`"""
+    starts = offsets[:-1][idx]
+    lengths = offsets[1:][idx] - starts
+    new_offsets = _offsets(lengths)
+    return np.repeat(starts - new_offsets[:-1], lengths) + np.arange(new_offsets[-1])
+
+
+class BuildingTable(object):
+    """
+    Columnar inventory of frame buildings.
+
+    :param records: structured array of BUILDING_DTYPE
+    :param storey_values: dict of storey field name to concatenated values (length sum of n_storeys)
+    :param bay_values: dict of bay field name to concatenated values (length sum of n_bays), beam depths are
+        per bay (same at each storey)
+    """
+
+    def __init__(self, records, storey_values, bay_values):
+        self.records = np.asarray(records, dtype=BUILDING_DTYPE)
+        self.storey_offsets = _offsets(self.records["n_storeys"])
+        self.bay_offsets = _offsets(self.records["n_bays"])
+        self.storey_values = {}
+        for name in STOREY_FIELDS:
+            self.storey_values[name] = np.asarray(storey_values[name], dtype=float)
+            if len(self.storey_values[name]) != self.storey_offsets[-1]:
+                raise ValueError(f"Length of {name} ({len(self.storey_values[name])}) does not match the total "
+                                 f"number of storeys ({self.storey_offsets[-1]})")
+        self.bay_values = {}
+        for name in BAY_FIELDS:
+            self.bay_values[name] = np.asarray(bay_values[name], dtype=float)
+            if len(self.bay_values[name]) != self.bay_offsets[-1]:
+                raise ValueError(f"Length of {name} ({len(self.bay_values[name])}) does not match the total "
+                                 f"number of bays ({self.bay_offsets[-1]})")
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, key):
+        """
+        Column of building values (str key) or a new table of the selected buildings (int, slice, index or
+        boolean array).
+        """
+        if isinstance(key, str):
+            return self.records[key]
+        idx = np.arange(len(self))[key]
+        if np.ndim(idx) == 0:
+            idx = np.array([idx])
+        s_idx = _gather_index(self.storey_offsets, idx)
+        b_idx = _gather_index(self.bay_offsets, idx)
+        return BuildingTable(self.records[idx], {name: vals[s_idx] for name, vals in self.storey_values.items()},
+                             {name: vals[b_idx] for name, vals in self.bay_values.items()})
+
+    def get_values(self, name, i):
+        """Storey or bay values of building i"""
+        if name in self.storey_values:
+            return self.storey_values[name][self.storey_offsets[i]:self.storey_offsets[i + 1]]
+        return self.bay_values[name][self.bay_offsets[i]:self.bay_offsets[i + 1]]
+
+    def padded(self, name, fill=0.0):
+        """
+        Storey values as an array of (max n_storeys, n_buildings) filled with `fill` above the roof of each building.
+        """
+        n_storeys = self.records["n_storeys"]
+        out = np.full((np.max(n_storeys, initial=0), len(self)), fill, dtype=float)
+        out.T[self.storey_mask.T] = self.storey_values[name]  # values are in building order
+        return out
+
+    @property
+    def storey_mask(self):
+        """Array of (max n_storeys, n_buildings), True where the storey exists"""
+        n_storeys = self.records["n_storeys"]
+        return np.arange(np.max(n_storeys, initial=0))[:, np.newaxis] < n_storeys
+
+    def average(self, name):
+        """Average of the bay values of each building"""
+        vals = self.bay_values[name]
+        sums = np.add.reduceat(vals, self.bay_offsets[:-1]) if len(vals) else np.zeros(len(self))
+        return sums / self.records["n_bays"]
+
+    @classmethod
+    def from_frame_buildings(cls, fbs):
+        """
+        Creates a table from a list of FrameBuilding objects.
+        """
+        records = np.zeros(len(fbs), dtype=BUILDING_DTYPE)
+        storey_values = {name: [] for name in STOREY_FIELDS}
+        bay_values = {name: [] for name in BAY_FIELDS}
+        for i, fb in enumerate(fbs):
+            for name in BUILDING_DTYPE.names:
+                if name in MATERIAL_FIELDS:
+                    records[i][name] = getattr(fb.material, name)
+                else:
+                    records[i][name] = getattr(fb, name)
+            for name in STOREY_FIELDS:
+                storey_values[name].append(np.asarray(getattr(fb, name), dtype=float))
+            bay_values["bay_lengths"].append(np.asarray(fb.bay_lengths, dtype=float))
+            bay_values["beam_depths"].append(np.mean(np.reshape(fb.beam_depths, (fb.n_storeys, fb.n_bays)), axis=0))
+        return cls(records, {name: np.concatenate(vals) if vals else [] for name, vals in storey_values.items()},
+                   {name: np.concatenate(vals) if vals else [] for name, vals in bay_values.items()})
+
+    @classmethod
+    def from_csv(cls, fname):
+        """
+        Loads a table from a CSV file with one building per row (see module docstring).
+        """
+        with open(fname, newline="") as f:
+            return cls._from_rows(list(csv.DictReader(f)))
+
+    @classmethod
+    def _from_rows(cls, rows):
+        records = np.zeros(len(rows), dtype=BUILDING_DTYPE)
+        for name in BUILDING_DTYPE.names:
+            records[name] = [float(row[name]) for row in rows]
+        storey_values = {name: np.array([float(v) for row in rows for v in row[name].split(";")])
+                         for name in STOREY_FIELDS}
+        bay_values = {name: np.array([float(v) for row in rows for v in row[name].split(";")])
+                      for name in BAY_FIELDS}
+        return cls(records, storey_values, bay_values)
+
+    def to_csv(self, fname):
+        with open(fname, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(list(BUILDING_DTYPE.names) + list(STOREY_FIELDS) + list(BAY_FIELDS))
+            for i, rec in enumerate(self.records):
+                ragged = [";".join(repr(float(v)) for v in self.get_values(name, i))
+                          for name in STOREY_FIELDS + BAY_FIELDS]
+                writer.writerow([rec[name].item() for name in BUILDING_DTYPE.names] + ragged)
+
+    @classmethod
+    def from_npz(cls, fname):
+        data = np.load(fname)
+        return cls(data["records"], {name: data[name] for name in STOREY_FIELDS},
+                   {name: data[name] for name in BAY_FIELDS})
+
+    def to_npz(self, fname):
+        np.savez(fname, records=self.records, **self.storey_values, **self.bay_values)
+
+    def to_store(self, path, chunk_size=100000):
+        """
+        Saves the table as a store directory (see `eqdes.store.ResultsStore`) that can be read in chunks without
+        loading the table into memory (see `iter_store`).
+        """
+        from eqdes import store
+        st = store.ResultsStore(path)
+        if len(st):
+            raise ValueError(f"Store {path} is not empty")
+        for start in range(0, len(self), chunk_size):
+            chunk = self[start:start + chunk_size]
+            data = {name: chunk.records[name] for name in BUILDING_DTYPE.names}
+            for name in STOREY_FIELDS + BAY_FIELDS:
+                data[name] = [chunk.get_values(name, i) for i in range(len(chunk))]
+            st.append(data)
+        return st
+
+    def get_frame_building(self, i):
+        """
+        Builds the FrameBuilding object of building i.
+        """
+        from eqdes import models as em  # imported on use to keep `import eqdes.inventory` light
+        rec = self.records[i]
+        fb = em.FrameBuilding(n_storeys=int(rec["n_storeys"]), n_bays=int(rec["n_bays"]))
+        fb.material = em.ReinforcedConcrete()
+        for name in MATERIAL_FIELDS:
+            setattr(fb.material, name, float(rec[name]))
+        fb.interstorey_heights = self.get_values("interstorey_heights", i).copy()
+        fb.storey_masses = self.get_values("storey_masses", i).copy()
+        fb.floor_length = float(rec["floor_length"])
+        fb.floor_width = float(rec["floor_width"])
+        fb.bay_lengths = list(self.get_values("bay_lengths", i))
+        fb.set_beam_prop("depth", list(self.get_values("beam_depths", i)))
+        fb.n_seismic_frames = int(rec["n_seismic_frames"])
+        fb.n_gravity_frames = int(rec["n_gravity_frames"])
+        fb.horz2vert_mass = float(rec["horz2vert_mass"])
+        return fb
+
+    def frame_buildings(self):
+        """Generator of the FrameBuilding objects of the table"""
+        for i in range(len(self)):
+            yield self.get_frame_building(i)
+
+
+def iter_csv(fname, chunk_size=10000):
+    """
+    Generator of BuildingTable chunks of at most `chunk_size` buildings from a CSV file, the file is read one
+    chunk at a time.
+    """
+    with open(fname, newline="") as f:
+        reader = csv.DictReader(f)
+        while True:
+            rows = list(itertools.islice(reader, chunk_size))
+            if not rows:
+                return
+            yield BuildingTable._from_rows(rows)
+
+
+def iter_store(path, chunk_size=10000):
+    """
+    Generator of BuildingTable chunks of at most `chunk_size` buildings from a table store (see
+    `BuildingTable.to_store`), only the values of the current chunk are read from the memory-mapped files.
+    """
+    from eqdes import store
+    st = store.ResultsStore(path, mode="r")
+    columns = {name: st[name] for name in BUILDING_DTYPE.names + STOREY_FIELDS + BAY_FIELDS}
+    for start in range(0, len(st), chunk_size):
+        stop = min(start + chunk_size, len(st))
+        records = np.zeros(stop - start, dtype=BUILDING_DTYPE)
+        for name in BUILDING_DTYPE.names:
+            records[name] = columns[name][start:stop]
+        ragged = {}
+        for name in STOREY_FIELDS + BAY_FIELDS:
+            col = columns[name]
+            ragged[name] = np.array(col.values[col.offsets[start]:col.offsets[stop]], dtype=float)
+        yield BuildingTable(records, {name: ragged[name] for name in STOREY_FIELDS},
+                            {name: ragged[name] for name in BAY_FIELDS})
+
+
+def iter_chunks(fname, chunk_size=10000):
+    """
+    Generator of BuildingTable chunks from a CSV file, a table store directory or an NPZ file (NPZ files are
+    loaded whole).
+    """
+    if os.path.isdir(fname):
+        yield from iter_store(fname, chunk_size)
+    elif fname.endswith(".npz"):
+        bt = BuildingTable.from_npz(fname)
+        for start in range(0, len(bt), chunk_size):
+            yield bt[start:start + chunk_size]
+    else:
+        yield from iter_csv(fname, chunk_size)
+
+
+def count_buildings(fname):
+    """Number of buildings in a CSV file, table store directory or NPZ file"""
+    if os.path.isdir(fname):
+        from eqdes import store
+        return len(store.ResultsStore(fname, mode="r"))
+    if fname.endswith(".npz"):
+        return len(np.load(fname)["records"])
+    with open(fname, newline="") as f:
+        return sum(1 for row in csv.DictReader(f))
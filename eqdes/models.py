@@ -2,7 +2,6 @@ import numpy as np
 
 from sfsimodels import models as sm
 from sfsimodels import output as mo
-import geofound
 from eqdes import nonlinear_foundation as nf
 from eqdes import dbd_tools as dt
 from eqdes.extensions.exceptions import DesignError
@@ -136,7 +135,7 @@ class DesignedRCFrame(FrameBuilding):
         self.storey_forces = np.zeros((1, len(self.storey_masses)))
         self.hm_factor = dt.cal_higher_mode_factor(self.n_storeys, btype="frame")
         self._extra_class_variables = ["method"]
-        self.inputs += self._extra_class_variables
+        self.inputs = self.inputs + self._extra_class_variables  # do not extend the list shared with the input
         self.beam_group_size = 2
 
 
@@ -174,7 +173,7 @@ class DesignedRCWall(WallBuilding):
         self.storey_forces = np.zeros((1, len(self.storey_masses)))
         self.hm_factor = dt.cal_higher_mode_factor(self.n_storeys, btype="wall")
         self._extra_class_variables = ["method"]
-        self.inputs += self._extra_class_variables
+        self.inputs = self.inputs + self._extra_class_variables  # do not extend the list shared with the input
 
     def static_dbd_values(self):
         # Material strain limits check
@@ -222,7 +221,57 @@ class AssessedRCFrame(FrameBuilding):
         self.storey_forces = np.zeros((1, len(self.storey_masses)))
         self.hm_factor = dt.cal_higher_mode_factor(self.n_storeys, btype="frame")
         self._extra_class_variables = ["method"]
-        self.inputs += self._extra_class_variables
+        self.inputs = self.inputs + self._extra_class_variables  # do not extend the list shared with the input
+
+
+def calc_fd_static_values(sl, fd, ip_axis='length', soil_q=None):
+    """
+    Foundation values that only depend on the soil and foundation (not the superstructure design).
+
+    These can be computed once and passed as `fd_static_values` to several design calls
+    that share the same soil and foundation.
+
+    :param sl: Soil object
+    :param fd: RaftFoundation or PadFoundation object
+    :param ip_axis: in-plane axis of the foundation
+    :param soil_q: bearing pressure, if None it is calculated (it does not depend on the in-plane axis)
+    :return: dict of foundation shear and rotational stiffness, bearing pressure and
+        (for pad foundations) the rotational stiffness of a single pad
+    """
+    import geofound  # imported on use to keep `import eqdes.models` light
+    values = {'k_f0_shear': geofound.stiffness.calc_shear_via_gazetas_1991(sl, fd, ip_axis=ip_axis),
+              'k_f_0': geofound.stiffness.calc_rotational_via_gazetas_1991(sl, fd, ip_axis=ip_axis)}
+    if hasattr(fd, 'pad'):
+        if soil_q is None:
+            soil_q = geofound.capacity_salgado_2008(sl=sl, fd=fd.pad)
+        values['k_f_0_pad'] = geofound.stiffness.calc_rotational_via_gazetas_1991(sl, fd.pad, ip_axis=ip_axis)
+    elif soil_q is None:
+        soil_q = geofound.capacity_salgado_2008(sl=sl, fd=fd)
+    values['soil_q'] = soil_q
+    return values
+
+
+def rotate_foundation(fd):
+    """
+    Copy of a foundation rotated by 90 degrees in plan, the width direction becomes the length direction.
+
+    Used to design a building in the width direction with the design functions that act in the length direction.
+
+    :param fd: RaftFoundation or PadFoundation object
+    :return: Foundation object
+    """
+    fd_r = fd.deepcopy()
+    pairs = [('_length', '_width')]
+    if fd.type == 'pad_foundation':
+        pairs += [('n_pads_l', 'n_pads_w'), ('_pad_pos_in_length_dir', '_pad_pos_in_width_dir'),
+                  ('_tie_beam_in_length_dir', '_tie_beam_in_width_dir'),
+                  ('tie_beam_sect_in_length_dir', 'tie_beam_sect_in_width_dir')]
+        fd_r.pad._length, fd_r.pad._width = fd.pad.width, fd.pad.length
+    for name_l, name_w in pairs:
+        val_l = getattr(fd_r, name_l, None)
+        setattr(fd_r, name_l, getattr(fd_r, name_w, None))
+        setattr(fd_r, name_w, val_l)
+    return fd_r
 
 
 class DesignedSFSIRCFrame(DesignedRCFrame):
@@ -234,13 +283,16 @@ class DesignedSFSIRCFrame(DesignedRCFrame):
     axial_load_ratio = 0.0
     theta_pseudo_up = 0.0
 
-    def __init__(self, fb, hz, sl, fd, ip_axis='length', horz2vert_mass=None):
+    def __init__(self, fb, hz, sl, fd, ip_axis='length', horz2vert_mass=None, fd_static_values=None):
         super(DesignedSFSIRCFrame, self).__init__(fb, hz)  # run parent class initialiser function
         self.sl.__dict__.update(sl.__dict__)
         # self.fd.__dict__.update(fd.__dict__)
         self.fd = fd.deepcopy()
-        self.k_f0_shear = geofound.stiffness.calc_shear_via_gazetas_1991(self.sl, self.fd, ip_axis=ip_axis)
-        self.k_f_0 = geofound.stiffness.calc_rotational_via_gazetas_1991(self.sl, self.fd, ip_axis=ip_axis)
+        if fd_static_values is None:
+            fd_static_values = calc_fd_static_values(self.sl, self.fd, ip_axis=ip_axis)
+        self.fd_static_values = fd_static_values
+        self.k_f0_shear = fd_static_values['k_f0_shear']
+        self.k_f_0 = fd_static_values['k_f_0']
         if self.fd.ftype == "raft":
             self.alpha = 4.0
         else:
@@ -253,10 +305,7 @@ class DesignedSFSIRCFrame(DesignedRCFrame):
 
     def static_values(self):
         self.total_weight = self.horz2vert_mass * (sum(self.storey_masses) + self.fd.mass) * self.g
-        if hasattr(self.fd, 'pad'):
-            self.soil_q = geofound.capacity_salgado_2008(sl=self.sl, fd=self.fd.pad)
-        else:
-            self.soil_q = geofound.capacity_salgado_2008(sl=self.sl, fd=self.fd)
+        self.soil_q = self.fd_static_values['soil_q']
 
         # Deal with both raft and pad foundations
         bearing_capacity = nf.bearing_capacity(self.fd.area, self.soil_q)
@@ -268,6 +317,108 @@ class DesignedSFSIRCFrame(DesignedRCFrame):
                                                                 self.axial_load_ratio, self.alpha, self.zeta)
 
 
+def calc_pad_footing_rotations(frame, fd, moment_column_bases, psi, k_f_0_pad, soil_q, mom_ratio=0.6,
+                               ip_axis='length'):
+    """
+    Rotations of every pad footing of a frame on a pad foundation, solved in one vectorised call.
+
+    Each pad carries the vertical load of its column and the column base moment, amplified to the underside of
+    the pad, and is restrained by the tie beams on either side (one tie beam for exterior pads).
+
+    :param frame: Designed or assessed frame building
+    :param fd: PadFoundation object
+    :param moment_column_bases: column base moments (one per column line)
+    :param psi: shear-to-vertical coefficient
+    :param k_f_0_pad: elastic rotational stiffness of a pad
+    :param soil_q: bearing pressure of the soil
+    :param mom_ratio: height ratio of the point of contra-flexure in the ground floor columns
+    :param ip_axis: in-plane axis of the foundation
+    :return: dict of arrays (length-axis, width-axis) of 'n_load', 'm_foot', 'k_tbs', 'm_cap' (including
+        tie beams), 'rot' (nan if capacity is exceeded) and 'util' (moment demand / capacity), and
+        'governing', the index of the pad with the largest utilisation
+
+    The column base moments are amplified with a fixed `mom_ratio`. A minimum column base moment, which would
+    shift the point of contra-flexure of the ground floor columns, is not accounted for.
+    """
+    h_eff = frame.interstorey_heights[0] * mom_ratio + fd.height
+    pad = fd.pad
+    n_ult = soil_q * pad.area
+    l_in = getattr(pad, ip_axis)
+    n_loads = np.array(frame.get_column_vert_loads(), dtype=float)
+    m_foot = np.array(moment_column_bases, dtype=float)[:, np.newaxis] * h_eff / frame.interstorey_heights[0]
+    m_foot = m_foot * np.ones_like(n_loads)
+    tb_sect = getattr(fd, f'tie_beam_sect_in_{ip_axis}_dir')
+    if tb_sect is not None and fd.n_pads_l > 1:
+        assert isinstance(tb_sect, sm.sections.RCBeamSection)
+        tb_length = (fd.length - (fd.pad_length * fd.n_pads_l)) / (fd.n_pads_l - 1)
+        # See supporting_docs/tie-beam-stiffness-calcs.pdf
+        k_ties = (6 * tb_sect.i_rot_ww_cracked * tb_sect.rc_mat.e_mod_conc) / tb_length
+    else:
+        k_ties = 0.0
+    k_tbs = 2 * k_ties * np.ones_like(n_loads)
+    k_tbs[0] = k_ties
+    k_tbs[-1] = k_ties
+    theta_tb_max = 0.03
+    rots = nf.calc_fd_rots_via_millen_et_al_2020_w_tie_beams(k_f_0_pad, l_in, n_loads, n_ult, psi, m_foot, h_eff,
+                                                              k_tbs=k_tbs, theta_tb_max=theta_tb_max)
+    m_cap = nf.calc_moment_capacity_via_millen_et_al_2020(l_in, n_loads, n_ult, psi, h_eff) + k_tbs * theta_tb_max
+    util = m_foot / m_cap
+    return {'n_load': n_loads, 'm_foot': m_foot, 'k_tbs': k_tbs, 'm_cap': m_cap, 'rot': rots, 'util': util,
+            'governing': np.unravel_index(np.argmax(util), util.shape)}
+
+
+def check_pad_footing_rotations(pads, theta_f, plastic_rot):
+    """
+    Raises a DesignError if any pad footing exceeds its capacity or its rotation (in addition to the
+    foundation rotation) exceeds the available plastic rotation.
+
+    :param pads: output of `calc_pad_footing_rotations`
+    :param theta_f: rotation of the whole foundation
+    :param plastic_rot: available plastic rotation of the superstructure
+    """
+    gov = pads['governing']
+    if pads['util'][gov] >= 1:
+        loc = 'exterior' if gov[0] in (0, len(pads['util']) - 1) else 'interior'
+        raise DesignError(f"Design failed - {loc} footing moment demand ({pads['m_foot'][gov]/1e3:.3g})"
+                          f" kNm exceeds capacity (~{pads['m_cap'][gov]/1e3:.3g} kNm)")
+    pad_rot = np.max(pads['rot'])
+    if pad_rot - theta_f > plastic_rot:
+        # footing should be increased or design drift increased
+        raise DesignError(f"Design failed - footing rotation ({pad_rot:.3g}) "
+                          f"exceeds plastic rotation (~{plastic_rot:.3g})")
+
+
+class DesignedBidirectionalBuilding(object):
+    """
+    Designs of a building in both plan directions.
+
+    :param length: designed building (frames) in the length direction
+    :param width: designed building (frames or walls) in the width direction
+    """
+    directions = ('length', 'width')
+
+    def __init__(self, length, width):
+        self.length = length
+        self.width = width
+
+    def get(self, name):
+        """Values of an output in each direction"""
+        return {direction: getattr(getattr(self, direction), name, None) for direction in self.directions}
+
+    def governing_direction(self, name):
+        """Direction with the largest value of an output"""
+        values = self.get(name)
+        return max(self.directions, key=lambda direction: -np.inf if values[direction] is None else values[direction])
+
+    def summary(self, outputs=('v_base', 'theta_f', 'design_drift', 'delta_d', 'mu', 't_eff')):
+        """
+        Outputs in each direction and the governing direction.
+
+        :return: dict of output name to dict of 'length', 'width' and 'governing'
+        """
+        return {name: dict(self.get(name), governing=self.governing_direction(name)) for name in outputs}
+
+
 def designed_frame_table(fb, table_name="df-table"):
     para = mo.output_to_table(fb, olist="all")
     para += mo.output_to_table(fb.fd)
@@ -291,22 +442,25 @@ class DesignedSFSIRCWall(DesignedRCWall):
     bearing_capacity = 0.0
     theta_pseudo_up = 0.0
 
-    def __init__(self, wb, hz, sl, fd):
+    def __init__(self, wb, hz, sl, fd, fd_static_values=None):
         super(DesignedSFSIRCWall, self).__init__(wb, hz)  # run parent class initialiser function
         self.sl.__dict__.update(sl.__dict__)
         self.fd.__dict__.update(fd.__dict__)
-        self.k_f0_shear = geofound.stiffness.calc_shear_via_gazetas_1991(self.sl, self.fd, ip_axis='length')
+        if fd_static_values is None:
+            fd_static_values = calc_fd_static_values(self.sl, self.fd, ip_axis='length')
+        self.fd_static_values = fd_static_values
+        self.k_f0_shear = fd_static_values['k_f0_shear']
 
         if self.fd.ftype == "raft":
             self.alpha = 4.0
         else:
             self.alpha = 3.0
-        self.k_f_0 = geofound.stiffness.calc_rotational_via_gazetas_1991(self.sl, self.fd, ip_axis='length')
+        self.k_f_0 = fd_static_values['k_f_0']
         self.zeta = 1.5
 
     def static_values(self):
         self.total_weight = (sum(self.storey_masses) + self.fd.mass) * self.g
-        soil_q = geofound.capacity_salgado_2008(sl=self.sl, fd=self.fd)
+        soil_q = self.fd_static_values['soil_q']
 
         # Deal with both raft and pad foundations
         self.bearing_capacity = nf.bearing_capacity(self.fd.area, soil_q)
@@ -333,7 +487,7 @@ class AssessedSFSIRCFrame(AssessedRCFrame):
     axial_load_ratio = 0.0
     theta_pseudo_up = 0.0
 
-    def __init__(self, fb, hz, sl, fd, ip_axis='length', horz2vert_mass=None):
+    def __init__(self, fb, hz, sl, fd, ip_axis='length', horz2vert_mass=None, fd_static_values=None):
         super(AssessedSFSIRCFrame, self).__init__(fb, hz)  # run parent class initialiser function
         self.sl.__dict__.update(sl.__dict__)
         if fd.ftype == "raft":
@@ -341,8 +495,11 @@ class AssessedSFSIRCFrame(AssessedRCFrame):
         if fd.ftype == "pad":
             self.fd = sm.PadFoundation()
         self.fd.__dict__.update(fd.__dict__)
-        self.k_f0_shear = geofound.stiffness.calc_shear_via_gazetas_1991(self.sl, self.fd, ip_axis=ip_axis)
-        self.k_f_0 = geofound.stiffness.calc_rotational_via_gazetas_1991(self.sl, self.fd, ip_axis=ip_axis)
+        if fd_static_values is None:
+            fd_static_values = calc_fd_static_values(self.sl, self.fd, ip_axis=ip_axis)
+        self.fd_static_values = fd_static_values
+        self.k_f0_shear = fd_static_values['k_f0_shear']
+        self.k_f_0 = fd_static_values['k_f_0']
         if self.fd.ftype == "raft":
             #self.k_f_0 = nf.rotational_stiffness(self.fd.width, self.fd.length, self.sl.g_mod, self.sl.poissons_ratio)
             self.alpha = 4.0
@@ -358,6 +515,7 @@ class AssessedSFSIRCFrame(AssessedRCFrame):
 
 
     def static_values(self):
+        import geofound
         self.total_weight = (sum(self.storey_masses) + self.fd.mass) * self.g * self.horz2vert_mass
         if hasattr(self.fd, 'pad_length'):
             pad = sm.PadFoundation()
@@ -387,3 +545,63 @@ def to_table(aw, table_name="af-table"):
     para += mo.output_to_table(aw.hz, prefix="Hazard ")
     para = mo.add_table_ends(para, 'latex', table_name, table_name)
     return para
+
+
+# attributes read by the design and assessment methods, by object type
+FINGERPRINT_INPUTS = {
+    "frame_building": ("n_storeys", "n_bays", "interstorey_heights", "storey_masses", "bay_lengths", "beam_depths",
+                       "n_seismic_frames", "n_gravity_frames", "horz2vert_mass", "floor_length", "floor_width",
+                       "x_offset", "columns", "beams"),
+    "wall_building": ("n_storeys", "interstorey_heights", "storey_masses", "n_walls", "wall_depth",
+                      "horz2vert_mass", "floor_length", "floor_width"),
+    "rc_material": ("fc", "fy", "e_mod_steel", "poissons_ratio"),
+    "seismic_hazard": ("z_factor", "r_factor", "n_factor", "corner_period", "corner_acc_factor"),
+    "soil": ("g_mod", "poissons_ratio", "phi", "cohesion", "unit_dry_weight", "unit_sat_weight"),
+    "raft_foundation": ("width", "length", "depth", "height", "mass", "ip_axis"),
+    "pad_foundation": ("width", "length", "depth", "height", "mass", "ip_axis", "n_pads_l", "n_pads_w", "pad_length",
+                       "pad_width", "tie_beam_sect_in_length_dir", "tie_beam_sect_in_width_dir",
+                       "pad_pos_in_length_dir", "pad_pos_in_width_dir"),
+    "rc_beam_section": ("depth", "width"),
+    # column and beam sections, the moment capacities are read by the assessment (see `moment_equilibrium`)
+    "beam_column_element": ("sections",),
+    "section": ("depth", "width", "mom_cap", "mom_cap_p", "mom_cap_n"),
+}
+
+
+def _fingerprint_value(value, sig_figs):
+    if hasattr(value, "type") and value.type in FINGERPRINT_INPUTS:
+        return value.type + "(" + ",".join(_fingerprint_value(getattr(value, name, None), sig_figs)
+                                          for name in FINGERPRINT_INPUTS[value.type]) + ")"
+    if isinstance(value, dict):
+        return "{" + ",".join(f"{k}:{_fingerprint_value(v, sig_figs)}" for k, v in sorted(value.items())) + "}"
+    if isinstance(value, (list, tuple, np.ndarray)):
+        arr = np.asarray(value)
+        if arr.dtype.kind in "fi":
+            return "[" + ",".join(f"{v:.{sig_figs}g}" for v in arr.ravel().tolist()) + f"]{arr.shape}"
+        return "[" + ",".join(_fingerprint_value(v, sig_figs) for v in value) + "]"
+    if isinstance(value, (float, np.floating)):
+        return f"{value:.{sig_figs}g}"
+    return repr(value)
+
+
+def fingerprint(*objs, sig_figs=8, **kwargs):
+    """
+    Hash of the inputs of a design or assessment problem.
+
+    Only the attributes in FINGERPRINT_INPUTS are used for the building, material, hazard, soil and foundation
+    objects (including the column and beam sections and their moment capacities), and floats are rounded to
+    `sig_figs` significant figures, so objects that describe the same problem have the same fingerprint.
+
+    :param objs: input objects (e.g. fb, hz, sl, fd) or values
+    :param sig_figs: number of significant figures of floats
+    :param kwargs: keyword arguments of the method (e.g. design_drift)
+    :return: str
+    """
+    import hashlib
+    parts = []
+    for obj in objs:
+        parts.append(_fingerprint_value(obj, sig_figs))
+        if getattr(obj, "base_type", None) == "building":
+            parts.append(_fingerprint_value(obj.material, sig_figs))
+    parts.append(_fingerprint_value(kwargs, sig_figs))
+    return hashlib.blake2b("|".join(parts).encode(), digest_size=16).hexdigest()
@@ -1,5 +1,6 @@
 import numpy as np
 from eqdes.extensions.exceptions import DesignError
+from eqdes import dbd_tools as dt
 
 
 def foundation_rotation_reduction_factor_millen(cor_norm_rot):
@@ -272,4 +273,140 @@ def calc_fd_rot_via_millen_et_al_2020_w_tie_beams(k_rot_el, l_in, n_load, n_cap,
             return theta
 
         if i == 99:
-            return None
\ No newline at end of file
+            return None
+
+
+def calc_backbone_via_millen_et_al_2020(k_rot_el, l_in, n_load, n_cap, psi, h_eff, f_p=0.5, k_tbs=0.0,
+                                        theta_pseudo_up=None, bhr=None, n_points=40, m_ratio_max=0.99,
+                                        theta_tb_max=0.03):
+    """
+    Moment-rotation backbone curves of one or many footings according to Millen et al. (2020)
+
+    Foundation inputs can be scalars or equal length arrays (one value per footing).
+    The moment grid is clustered towards the moment capacity where the rotation increases rapidly.
+    The tie-beam contribution is added as a linear spring limited to `theta_tb_max`.
+
+    :param k_rot_el: elastic rotational stiffness of the footing
+    :param l_in: in-plane length of the footing
+    :param n_load: vertical load on the footing
+    :param n_cap: vertical capacity of the footing
+    :param psi: shear-to-vertical coefficient
+    :param h_eff: effective height of the applied moment
+    :param f_p: plastic rotation factor
+    :param k_tbs: rotational stiffness of the connected tie beams
+    :param theta_pseudo_up: pseudo uplift angle (required to compute damping)
+    :param bhr: ratio of foundation width to effective height (required to compute damping)
+    :param n_points: number of points on each curve
+    :param m_ratio_max: largest footing moment as a ratio of the footing moment capacity
+    :param theta_tb_max: rotation at which tie-beam moment stops increasing
+    :return: tuple of (moments, rotations, secant stiffnesses, damping), each shaped (n_footings, n_points),
+        damping is None if `theta_pseudo_up` or `bhr` are not provided
+    """
+    scalar = all(not hasattr(v, '__len__') for v in [k_rot_el, l_in, n_load, n_cap, psi, h_eff, k_tbs])
+    k_rot_el, l_in, n_load, n_cap, psi, h_eff, k_tbs = [np.atleast_1d(np.asarray(v, dtype=float)) for v in
+                                                        np.broadcast_arrays(k_rot_el, l_in, n_load, n_cap, psi,
+                                                                            h_eff, k_tbs)]
+    m_cap = calc_moment_capacity_via_millen_et_al_2020(l_in, n_load, n_cap, psi, h_eff)
+    m_ratios = 1.0 - np.geomspace(1.0, 1.0 - m_ratio_max, n_points)
+    m_ratios[0] = 0.0
+    m_f = m_cap[:, np.newaxis] * m_ratios
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rots = m_f / k_rot_el[:, np.newaxis] * (1 + f_p / np.log(1. / m_ratios))
+    rots[:, 0] = 0.0
+    moms = m_f + k_tbs[:, np.newaxis] * np.minimum(rots, theta_tb_max)
+    k_secs = np.empty_like(moms)
+    k_secs[:, 1:] = moms[:, 1:] / rots[:, 1:]
+    k_secs[:, 0] = k_rot_el + k_tbs
+    xis = None
+    if theta_pseudo_up is not None and bhr is not None:
+        norm_rot = rots / np.reshape(theta_pseudo_up, (-1, 1))
+        cor_norm_rot = calculate_corrected_normalised_rotation(norm_rot, np.reshape(bhr, (-1, 1)))
+        eta_frot = foundation_rotation_reduction_factor(cor_norm_rot)
+        xis = dt.damping_from_reduction_factor(eta_frot)
+    if scalar:
+        return moms[0], rots[0], k_secs[0], None if xis is None else xis[0]
+    return moms, rots, k_secs, xis
+
+
+def calc_fd_mom_via_millen_et_al_2020(k_rot_el, l_in, n_load, n_cap, psi, theta, h_eff, f_p=0.5, tol=1.0e-10,
+                                      max_iter=50):
+    """
+    Footing moment that produces a given footing rotation, inverse of `calc_fd_rot_via_millen_et_al_2020`
+
+    Since the moment-rotation relationship is monotonic, this is also the largest moment within a rotation limit.
+    Writing the moment as m_cap * exp(-x), the rotation equation is solved for x using Newton's method,
+    which converges monotonically since the residual is convex and decreasing in x.
+
+    :param k_rot_el: elastic rotational stiffness of the footing
+    :param l_in: in-plane length of the footing
+    :param n_load: vertical load on the footing
+    :param n_cap: vertical capacity of the footing
+    :param psi: shear-to-vertical coefficient
+    :param theta: footing rotation (scalar or array)
+    :param h_eff: effective height of the applied moment
+    :param f_p: plastic rotation factor
+    :return: footing moment (nan for a nan rotation)
+    """
+    m_cap = calc_moment_capacity_via_millen_et_al_2020(l_in, n_load, n_cap, psi, h_eff)
+    m_cap, k_rot_el, theta = np.broadcast_arrays(*[np.asarray(v, dtype=float) for v in [m_cap, k_rot_el, theta]])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t_norm = theta * k_rot_el / m_cap
+        # starting points on the positive side of the root
+        x = np.maximum(np.minimum(1.0, f_p / (np.e * t_norm)), -np.log(t_norm))
+        for i in range(max_iter):
+            res = -x + np.log(1 + f_p / x) - np.log(t_norm)
+            dx = res / (1 + f_p / (x * (x + f_p)))
+            x = x + dx
+            if np.all(~(np.abs(dx) > tol * x)):
+                break
+        mom = np.where(theta > 0, m_cap * np.exp(-x), 0.0)
+        mom = np.where(np.isnan(theta), np.nan, mom)
+    if mom.ndim == 0:
+        return mom.item()
+    return mom
+
+
+def calc_fd_mom_via_millen_et_al_2020_w_tie_beams(k_rot_el, l_in, n_load, n_cap, psi, theta, h_eff, k_tbs=0.0,
+                                                  f_p=0.5, theta_tb_max=0.03):
+    """
+    Total moment resisted by a footing and its tie beams at a given footing rotation
+
+    :param k_tbs: rotational stiffness of the connected tie beams
+    :param theta_tb_max: rotation at which tie-beam moment stops increasing
+    :return: sum of footing and tie-beam moments
+    """
+    m_f = calc_fd_mom_via_millen_et_al_2020(k_rot_el, l_in, n_load, n_cap, psi, theta, h_eff, f_p=f_p)
+    return m_f + k_tbs * np.minimum(theta, theta_tb_max)
+
+
+def calc_fd_rots_via_millen_et_al_2020_w_tie_beams(k_rot_el, l_in, n_load, n_cap, psi, ms, h_eff, k_tbs=0.0,
+                                                   f_p=0.5, theta_tb_max=0.03, tol=1.0e-6, max_iter=100):
+    """
+    Rotations of many footings connected to tie beams, vectorised alternative to
+    `calc_fd_rot_via_millen_et_al_2020_w_tie_beams`
+
+    Solves `calc_fd_mom_via_millen_et_al_2020_w_tie_beams(theta) = ms` with Newton's method starting from zero
+    rotation. The resisting moment is concave in the rotation, so the iterations approach the root from below.
+
+    :param ms: total moment applied to each footing and its tie beams
+    :return: array of rotations, nan where the applied moment exceeds the footing and tie-beam capacity
+    """
+    k_rot_el, l_in, n_load, n_cap, psi, ms, h_eff, k_tbs = [np.asarray(v, dtype=float) for v in
+                                                            np.broadcast_arrays(k_rot_el, l_in, n_load, n_cap, psi,
+                                                                                ms, h_eff, k_tbs)]
+    m_cap = calc_moment_capacity_via_millen_et_al_2020(l_in, n_load, n_cap, psi, h_eff)
+    feasible = ms < m_cap + k_tbs * theta_tb_max
+    theta = np.zeros_like(ms)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for i in range(max_iter):
+            m_f = calc_fd_mom_via_millen_et_al_2020(k_rot_el, l_in, n_load, n_cap, psi, theta, h_eff, f_p=f_p)
+            m_f = np.asarray(m_f)
+            res = ms - m_f - k_tbs * np.minimum(theta, theta_tb_max)
+            log_ratio = np.log(m_cap / m_f)
+            k_tan = np.where(theta > 0, k_rot_el / (1 + f_p / log_ratio + f_p / log_ratio ** 2), k_rot_el)
+            k_tan = k_tan + np.where(theta < theta_tb_max, k_tbs, 0.0)
+            d_theta = np.where(feasible, res / k_tan, 0.0)
+            theta = theta + d_theta
+            if np.all(~(np.abs(d_theta) > tol * theta)):
+                break
+    return np.where(feasible, theta, np.nan)
@@ -0,0 +1,150 @@
+"""
+Feasibility screening of frame buildings before the SFSI design.
+
+Closed-form estimates are evaluated for all buildings of a BuildingTable at once, to find cases that can not
+pass `dbd.design_rc_frame_w_sfsi_via_millen_et_al_2020` before the iterative design is run:
+
+ - static failure: the bearing capacity of the foundation is less than the building weight
+ - moment capacity: the foundation moment capacity (Millen et al. 2020) is less than `moment_margin` times
+   a lower estimate of the foundation moment demand
+ - elastic: the yield drift is not less than the design drift, the superstructure stays elastic
+   (ductility less than one, 5% damping). This is only reported, elastic frames are still designed with the
+   full iterative design in `design_sfsi_frames`
+
+The lower estimate of the moment demand uses the design spectrum: for a compatible design the effective
+period is not greater than the corner period and the system displacement is not greater than the corner
+displacement reduced by the system reduction factor, so `v_base >= 4 pi^2 m_eff eta_min corner_disp / T_c^2`,
+with `eta_min` the lowest superstructure, foundation rotation or foundation shear reduction factor.
+The effective mass and height are the lower of the values of the fixed-base frame and rigid rotation profiles.
+
+Example::
+
+    scr = screening.screen_sfsi_frames(bt, hz, sl, fd, design_drift=0.02)
+    res, reasons = screening.design_sfsi_frames(bt, hz, sl, fd, design_drift=0.02, n_workers=4)
+"""
+import numpy as np
+
+from eqdes import batch
+from eqdes import dbd_tools as dt
+from eqdes import nonlinear_foundation as nf
+
+
+def _foundation_arrays(sl, fds, fd_static_values=None):
+    """Foundation values of each building, static values are computed once for each different foundation"""
+    from eqdes import models as em
+    values = {}
+    arrays = {name: np.zeros(len(fds)) for name in ['length', 'width', 'height', 'mass', 'area', 'soil_q']}
+    for i, fd in enumerate(fds):
+        if fd_static_values is not None:
+            soil_q = fd_static_values['soil_q']
+        else:
+            key = em.fingerprint(sl, fd)
+            if key not in values:
+                values[key] = em.calc_fd_static_values(sl, fd)
+            soil_q = values[key]['soil_q']
+        for name in ['length', 'width', 'height', 'mass', 'area']:
+            arrays[name][i] = getattr(fd, name)
+        arrays['soil_q'][i] = soil_q
+    return arrays
+
+
+def screen_sfsi_frames(bt, hz, sl, fd, design_drift=0.02, moment_margin=0.5, fd_static_values=None, g=9.81):
+    """
+    Screens the SFSI design of all frames in a building table.
+
+    :param bt: inventory.BuildingTable
+    :param hz: Hazard object
+    :param sl: Soil object
+    :param fd: foundation object, or list of one foundation per building
+    :param design_drift: design drift (scalar or array of n_buildings)
+    :param moment_margin: buildings are infeasible if the moment capacity is less than this factor times the lower
+        estimate of the moment demand (less than one, since the demand is an estimate)
+    :param fd_static_values: optional foundation static values (see `models.calc_fd_static_values`) if `fd` is
+        a single foundation
+    :param g: gravity acceleration [m/s2]
+    :return: dict of arrays of n_buildings: 'axial_load_ratio', 'theta_y', 'moment_capacity', 'moment_demand_min',
+        'static_failure', 'moment_capacity_exceeded', 'elastic' and 'feasible'
+    """
+    n_builds = len(bt)
+    fds = fd if isinstance(fd, (list, tuple)) else [fd] * n_builds
+    fda = _foundation_arrays(sl, fds, fd_static_values)
+    design_drift = np.broadcast_to(np.asarray(design_drift, dtype=float), (n_builds,))
+    storey_masses = bt.padded('storey_masses')
+    total_weight = bt['horz2vert_mass'] * (np.sum(storey_masses, axis=0) + fda['mass']) * g
+    n_cap = nf.bearing_capacity(fda['area'], fda['soil_q'])
+    axial_load_ratio = n_cap / total_weight
+
+    # storey values as (n_storeys + 1, n_buildings) with the foundation as the first storey
+    heights_ss = np.cumsum(bt.padded('interstorey_heights'), axis=0)
+    heights, masses = dt.add_foundation(heights_ss, storey_masses, fda['height'], fda['mass'])
+    masses = masses / bt['n_seismic_frames']
+    mask = np.concatenate([np.ones((1, n_builds), dtype=bool), bt.storey_mask])
+    hm_factor = dt.cal_higher_mode_factor(bt['n_storeys'], btype="frame")
+    frame_profile = dt.displacement_profile_frame(design_drift, heights, hm_factor, foundation=True,
+                                                  fd_height=fda['height'])
+    _, m_eff_frame, h_eff_frame = dt.equivalent_sdof(masses, frame_profile, heights, mask=mask)
+    _, m_eff_rigid, h_eff_rigid = dt.equivalent_sdof(masses, heights, heights, mask=mask)
+    mass_eff = np.minimum(m_eff_frame, m_eff_rigid)
+    height_eff = np.minimum(h_eff_frame, h_eff_rigid)
+
+    eta_min = min(dt.reduction_factor(0.05 + 0.565 / 3.141),  # superstructure at infinite ductility
+                  nf.foundation_rotation_reduction_factor(np.inf), nf.foundation_shear_reduction_factor())
+    v_base_min = 4 * 3.141 ** 2 * mass_eff * eta_min * hz.corner_disp / hz.corner_period ** 2
+    psi = 0.75 * np.tan(sl.phi_r)
+    with np.errstate(invalid='ignore'):  # static failures have no moment capacity
+        m_cap = nf.calc_moment_capacity_via_millen_et_al_2020(fda['length'], total_weight, n_cap, psi,
+                                                              np.maximum(h_eff_frame, h_eff_rigid))
+    m_cap = np.where(axial_load_ratio > 1.0, m_cap, 0.0)
+    theta_y = dt.conc_frame_yield_drift(1.1 * bt['fy'], bt['e_mod_steel'], bt.average('bay_lengths'),
+                                        bt.average('beam_depths'))
+    static_failure = axial_load_ratio <= 1.0
+    moment_exceeded = ~static_failure & (m_cap < moment_margin * v_base_min * height_eff)
+    return {'axial_load_ratio': axial_load_ratio, 'theta_y': theta_y, 'moment_capacity': m_cap,
+            'moment_demand_min': v_base_min * height_eff, 'static_failure': static_failure,
+            'moment_capacity_exceeded': moment_exceeded, 'elastic': theta_y >= design_drift,
+            'feasible': ~(static_failure | moment_exceeded)}
+
+
+def _design_chunk(args):
+    design_func, fbs, hz, sl, fds, kwargs = args
+    return [batch.evaluate_safely(design_func, fb, hz, sl, fd, **kwargs) for fb, fd in zip(fbs, fds)]
+
+
+def design_sfsi_frames(bt, hz, sl, fd, design_drift=0.02, design_func=None, moment_margin=0.5, n_workers=1,
+                       chunk_size=20, **kwargs):
+    """
+    SFSI design of the frames in a building table that pass the screening.
+
+    Frames with a static failure or an exceeded moment capacity are not designed. The 'elastic' flag of the
+    screening does not change the design.
+
+    :param design_func: SFSI design function (default dbd.design_rc_frame_w_sfsi_via_millen_et_al_2020)
+    :param kwargs: passed to the design function
+    :return: tuple of (list of designed frames or None, list of failure reasons or None)
+    """
+    from eqdes import dbd
+    if design_func is None:
+        design_func = dbd.design_rc_frame_w_sfsi_via_millen_et_al_2020
+    n_builds = len(bt)
+    fds = fd if isinstance(fd, (list, tuple)) else [fd] * n_builds
+    scr = screen_sfsi_frames(bt, hz, sl, fds, design_drift=design_drift, moment_margin=moment_margin,
+                             fd_static_values=kwargs.get('fd_static_values'))
+    design_drift = np.broadcast_to(np.asarray(design_drift, dtype=float), (n_builds,))
+    results = [None] * n_builds
+    reasons = [None] * n_builds
+    for i in np.where(scr['static_failure'])[0]:
+        reasons[i] = 'Screened - static failure, axial load ratio less than one'
+    for i in np.where(scr['moment_capacity_exceeded'])[0]:
+        reasons[i] = 'Screened - foundation moment capacity less than minimum demand'
+    feasible = np.where(scr['feasible'])[0]
+    drifts = set(design_drift[feasible].tolist())
+    for drift in drifts:  # one design call per design drift
+        idx = [i for i in feasible if design_drift[i] == drift]
+        bounds = batch.chunk_indices(len(idx), chunk_size)
+        tasks = ((design_func, [bt.get_frame_building(i) for i in idx[start:stop]], hz, sl,
+                  [fds[i] for i in idx[start:stop]], {**kwargs, 'design_drift': drift}) for start, stop in bounds)
+        for (start, stop), res in zip(bounds, batch.map_chunks(_design_chunk, tasks, n_workers)):
+            for i, (obj, reason) in zip(idx[start:stop], res):
+                results[i] = obj
+                reasons[i] = reason
+    return results, reasons
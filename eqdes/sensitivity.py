@@ -0,0 +1,199 @@
+"""
+Global sensitivity analysis of design and assessment outputs.
+
+Variance-based (Sobol) indices are estimated with the Saltelli et al. (2010) sampling scheme,
+the first-order indices with the Saltelli et al. (2010) estimator and the total-order indices with
+the Jansen (1999) estimator. Derivative-based global sensitivity measures (DGSM) are estimated with
+finite differences in the unit hypercube (Sobol and Kucherenko, 2009).
+
+The random inputs are defined with `uncertainty.RandomVariable`.
+"""
+import numpy as np
+
+from eqdes import batch
+from eqdes import uncertainty as uc
+
+
+def saltelli_samples(variables, n_samples, seed=None):
+    """
+    Creates the sample design for the Sobol indices.
+
+    The rows are grouped by base sample, each group is [A_j, B_j, AB_1j, ..., AB_dj], where AB_ij is A_j with the
+    i-th variable taken from B_j. Rows in a group share most input values, so they are evaluated together.
+
+    :param variables: list of RandomVariable
+    :param n_samples: number of base samples
+    :param seed: seed of the random number generator
+    :return: array (n_samples * (n_vars + 2), n_vars) of input values
+    """
+    n_vars = len(variables)
+    u = uc.sample_unit_hypercube(n_samples, 2 * n_vars, method="random", seed=seed)
+    u_a = u[:, :n_vars]
+    u_b = u[:, n_vars:]
+    u_all = np.empty((n_samples, n_vars + 2, n_vars))
+    u_all[:, 0] = u_a
+    u_all[:, 1] = u_b
+    for i in range(n_vars):
+        u_all[:, i + 2] = u_a
+        u_all[:, i + 2, i] = u_b[:, i]
+    u_all = u_all.reshape(-1, n_vars)
+    return np.array([var.ppf(u_all[:, j]) for j, var in enumerate(variables)]).T.reshape(u_all.shape)
+
+
+def _conf_width(boot, conf_level):
+    return uc.norm_ppf(0.5 + conf_level / 2) * np.std(boot, axis=0, ddof=1)
+
+
+def calc_sobol_indices(f_a, f_b, f_ab, n_bootstrap=100, conf_level=0.95, seed=None):
+    """
+    First- and total-order Sobol indices from model outputs of the Saltelli sample design.
+
+    :param f_a: array (n,) outputs of the A matrix
+    :param f_b: array (n,) outputs of the B matrix
+    :param f_ab: array (n, n_vars) outputs of the AB matrices
+    :param n_bootstrap: number of bootstrap resamples used for the confidence intervals
+    :param conf_level: confidence level
+    :param seed: seed for the bootstrap resampling
+    :return: dict of 'S1', 'S1_conf', 'ST', 'ST_conf' (arrays of n_vars), confidence values are half-widths
+    """
+    f_a = np.asarray(f_a)[:, np.newaxis]
+    f_b = np.asarray(f_b)[:, np.newaxis]
+    f_ab = np.asarray(f_ab)
+    n = len(f_a)
+
+    def estimate(idx):
+        # idx has shape (..., n), the estimates are computed for all resamples at once
+        a = f_a[idx]
+        b = f_b[idx]
+        ab = f_ab[idx]
+        var = np.var(np.concatenate([a, b], axis=-2), axis=-2)
+        s1 = np.mean(b * (ab - a), axis=-2) / var
+        st = 0.5 * np.mean((a - ab) ** 2, axis=-2) / var
+        return s1, st
+
+    s1, st = estimate(np.arange(n))
+    rng = np.random.default_rng(seed)
+    s1_boot, st_boot = estimate(rng.integers(0, n, size=(n_bootstrap, n)))
+    return {"S1": s1, "S1_conf": _conf_width(s1_boot, conf_level),
+            "ST": st, "ST_conf": _conf_width(st_boot, conf_level)}
+
+
+def dgsm_samples(variables, n_samples, step=0.01, seed=None):
+    """
+    Creates the sample design for the derivative-based measures.
+
+    The rows are grouped by base sample, each group is [X_j, X_j + h e_1, ..., X_j + h e_d], where the step h
+    is applied in the unit hypercube (and reversed if it would leave the unit hypercube).
+
+    :return: tuple of (array (n_samples * (n_vars + 1), n_vars) of input values, array (n_samples, n_vars) of steps)
+    """
+    n_vars = len(variables)
+    u = uc.sample_unit_hypercube(n_samples, n_vars, method="lhs", seed=seed)
+    steps = np.where(u + step < 1, step, -step)
+    u_all = np.repeat(u[:, np.newaxis], n_vars + 1, axis=1)
+    for i in range(n_vars):
+        u_all[:, i + 1, i] += steps[:, i]
+    u_all = u_all.reshape(-1, n_vars)
+    values = np.array([var.ppf(u_all[:, j]) for j, var in enumerate(variables)]).T.reshape(u_all.shape)
+    return values, steps
+
+
+def calc_dgsm_indices(f_x, f_xh, steps, n_bootstrap=100, conf_level=0.95, seed=None):
+    """
+    Derivative-based global sensitivity measures.
+
+    :param f_x: array (n,) outputs at the base samples
+    :param f_xh: array (n, n_vars) outputs at the perturbed samples
+    :param steps: array (n, n_vars) perturbation of each variable in the unit hypercube
+    :return: dict of 'nu' (mean squared derivative in the unit hypercube), 'nu_conf' and 'ST_bound',
+        the upper bound of the total-order index, nu / (pi ** 2 * variance)
+    """
+    f_x = np.asarray(f_x)
+    derivs = (np.asarray(f_xh) - f_x[:, np.newaxis]) / steps
+    n = len(f_x)
+
+    def estimate(idx):
+        return np.mean(derivs[idx] ** 2, axis=-2)
+
+    nu = estimate(np.arange(n))
+    rng = np.random.default_rng(seed)
+    nu_boot = estimate(rng.integers(0, n, size=(n_bootstrap, n)))
+    return {"nu": nu, "nu_conf": _conf_width(nu_boot, conf_level), "ST_bound": nu / (np.pi ** 2 * np.var(f_x))}
+
+
+def _evaluate(func, inputs, variables, values, group_size, outputs, n_workers, func_kwargs, share_fd_static_values):
+    paths = [var.path for var in variables]
+    factors = [var.factor for var in variables]
+    n_groups = len(values) // group_size
+    chunk_groups = max(1, 100 // group_size)
+    bounds = [(start * group_size, stop * group_size) for start, stop in batch.chunk_indices(n_groups, chunk_groups)]
+    tasks = ((func, inputs, paths, values[start:stop], outputs, func_kwargs, factors, share_fd_static_values)
+             for start, stop in bounds)
+    res = np.full((len(values), len(outputs)), np.nan)
+    for (start, stop), (vals, reasons) in zip(bounds, batch.map_chunks(_evaluate_chunk, tasks, n_workers)):
+        res[start:stop] = vals
+    return res.reshape(n_groups, group_size, len(outputs))
+
+
+def _evaluate_chunk(args):
+    return uc.evaluate_samples(*args)
+
+
+def run_sobol_analysis(func, inputs, variables, n_samples, outputs=("v_base", "theta_f"), seed=None, n_workers=1,
+                       func_kwargs=None, n_bootstrap=100, conf_level=0.95, share_fd_static_values=False):
+    """
+    Estimates first- and total-order Sobol indices of the outputs of a design or assessment function.
+
+    Requires n_samples * (n_vars + 2) evaluations. Base samples where any evaluation fails (DesignError)
+    are excluded from the estimates.
+
+    :param func: design or assessment function, e.g. dbd.design_rc_frame_w_sfsi_via_millen_et_al_2020
+    :param inputs: dict of input objects by function argument name, e.g. {'fb': fb, 'hz': hz, ...}
+    :param variables: list of uncertainty.RandomVariable
+    :param n_samples: number of base samples
+    :param outputs: names of the outputs
+    :param seed: seed of the random number generator
+    :param n_workers: number of worker processes
+    :param func_kwargs: additional keyword arguments to `func`
+    :param n_bootstrap: number of bootstrap resamples for the confidence intervals
+    :param conf_level: confidence level
+    :param share_fd_static_values: if True, soil and foundation values are reused across samples with the
+        same soil and foundation inputs (only for functions that accept `fd_static_values`)
+    :return: dict of output name to dict of indices (see `calc_sobol_indices`) plus 'n_used'
+    """
+    n_vars = len(variables)
+    values = saltelli_samples(variables, n_samples, seed=seed)
+    res = _evaluate(func, inputs, variables, values, n_vars + 2, outputs, n_workers, func_kwargs,
+                    share_fd_static_values)
+    indices = {}
+    for k, name in enumerate(outputs):
+        f = res[:, :, k]
+        ok = np.all(np.isfinite(f), axis=1)
+        indices[name] = calc_sobol_indices(f[ok, 0], f[ok, 1], f[ok, 2:], n_bootstrap=n_bootstrap,
+                                           conf_level=conf_level, seed=seed)
+        indices[name]["n_used"] = int(np.sum(ok))
+    return indices
+
+
+def run_dgsm_analysis(func, inputs, variables, n_samples, outputs=("v_base", "theta_f"), step=0.01, seed=None,
+                      n_workers=1, func_kwargs=None, n_bootstrap=100, conf_level=0.95, share_fd_static_values=False):
+    """
+    Estimates derivative-based global sensitivity measures of the outputs of a design or assessment function.
+
+    Requires n_samples * (n_vars + 1) evaluations. See `run_sobol_analysis` for the parameters.
+
+    :param step: finite difference step in the unit hypercube
+    :return: dict of output name to dict of measures (see `calc_dgsm_indices`) plus 'n_used'
+    """
+    n_vars = len(variables)
+    values, steps = dgsm_samples(variables, n_samples, step=step, seed=seed)
+    res = _evaluate(func, inputs, variables, values, n_vars + 1, outputs, n_workers, func_kwargs,
+                    share_fd_static_values)
+    indices = {}
+    for k, name in enumerate(outputs):
+        f = res[:, :, k]
+        ok = np.all(np.isfinite(f), axis=1)
+        indices[name] = calc_dgsm_indices(f[ok, 0], f[ok, 1:], steps[ok], n_bootstrap=n_bootstrap,
+                                          conf_level=conf_level, seed=seed)
+        indices[name]["n_used"] = int(np.sum(ok))
+    return indices
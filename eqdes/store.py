@@ -0,0 +1,266 @@
+"""
+Compact columnar storage of design and assessment results.
+
+A store is a directory with one raw binary file per column and a `schema.json` file with the column types and the
+number of rows. Batches of results are appended to the end of the column files, and columns are read back as
+memory-mapped arrays, so large stores are reloaded without reading the data into memory.
+
+Column kinds:
+
+ - 'scalar': one number per row (e.g. v_base)
+ - 'ragged': an array of variable length per row (e.g. storey_forces), stored as the concatenated values and
+   the row offsets
+ - 'category': a string per row (e.g. the failure reason), stored as integer codes
+
+Example::
+
+    st = store.ResultsStore('results')
+    st.append_results(designs, scalars=('v_base', 'theta_f'), arrays=('storey_forces',))
+    st = store.ResultsStore('results', mode='r')
+    v_base = st['v_base']
+    forces = st['storey_forces'][10]
+"""
+import json
+import os
+
+import numpy as np
+
+from eqdes import batch
+
+
+class RaggedColumn(object):
+    """
+    Variable-length arrays, row i is values[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, values, offsets):
+        self.values = values
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.values[self.offsets[i]:self.offsets[i + 1]]
+
+    @property
+    def lengths(self):
+        return np.diff(self.offsets)
+
+
+class ResultsStore(object):
+    """
+    Columnar store of results on disk.
+
+    :param path: directory of the store, created if it does not exist
+    :param mode: 'a' to read and append, 'r' for read only
+    """
+    schema_file = "schema.json"
+
+    def __init__(self, path, mode="a"):
+        if mode not in ("a", "r"):
+            raise ValueError(f"mode must be 'a' or 'r', not {mode}")
+        self.path = path
+        self.mode = mode
+        schema_path = os.path.join(path, self.schema_file)
+        if os.path.exists(schema_path):
+            with open(schema_path) as f:
+                self.schema = json.load(f)
+            if mode == "a":
+                self._truncate()
+        elif mode == "r":
+            raise FileNotFoundError(f"No results store at {path}")
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.schema = {"n_rows": 0, "columns": {}}
+
+    @property
+    def n_rows(self):
+        return self.schema["n_rows"]
+
+    def __len__(self):
+        return self.n_rows
+
+    @property
+    def columns(self):
+        return list(self.schema["columns"])
+
+    def _file(self, name, part):
+        return os.path.join(self.path, f"{name}.{part}")
+
+    def _write_schema(self):
+        tmp = os.path.join(self.path, self.schema_file + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.schema, f, indent=1)
+        os.replace(tmp, os.path.join(self.path, self.schema_file))
+
+    def _truncate(self):
+        """Removes the data of an interrupted append (beyond the rows in the schema) from the column files"""
+        n = self.n_rows
+        for name, col in self.schema["columns"].items():
+            if col["kind"] == "scalar":
+                sizes = {"bin": n * np.dtype(col["dtype"]).itemsize}
+            elif col["kind"] == "category":
+                sizes = {"bin": n * np.dtype(np.int32).itemsize}
+            else:
+                sizes = {"bin": col["n_values"] * np.dtype(col["dtype"]).itemsize,
+                         "offsets": (n + 1) * np.dtype(np.int64).itemsize if n else 0}
+            for part, size in sizes.items():
+                fname = self._file(name, part)
+                if os.path.exists(fname) and os.path.getsize(fname) > size:
+                    with open(fname, "r+b") as f:
+                        f.truncate(size)
+
+    def _append_bytes(self, name, part, arr):
+        with open(self._file(name, part), "ab") as f:
+            f.write(np.ascontiguousarray(arr).tobytes())
+
+    def _infer_column(self, values, kind=None):
+        if kind == "category":
+            return {"kind": "category", "categories": []}
+        if kind == "ragged":  # e.g. a first batch of failed results (all None)
+            first = next((v for v in values if v is not None), None)
+            dtype = np.asarray(first).dtype.str if first is not None else np.dtype(float).str
+            return {"kind": "ragged", "dtype": dtype, "n_values": 0}
+        if isinstance(values, np.ndarray) and values.dtype != object:
+            if values.dtype.kind in "US":
+                return {"kind": "category", "categories": []}
+            return {"kind": "scalar", "dtype": values.dtype.str}
+        first = next((v for v in values if v is not None), None)
+        if isinstance(first, str):
+            return {"kind": "category", "categories": []}
+        if first is not None and np.ndim(first):
+            return {"kind": "ragged", "dtype": np.asarray(first).dtype.str, "n_values": 0}
+        return {"kind": "scalar", "dtype": np.asarray(values, dtype=float).dtype.str}
+
+    def append(self, data, kinds=None):
+        """
+        Appends a batch of rows.
+
+        :param data: dict of column name to values, arrays of n_rows for scalar columns, lists of arrays for
+            ragged columns and lists of strings (or None) for category columns
+        :param kinds: optional dict of column name to kind ('scalar', 'ragged' or 'category'), used when the column
+            is created (e.g. a ragged or category column where all values of the first batch are None)
+        """
+        if self.mode == "r":
+            raise IOError("Results store is read only")
+        lengths = set(len(values) for values in data.values())
+        if len(lengths) != 1:
+            raise ValueError(f"All columns must have the same number of rows, not {sorted(lengths)}")
+        n_new = lengths.pop()
+        columns = self.schema["columns"]
+        if columns and set(data) != set(columns):
+            raise ValueError(f"Columns {sorted(data)} do not match the store columns {sorted(columns)}")
+        new_columns = {name: self._infer_column(values, (kinds or {}).get(name))
+                       for name, values in data.items() if name not in columns}
+        scalars = {}  # checked before any data is written
+        for name, values in data.items():
+            col = columns.get(name, new_columns.get(name))
+            if col["kind"] == "scalar":
+                try:
+                    scalars[name] = np.asarray(values, dtype=col["dtype"])
+                except (TypeError, ValueError):
+                    scalars[name] = None
+                if scalars[name] is None or scalars[name].shape != (n_new,):
+                    raise ValueError(f"Column '{name}' is a scalar column, values must be one number per row")
+        for name, col in new_columns.items():
+            columns[name] = col
+            for part in ("bin", "offsets"):  # data of an interrupted first append
+                if os.path.exists(self._file(name, part)):
+                    os.remove(self._file(name, part))
+        for name, values in data.items():
+            col = columns[name]
+            if col["kind"] == "scalar":
+                self._append_bytes(name, "bin", scalars[name])
+            elif col["kind"] == "category":
+                codes = np.full(n_new, -1, dtype=np.int32)
+                cats = col["categories"]
+                for i, val in enumerate(values):
+                    if val is None:
+                        continue
+                    val = str(val)
+                    if val not in cats:
+                        cats.append(val)
+                    codes[i] = cats.index(val)
+                self._append_bytes(name, "bin", codes)
+            else:
+                arrs = [np.empty(0) if val is None else np.asarray(val).ravel() for val in values]
+                offsets = col["n_values"] + np.cumsum([len(arr) for arr in arrs], dtype=np.int64)
+                if self.n_rows == 0:
+                    offsets = np.insert(offsets, 0, 0)
+                self._append_bytes(name, "bin", np.concatenate(arrs).astype(col["dtype"]) if arrs else
+                                   np.empty(0, dtype=col["dtype"]))
+                self._append_bytes(name, "offsets", offsets)
+                col["n_values"] = int(offsets[-1]) if len(offsets) else col["n_values"]
+        self.schema["n_rows"] += n_new
+        self._write_schema()  # written last, rows beyond n_rows (e.g. from an interrupted append) are ignored
+
+    def append_results(self, objs, scalars=("v_base",), arrays=(), reasons=None):
+        """
+        Appends the outputs of designed or assessed objects.
+
+        :param objs: list of designed or assessed objects (None for failed evaluations)
+        :param scalars: names of scalar outputs (nan if missing)
+        :param arrays: names of array outputs, e.g. 'storey_forces' (empty if missing)
+        :param reasons: optional list of failure reasons stored as the 'reason' column
+        """
+        values = np.array([batch.extract_outputs(obj, scalars) for obj in objs]).reshape(len(objs), len(scalars))
+        data = {name: values[:, j] for j, name in enumerate(scalars)}
+        for name in arrays:
+            data[name] = [None if getattr(obj, name, None) is None else np.asarray(getattr(obj, name), dtype=float)
+                          for obj in objs]
+        if reasons is not None:
+            data["reason"] = list(reasons)
+        kinds = {name: "ragged" for name in arrays}
+        kinds["reason"] = "category"
+        self.append(data, kinds=kinds)
+
+    def __getitem__(self, name):
+        """
+        Reads a column as a memory-mapped array (RaggedColumn for ragged columns, array of strings or None
+        for category columns).
+        """
+        col = self.schema["columns"][name]
+        n = self.n_rows
+        if n == 0:
+            return np.empty(0)
+        if col["kind"] == "scalar":
+            return np.memmap(self._file(name, "bin"), dtype=col["dtype"], mode="r", shape=(n,))
+        if col["kind"] == "category":
+            codes = np.memmap(self._file(name, "bin"), dtype=np.int32, mode="r", shape=(n,))
+            cats = np.array(col["categories"] + [None], dtype=object)
+            return cats[codes]
+        offsets = np.memmap(self._file(name, "offsets"), dtype=np.int64, mode="r", shape=(n + 1,))
+        n_values = int(offsets[-1])
+        if n_values == 0:
+            return RaggedColumn(np.empty(0, dtype=col["dtype"]), offsets)
+        values = np.memmap(self._file(name, "bin"), dtype=col["dtype"], mode="r", shape=(n_values,))
+        return RaggedColumn(values, offsets)
+
+    def get_rows(self, name, start, stop):
+        """
+        Values of rows start to stop of a column, only these rows are read (list of arrays for ragged columns).
+        """
+        col = self.schema["columns"][name]
+        stop = min(stop, self.n_rows)
+        if col["kind"] == "category":
+            codes = np.memmap(self._file(name, "bin"), dtype=np.int32, mode="r", shape=(self.n_rows,))
+            return np.array(col["categories"] + [None], dtype=object)[codes[start:stop]]
+        values = self[name]
+        if col["kind"] == "ragged":
+            return [np.array(values[i]) for i in range(start, stop)]
+        return np.array(values[start:stop])
+
+    def to_npz(self, fname):
+        """Exports the store to a compressed NPZ file, ragged columns are saved as '<name>' and '<name>_offsets'"""
+        arrays = {}
+        for name in self.columns:
+            col = self[name]
+            if isinstance(col, RaggedColumn):
+                arrays[name] = np.asarray(col.values)
+                arrays[name + "_offsets"] = np.asarray(col.offsets)
+            elif self.schema["columns"][name]["kind"] == "category":
+                arrays[name] = np.array(["" if val is None else val for val in col])
+            else:
+                arrays[name] = np.asarray(col)
+        np.savez_compressed(fname, **arrays)
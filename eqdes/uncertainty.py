@@ -0,0 +1,302 @@
+"""
+Monte Carlo propagation of input uncertainty through the design and assessment functions.
+
+Example::
+
+    variables = [uc.RandomVariable('sl.g_mod', 'lognormal', (25.0e6, 0.3)),
+                 uc.RandomVariable('sl.phi', 'normal', (32.0, 2.0)),
+                 uc.RandomVariable('fb.storey_masses', 'normal', (1.0, 0.1), factor=True)]
+    inputs = {'fb': fb, 'hz': hz, 'sl': sl, 'fd': fd}
+    mc = uc.run_monte_carlo(dbd.design_rc_frame_w_sfsi_via_millen_et_al_2020, inputs, variables, n_samples=1000,
+                            seed=1, n_workers=4)
+    print(mc.summary())
+"""
+import copy
+from collections import Counter
+
+import numpy as np
+
+from sfsimodels.exceptions import ModelError
+
+from eqdes import batch
+from eqdes import models as em
+
+# errors of sampled inputs outside the valid range (e.g. a negative stiffness), recorded as failed samples
+INVALID_SAMPLE_ERRORS = (ValueError, ArithmeticError, ModelError)
+INVALID_SAMPLE_REASON = "Invalid sample"
+
+
+def norm_ppf(p):
+    """
+    Inverse of the standard normal cumulative distribution function.
+
+    Rational approximation from Acklam (2003), relative error less than 1.2e-9.
+
+    :param p: probability (scalar or array)
+    :return: standard normal variate
+    """
+    a = [-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02, 1.383577518672690e+02,
+         -3.066479806614716e+01, 2.506628277459239e+00]
+    b = [-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02, 6.680131188771972e+01,
+         -1.328068155288572e+01]
+    c = [-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00, -2.549732539343734e+00,
+         4.374664141464968e+00, 2.938163982698783e+00]
+    d = [7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00, 3.754408661907416e+00]
+    p = np.asarray(p, dtype=float)
+    p_low = 0.02425
+    x = np.empty_like(p)
+    lower = p < p_low
+    upper = p > 1 - p_low
+    central = ~(lower | upper)
+    q = np.sqrt(-2 * np.log(p[lower]))
+    x[lower] = ((((((c[0] * q + c[1]) * q + c[2]) * q + c[3]) * q + c[4]) * q + c[5]) /
+                ((((d[0] * q + d[1]) * q + d[2]) * q + d[3]) * q + 1))
+    q = np.sqrt(-2 * np.log(1 - p[upper]))
+    x[upper] = -((((((c[0] * q + c[1]) * q + c[2]) * q + c[3]) * q + c[4]) * q + c[5]) /
+                 ((((d[0] * q + d[1]) * q + d[2]) * q + d[3]) * q + 1))
+    q = p[central] - 0.5
+    r = q * q
+    x[central] = ((((((a[0] * r + a[1]) * r + a[2]) * r + a[3]) * r + a[4]) * r + a[5]) * q /
+                  (((((b[0] * r + b[1]) * r + b[2]) * r + b[3]) * r + b[4]) * r + 1))
+    if x.ndim == 0:
+        return x.item()
+    return x
+
+
+def norm_cdf(x):
+    """
+    Standard normal cumulative distribution function.
+
+    Uses the complementary error function approximation from Numerical Recipes, relative error less than 1.2e-7.
+
+    :param x: standard normal variate (scalar or array)
+    :return: probability
+    """
+    x = np.asarray(x, dtype=float)
+    z = np.abs(x) / np.sqrt(2)
+    t = 1.0 / (1.0 + 0.5 * z)
+    erfc = t * np.exp(-z * z - 1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (
+        -0.18628806 + t * (0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (-0.82215223 + t * 0.17087277)))))))))
+    p = np.where(x >= 0, 1 - 0.5 * erfc, 0.5 * erfc)
+    if p.ndim == 0:
+        return p.item()
+    return p
+
+
+class RandomVariable(object):
+    """
+    An uncertain input to a design or assessment function.
+
+    :param path: dotted path to the input, e.g. 'sl.g_mod' or 'fb.material.fy'
+    :param dist: 'normal', 'lognormal' or 'uniform'
+    :param params: (mean, std) for normal, (median, dispersion) for lognormal, (lower, upper) for uniform
+    :param factor: if True the sampled value multiplies the base value (e.g. for storey masses)
+    """
+    dists = ("normal", "lognormal", "uniform")
+
+    def __init__(self, path, dist, params, factor=False):
+        if dist not in self.dists:
+            raise ValueError(f"dist must be one of {self.dists}, not {dist}")
+        self.path = path
+        self.dist = dist
+        self.params = tuple(params)
+        self.factor = factor
+
+    def ppf(self, u):
+        """Maps uniform variates in (0, 1) to the distribution"""
+        if self.dist == "normal":
+            return self.params[0] + self.params[1] * norm_ppf(u)
+        if self.dist == "lognormal":
+            return self.params[0] * np.exp(self.params[1] * norm_ppf(u))
+        return self.params[0] + (self.params[1] - self.params[0]) * np.asarray(u)
+
+
+def sample_unit_hypercube(n_samples, n_vars, method="lhs", seed=None):
+    """
+    Samples points in the unit hypercube.
+
+    :param n_samples: number of samples
+    :param n_vars: number of variables
+    :param method: 'lhs' for Latin hypercube sampling or 'random'
+    :param seed: seed of the random number generator, samples are reproducible for the same seed
+    :return: array (n_samples, n_vars)
+    """
+    rng = np.random.default_rng(seed)
+    if method == "random":
+        return rng.random((n_samples, n_vars))
+    if method != "lhs":
+        raise ValueError(f"method must be 'lhs' or 'random', not {method}")
+    u = np.empty((n_samples, n_vars))
+    for j in range(n_vars):
+        u[:, j] = (rng.permutation(n_samples) + rng.random(n_samples)) / n_samples
+    return u
+
+
+def sample_variables(variables, n_samples, method="lhs", seed=None):
+    """
+    Samples the random variables.
+
+    :return: array (n_samples, n_vars)
+    """
+    u = sample_unit_hypercube(n_samples, len(variables), method=method, seed=seed)
+    return np.array([var.ppf(u[:, j]) for j, var in enumerate(variables)]).T.reshape(n_samples, len(variables))
+
+
+def get_input_value(inputs, path):
+    names = path.split(".")
+    obj = inputs[names[0]]
+    for name in names[1:]:
+        obj = getattr(obj, name)
+    return obj
+
+
+def set_input_value(inputs, path, value):
+    names = path.split(".")
+    if len(names) == 1:  # function argument, e.g. 'otm_max'
+        inputs[path] = value
+        return
+    obj = inputs[names[0]]
+    for name in names[1:-1]:
+        obj = getattr(obj, name)
+    if hasattr(obj, "override"):  # sfsimodels objects that check consistency of parameters
+        obj.override(names[-1], value)
+    else:
+        setattr(obj, names[-1], value)
+
+
+def evaluate_samples(func, inputs, paths, values, outputs, func_kwargs=None, factors=None,
+                     share_fd_static_values=False):
+    """
+    Evaluates a design or assessment function for each row of sampled input values.
+
+    :param func: design or assessment function called as func(**inputs, **func_kwargs)
+    :param inputs: dict of input objects by function argument name
+    :param paths: dotted paths of the sampled inputs
+    :param values: array (n_samples, n_vars) of input values
+    :param outputs: names of the outputs to extract
+    :param func_kwargs: additional keyword arguments to `func`
+    :param factors: list of bools, if True the value multiplies the base value
+    :param share_fd_static_values: if True, the soil and foundation values (see `models.calc_fd_static_values`)
+        are computed once for each distinct set of sampled 'sl' and 'fd' inputs and passed to `func`
+    :return: tuple of (array (n_samples, n_outputs), list of failure reasons (None if successful)), samples with
+        invalid input values (e.g. a negative friction angle from a normal distribution) fail with the reason
+        'Invalid sample - <error type>: <message>'
+    """
+    if func_kwargs is None:
+        func_kwargs = {}
+    if factors is None:
+        factors = [False] * len(paths)
+    bases = [get_input_value(inputs, path) for path in paths]
+    sampled_names = set(path.split(".")[0] for path in paths)
+    fd_cols = [j for j, path in enumerate(paths) if path.split(".")[0] in ("sl", "fd")]
+    fd_static_values = {}
+    res = np.full((len(values), len(outputs)), np.nan)
+    reasons = []
+    for i, row in enumerate(values):
+        sample = dict(inputs)
+        for name in sampled_names:
+            sample[name] = copy.deepcopy(inputs[name])
+        kwargs = func_kwargs
+        try:
+            for path, base, factor, val in zip(paths, bases, factors, row):
+                set_input_value(sample, path, base * val if factor else val)
+            if share_fd_static_values:
+                key = tuple(row[fd_cols])
+                if key not in fd_static_values:
+                    fd_static_values[key] = em.calc_fd_static_values(sample["sl"], sample["fd"])
+                kwargs = dict(func_kwargs, fd_static_values=fd_static_values[key])
+            obj, reason = batch.evaluate_safely(func, **sample, **kwargs)
+        except INVALID_SAMPLE_ERRORS as err:
+            obj, reason = None, batch.design_error_reason(f"{INVALID_SAMPLE_REASON} - {type(err).__name__}: {err}")
+        if obj is not None:
+            res[i] = batch.extract_outputs(obj, outputs)
+        reasons.append(reason)
+    return res, reasons
+
+
+def _evaluate_chunk(args):
+    return evaluate_samples(*args)
+
+
+class MonteCarloResult(object):
+    """
+    Results of a Monte Carlo simulation.
+
+    Only the sampled input values and the extracted outputs are stored (nan for failed samples).
+    """
+
+    def __init__(self, variables, outputs, samples):
+        self.variables = variables
+        self.outputs = list(outputs)
+        self.samples = samples
+        self.values = np.full((len(samples), len(outputs)), np.nan)
+        self.failures = Counter()
+        self.failed = np.zeros(len(samples), dtype=bool)
+
+    @property
+    def n_samples(self):
+        return len(self.samples)
+
+    def get(self, name):
+        """Output values of all samples (nan for failed samples)"""
+        return self.values[:, self.outputs.index(name)]
+
+    @property
+    def failure_fractions(self):
+        return {reason: count / self.n_samples for reason, count in self.failures.items()}
+
+    def summary(self, quantiles=(0.05, 0.16, 0.5, 0.84, 0.95)):
+        """
+        Summary statistics of the outputs of the successful samples.
+
+        :return: dict of output name to dict of statistics
+        """
+        ok = self.values[~self.failed]
+        stats = {}
+        for j, name in enumerate(self.outputs):
+            vals = ok[:, j][np.isfinite(ok[:, j])]
+            stats[name] = {"count": len(vals),
+                           "mean": float(np.mean(vals)) if len(vals) else np.nan,
+                           "std": float(np.std(vals)) if len(vals) else np.nan}
+            for q in quantiles:
+                stats[name][f"q{q:g}"] = float(np.quantile(vals, q)) if len(vals) else np.nan
+        return stats
+
+
+def run_monte_carlo(func, inputs, variables, n_samples, outputs=("theta_f", "mu", "t_eff", "v_base"),
+                    method="lhs", seed=None, n_workers=1, chunk_size=100, func_kwargs=None, callback=None):
+    """
+    Propagates input uncertainty through a design or assessment function.
+
+    The samples are drawn in the main process so results are reproducible for a given seed regardless of
+    `n_workers` and `chunk_size`. Each chunk of samples is evaluated in a worker and only the requested outputs
+    are returned, so memory does not grow with the size of the designed objects.
+
+    :param func: design or assessment function, e.g. dbd.design_rc_frame_w_sfsi_via_millen_et_al_2020
+    :param inputs: dict of input objects by function argument name, e.g. {'fb': fb, 'hz': hz, ...}
+    :param variables: list of RandomVariable
+    :param n_samples: number of samples
+    :param outputs: names of the outputs to extract
+    :param method: 'lhs' or 'random'
+    :param seed: seed of the random number generator
+    :param n_workers: number of worker processes
+    :param chunk_size: number of samples evaluated per task
+    :param func_kwargs: additional keyword arguments to `func` (e.g. theta_max for assessment)
+    :param callback: function called with (start, stop, values, reasons) as each chunk finishes
+    :return: MonteCarloResult
+    """
+    samples = sample_variables(variables, n_samples, method=method, seed=seed)
+    paths = [var.path for var in variables]
+    factors = [var.factor for var in variables]
+    mc = MonteCarloResult(variables, outputs, samples)
+    bounds = batch.chunk_indices(n_samples, chunk_size)
+    tasks = ((func, inputs, paths, samples[start:stop], mc.outputs, func_kwargs, factors) for start, stop in bounds)
+    for (start, stop), (vals, reasons) in zip(bounds, batch.map_chunks(_evaluate_chunk, tasks, n_workers)):
+        mc.values[start:stop] = vals
+        for i, reason in enumerate(reasons):
+            if reason is not None:
+                mc.failed[start + i] = True
+                mc.failures[reason] += 1
+        if callback is not None:
+            callback(start, stop, vals, reasons)
+    return mc
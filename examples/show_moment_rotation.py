@@ -13,19 +13,32 @@ def create():
     l_in = 3.0
     n_load = 300.
     n_cap = 3000.
-    m_cap = n_load * l_in / 2 * (1 - n_load / n_cap)
-    moms = np.linspace(0.001, 0.95 * m_cap, 40)
-    # moms = [0.001]
-    rots = []
-    for mom in moms:
-
-        theta = eqdes.nonlinear_foundation.calc_fd_rot_via_millen_et_al_2020(k_rot, l_in, n_load, n_cap, psi, mom, h_eff)
-        rots.append(theta)
+    moms, rots, k_secs, xis = eqdes.nonlinear_foundation.calc_backbone_via_millen_et_al_2020(k_rot, l_in, n_load,
+                                                                                            n_cap, psi, h_eff)
 
     plt.plot(rots, moms)
     plt.show()
 
 
+def create_many_w_tie_beams():
+    k_rot = 1000.0e2
+    psi = 0.4
+    h_eff = 3.0
+    l_in = 3.0
+    n_cap = 3000.
+    n_loads = np.array([300., 600., 1000.])
+    k_tbs = np.array([0.0, 100.0e2, 100.0e2])
+    theta_pseudo_up = 0.001
+    bhr = 0.5
+    moms, rots, k_secs, xis = eqdes.nonlinear_foundation.calc_backbone_via_millen_et_al_2020(
+        k_rot, l_in, n_loads, n_cap, psi, h_eff, k_tbs=k_tbs, theta_pseudo_up=theta_pseudo_up, bhr=bhr)
+    bf, sps = plt.subplots(nrows=2)
+    for i in range(len(n_loads)):
+        sps[0].plot(rots[i], moms[i], c=cbox(i))
+        sps[1].plot(rots[i], xis[i], c=cbox(i))
+    plt.show()
+
+
 def create_w_k_ext():
     k_rot = 1000.0e2
     k_ext = 100.0e2
@@ -31,6 +31,9 @@ setup(name='eqdes',
       extras_require={
           'test': ['pytest'],
       },
+      entry_points={
+          'console_scripts': ['eqdes=eqdes.cli:main'],
+      },
       python_requires='>=3',
       package_data={
           'models': ['models_data.dat'],
@@ -0,0 +1,44 @@
+import numpy as np
+
+from eqdes import aggregators
+
+
+def test_moments_and_quantiles_merge():
+    rng = np.random.default_rng(1)
+    values = rng.lognormal(13.0, 0.5, 10000)
+    values[::100] = np.nan
+    agg = aggregators.Aggregator(alpha=0.01)
+    parts = [aggregators.Aggregator(alpha=0.01) for i in range(3)]
+    for i, chunk in enumerate(np.array_split(values, 7)):
+        agg.update(chunk)
+        parts[i % 3].update(chunk)
+    merged = parts[0].merge(parts[1]).merge(parts[2])
+    finite = values[~np.isnan(values)]
+    for res in [agg.summary(quantiles=(0.1, 0.5, 0.9)), merged.summary(quantiles=(0.1, 0.5, 0.9))]:
+        assert res["count"] == len(finite)
+        assert np.isclose(res["mean"], np.mean(finite))
+        assert np.isclose(res["std"], np.std(finite, ddof=1))
+        assert res["min"] == np.min(finite) and res["max"] == np.max(finite)
+        for q in [0.1, 0.5, 0.9]:
+            assert abs(res[f"q{q:g}"] / np.quantile(finite, q) - 1) < 0.02
+    assert agg.sketch.positive == merged.sketch.positive
+
+    sketch = aggregators.QuantileSketch()
+    sketch.update([-2.0, 0.0, 0.0, 3.0])
+    assert np.allclose(sketch.quantile([0.0, 0.5, 1.0]), [-2.0, 0.0, 3.0], rtol=0.01)
+    assert np.isnan(aggregators.QuantileSketch().quantile(0.5))
+
+
+def test_grouped_aggregator():
+    agg = aggregators.GroupedAggregator(["v_base", "mu"], by=["archetype", "soil_class"])
+    agg.update({"v_base": [1.0, 2.0, 3.0, 4.0], "mu": [1.5, 2.5, np.nan, 3.0]},
+               {"archetype": ["RC3", "RC6", "RC3", "RC3"], "soil_class": ["C", "C", "C", "D"]})
+    other = aggregators.GroupedAggregator(["v_base", "mu"], by=["archetype", "soil_class"])
+    other.update({"v_base": [5.0], "mu": [2.0]}, {"archetype": ["RC6"], "soil_class": ["C"]})
+    agg = aggregators.GroupedAggregator.from_dict(agg.merge(other).to_dict())
+    summary = agg.summary()
+    assert list(summary) == [("RC3", "C"), ("RC3", "D"), ("RC6", "C")]
+    assert summary[("RC3", "C")]["v_base"]["count"] == 2
+    assert np.isclose(summary[("RC3", "C")]["v_base"]["mean"], 2.0)
+    assert summary[("RC3", "C")]["mu"]["count"] == 1
+    assert np.isclose(summary[("RC6", "C")]["v_base"]["max"], 5.0)
@@ -0,0 +1,54 @@
+import numpy as np
+
+from eqdes import batch
+
+
+def square(x):
+    return x ** 2
+
+
+def test_schedule_largest_first_with_stealing():
+    jobs = list(range(20))
+    costs = np.arange(20) * 0.01
+    res = list(batch.schedule(square, jobs, costs, n_workers=1))
+    assert [r[0] for r in res] == list(range(19, -1, -1))
+    res = list(batch.schedule(square, jobs, costs, n_workers=3, min_batch_cost=0.0))
+    assert sorted(r[0] for r in res) == jobs
+    assert all(r[1] == r[0] ** 2 for r in res)
+
+
+def test_cost_model(tmp_path):
+    cm = batch.CostModel()
+    fixed = cm.estimate("design_rc_frame", 6)
+    pad_soft = cm.estimate("design_rc_frame_w_sfsi_via_millen_et_al_2020", 6, "pad", 10.0e6)
+    assert pad_soft > cm.estimate("design_rc_frame_w_sfsi_via_millen_et_al_2020", 6, "raft", 60.0e6) > fixed
+    assert np.isclose(cm.estimate("design_rc_frame", 12), 2 * fixed)
+    for i in range(9):
+        cm.update("design_rc_frame", 6, 0.6)
+    assert np.isclose(cm.estimate("design_rc_frame", 6), 6 * (2.0e-4 + 9 * 0.1) / 10)
+    fname = str(tmp_path / "costs.json")
+    cm.save(fname)
+    assert np.isclose(batch.CostModel(fname).estimate("design_rc_frame", 6), cm.estimate("design_rc_frame", 6))
+
+
+def test_budgeted_design_returns_partial_result():
+    from eqdes import dbd
+    from eqdes import models as em
+    from tests import models_for_testing as ml
+
+    hz = em.Hazard()
+    ml.load_hazard_test_data(hz)
+    fb = ml.initialise_frame_building_test_data()
+    sl = ml.initialise_soil_test_data()
+    fd = ml.initialise_foundation_test_data()
+    df = dbd.design_rc_frame_w_sfsi_via_millen_et_al_2020(fb, hz, sl, fd, design_drift=0.05)
+    assert df.converged
+    assert df.n_evaluations > 2
+    partial = dbd.design_rc_frame_w_sfsi_via_millen_et_al_2020(fb, hz, sl, fd, design_drift=0.05,
+                                                               budget={"max_evaluations": 2})
+    assert not partial.converged
+    assert partial.n_evaluations == 3
+    assert partial.budget_exceeded.startswith("Evaluation budget exceeded")
+    assert partial.delta_d > 0
+    partial = dbd.design_rc_frame(fb, hz, budget=batch.Budget(max_time=0.0))
+    assert not partial.converged
@@ -0,0 +1,106 @@
+import numpy as np
+
+from eqdes import batch
+from eqdes import cache
+from eqdes import dbd
+from eqdes import models as em
+from eqdes.extensions.exceptions import DesignError
+from tests import models_for_testing as ml
+from tests.checking_tools import isclose
+
+
+def _inputs():
+    hz = em.Hazard()
+    ml.load_hazard_test_data(hz)
+    fb = ml.initialise_frame_building_test_data()
+    return fb, hz
+
+
+def test_cache_returns_stored_outputs(tmp_path):
+    rc = cache.ResultCache(str(tmp_path / "cache.sqlite"))
+    fb, hz = _inputs()
+    res, reason = rc.evaluate(dbd.design_rc_frame, fb, hz, outputs=("v_base", "t_eff"), arrays=("storey_forces",))
+    res2, reason2 = rc.evaluate(dbd.design_rc_frame, fb, hz, outputs=("v_base", "t_eff"), arrays=("storey_forces",))
+    df = dbd.design_rc_frame(fb, hz)
+    assert reason is None and reason2 is None
+    assert isclose(res2.v_base, df.v_base)
+    assert np.allclose(res2.storey_forces, df.storey_forces)
+    stats = rc.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert isclose(stats["hit_rate"], 0.5)
+
+    # different inputs or a new version are not cached
+    rc.evaluate(dbd.design_rc_frame, fb, hz, outputs=("v_base", "t_eff"), arrays=("storey_forces",),
+                design_drift=0.015)
+    key = cache.hash_call(dbd.design_rc_frame, fb, hz)
+    cache.__version__, version = "0.0.0", cache.__version__
+    try:
+        assert cache.hash_call(dbd.design_rc_frame, fb, hz) != key
+    finally:
+        cache.__version__ = version
+    assert rc.stats()["misses"] == 2
+
+
+def test_hash_call_includes_sections_and_ignores_budget():
+    fb, hz = _inputs()
+    fb_strong = ml.initialise_frame_building_test_data()
+    for frame in [fb, fb_strong]:
+        for column in frame.columns[0]:
+            column.sections[0].mom_cap = 1.0e6
+    fb_strong.columns[0][0].sections[0].mom_cap = 1.2e6
+    assert cache.hash_call(dbd.design_rc_frame, fb, hz) != cache.hash_call(dbd.design_rc_frame, fb_strong, hz)
+    assert (cache.hash_call(dbd.design_rc_frame, fb, hz, budget=batch.Budget(max_evaluations=10)) ==
+            cache.hash_call(dbd.design_rc_frame, fb, hz, budget=batch.Budget(max_evaluations=10)))
+
+
+def _failing_design(fb, hz):
+    raise DesignError("Design failed - drift (0.05) exceeds limit (0.04)")
+
+
+def test_cache_stores_failures(tmp_path):
+    rc = cache.ResultCache(str(tmp_path / "cache.sqlite"))
+    fb, hz = _inputs()
+    for i in range(2):
+        res, reason = rc.evaluate(_failing_design, fb, hz)
+        assert res is None
+        assert reason == "Design failed - drift exceeds limit"
+    assert rc.stats()["hits"] == 1
+
+
+def test_cache_skips_partial_results(tmp_path):
+    rc = cache.ResultCache(str(tmp_path / "cache.sqlite"))
+    fb, hz = _inputs()
+    for i in range(2):
+        res, reason = rc.evaluate(dbd.design_rc_frame, fb, hz, outputs=("v_base", "converged"), design_drift=0.05,
+                                  budget={"max_evaluations": 2})
+        assert res.converged == 0.0
+    assert rc.stats()["n_entries"] == 0
+    res, reason = rc.evaluate(dbd.design_rc_frame, fb, hz, outputs=("v_base", "converged"), design_drift=0.05,
+                              budget={"max_evaluations": 100})
+    assert res.converged == 1.0
+    assert rc.stats()["n_entries"] == 1
+
+
+def test_cache_eviction(tmp_path):
+    rc = cache.ResultCache(str(tmp_path / "cache.sqlite"), max_bytes=1000)
+    for i in range(100):
+        rc.put(str(i), {"v_base": float(i), "reason": None})
+    assert rc.size <= 1000
+    assert rc.get("99") is not None
+    assert rc.get("0") is None
+
+
+def _evaluate_chunk(args):
+    rc, drifts = args
+    fb, hz = _inputs()
+    return [rc.evaluate(dbd.design_rc_frame, fb, hz, design_drift=drift)[0].v_base for drift in drifts]
+
+
+def test_cache_shared_by_workers(tmp_path):
+    rc = cache.ResultCache(str(tmp_path / "cache.sqlite"))
+    chunks = [(rc, [0.01, 0.015, 0.02]) for i in range(4)]
+    results = list(batch.map_chunks(_evaluate_chunk, chunks, n_workers=2))
+    assert np.allclose(results, results[0])
+    stats = rc.stats()
+    assert stats["n_entries"] == 3
+    assert stats["total_hits"] + stats["total_misses"] == 12
@@ -0,0 +1,216 @@
+import json
+
+import numpy as np
+
+from eqdes import cli
+from eqdes import dbd
+from eqdes import models as em
+from eqdes import store
+from tests import models_for_testing as ml
+from tests.checking_tools import isclose
+
+BUILDING = {"n_storeys": 6, "n_bays": 3, "interstorey_heights": [3.4] * 6, "storey_masses": [40.0e3] * 6,
+            "floor_length": 18.0, "floor_width": 16.0, "bay_lengths": [6.0, 6.0, 6.0], "beam_depths": [0.5] * 3,
+            "n_seismic_frames": 3, "n_gravity_frames": 0, "horz2vert_mass": 1}
+HAZARD = {"z_factor": 0.3, "r_factor": 1.0, "n_factor": 1.0, "magnitude": 7.5, "corner_period": 4.0,
+          "corner_acc_factor": 0.55}
+
+
+def test_cli_design_rc_frame(tmp_path):
+    inv = tmp_path / "jobs.jsonl"
+    jobs = [{"id": "a", "building": BUILDING},
+            {"id": "b", "building": {**BUILDING, "storey_masses": [30.0e3] * 6}},
+            {"id": "bad", "building": {"n_storeys": 6}},
+            {"id": "c", "building": BUILDING, "kwargs": {"design_drift": 0.015}}]
+    inv.write_text("\n".join(json.dumps(job) for job in jobs))
+    defaults = tmp_path / "defaults.json"
+    defaults.write_text(json.dumps({"hazard": HAZARD}))
+    out = str(tmp_path / "results")
+    assert cli.main(["design_rc_frame", str(inv), "-o", out, "--defaults", str(defaults), "--workers", "2",
+                     "--chunk-size", "2", "--quiet"]) == 0
+
+    st = store.ResultsStore(out, mode="r")
+    assert len(st) == 4
+    hz = em.Hazard()
+    ml.load_hazard_test_data(hz)
+    df = dbd.design_rc_frame(ml.initialise_frame_building_test_data(), hz)
+    assert isclose(st["v_base"][0], df.v_base, rel_tol=1.0e-6)
+    assert np.allclose(st["storey_forces"][0], df.storey_forces)
+    assert np.isnan(st["v_base"][2])
+    assert isclose(st["design_drift"][3], 0.015)
+    with open(out + "/failures.jsonl") as f:
+        failures = [json.loads(line) for line in f]
+    assert [failure["id"] for failure in failures] == ["bad"]
+    assert failures[0]["job"] == 2
+
+
+def test_cli_first_chunk_failed(tmp_path):
+    inv = tmp_path / "jobs.jsonl"
+    jobs = [{"id": "bad", "building": {"n_storeys": 6}}, {"id": "a", "building": BUILDING}]
+    inv.write_text("\n".join(json.dumps(job) for job in jobs))
+    defaults = tmp_path / "defaults.json"
+    defaults.write_text(json.dumps({"hazard": HAZARD}))
+    out = str(tmp_path / "results")
+    assert cli.main(["design_rc_frame", str(inv), "-o", out, "--defaults", str(defaults), "--chunk-size", "1",
+                     "--quiet"]) == 0
+    st = store.ResultsStore(out, mode="r")
+    hz = em.Hazard()
+    ml.load_hazard_test_data(hz)
+    df = dbd.design_rc_frame(ml.initialise_frame_building_test_data(), hz)
+    assert len(st["storey_forces"][0]) == 0
+    assert np.allclose(st["storey_forces"][1], df.storey_forces)
+
+
+def test_cli_duplicate_jobs_run_once(tmp_path, monkeypatch):
+    inv = tmp_path / "jobs.jsonl"
+    other = {**BUILDING, "storey_masses": [30.0e3] * 6}
+    jobs = [{"id": "a", "building": BUILDING}, {"id": "b", "building": other}, {"id": "a2", "building": BUILDING},
+            {"id": "bad", "building": {"n_storeys": 6}}, {"id": "bad2", "building": {"n_storeys": 6}},
+            {"id": "a3", "building": BUILDING}]
+    inv.write_text("\n".join(json.dumps(job) for job in jobs))
+    run_job = cli.run_job
+    calls = []
+    monkeypatch.setattr(cli, "run_job", lambda method, job, *args, **kwargs: calls.append(job["id"]) or
+                        run_job(method, job, *args, **kwargs))
+    for cost_model in [None, str(tmp_path / "costs.json")]:
+        calls.clear()
+        out = str(tmp_path / f"results_{cost_model is None}")
+        cli.run("design_rc_frame", str(inv), out, defaults={"hazard": HAZARD}, chunk_size=2,
+                cost_model_path=cost_model)
+        assert calls == ["a", "b", "bad"]
+        st = store.ResultsStore(out, mode="r")
+        assert np.allclose(st["job"], np.arange(6))
+        assert np.allclose(st["v_base"][[2, 5]], st["v_base"][0])
+        assert np.allclose(st["storey_forces"][5], st["storey_forces"][0])
+        assert not np.isclose(st["v_base"][1], st["v_base"][0])
+        assert list(st["reason"][3:5]) == [st["reason"][3]] * 2 and st["reason"][3] is not None
+
+
+def test_cli_cost_model_schedule(tmp_path):
+    inv = tmp_path / "jobs.jsonl"
+    jobs = [{"id": str(i), "building": {**BUILDING, "storey_masses": [(30.0 + i) * 1.0e3] * 6}} for i in range(5)]
+    inv.write_text("\n".join(json.dumps(job) for job in jobs))
+    defaults = tmp_path / "defaults.json"
+    defaults.write_text(json.dumps({"hazard": HAZARD}))
+    costs = str(tmp_path / "costs.json")
+    for i, workers in enumerate(["1", "2"]):
+        out = str(tmp_path / f"results{i}")
+        assert cli.main(["design_rc_frame", str(inv), "-o", out, "--defaults", str(defaults), "--workers", workers,
+                         "--chunk-size", "3", "--cost-model", costs, "--quiet"]) == 0
+    with open(costs) as f:
+        assert json.load(f)["design_rc_frame|None|none"][1] == 10
+    st0 = store.ResultsStore(str(tmp_path / "results0"), mode="r")
+    st1 = store.ResultsStore(str(tmp_path / "results1"), mode="r")
+    assert np.allclose(st0["job"], np.arange(5))
+    assert np.allclose(st0["v_base"], st1["v_base"])
+    assert np.all(np.diff(st0["v_base"]) > 0)
+
+
+def test_cli_budget(tmp_path):
+    inv = tmp_path / "jobs.jsonl"
+    jobs = [{"id": "a", "building": BUILDING}, {"id": "b", "building": BUILDING, "kwargs": {"design_drift": 0.05}}]
+    inv.write_text("\n".join(json.dumps(job) for job in jobs))
+    defaults = tmp_path / "defaults.json"
+    defaults.write_text(json.dumps({"hazard": HAZARD}))
+    out = str(tmp_path / "results")
+    assert cli.main(["design_rc_frame", str(inv), "-o", out, "--defaults", str(defaults), "--max-evaluations", "1",
+                     "--quiet"]) == 0
+    st = store.ResultsStore(out, mode="r")
+    assert np.allclose(st["converged"], [1.0, 0.0])
+
+
+def test_run_job_memo_skips_partial_results():
+    job = {"id": "a", "building": BUILDING, "hazard": HAZARD,
+           "kwargs": {"design_drift": 0.05, "budget": {"max_evaluations": 1}}}
+    memo = {}
+    obj, reason = cli.run_job("design_rc_frame", job, outputs=("converged",), memo=memo)
+    assert obj.converged == 0.0
+    assert len(memo) == 0
+    job["kwargs"]["budget"] = {"max_evaluations": 100}
+    obj, reason = cli.run_job("design_rc_frame", job, outputs=("converged",), memo=memo)
+    assert obj.converged == 1.0
+    assert len(memo) == 1
+
+
+def test_cli_resume(tmp_path):
+    jobs = [{"id": "a", "building": BUILDING},
+            {"id": "bad", "building": {"n_storeys": 6}},
+            {"id": "b", "building": {**BUILDING, "storey_masses": [30.0e3] * 6}},
+            {"id": "bad2", "building": {"n_storeys": 6}},
+            {"id": "c", "building": BUILDING, "kwargs": {"design_drift": 0.015}}]
+    inv = tmp_path / "jobs.jsonl"
+    inv.write_text("\n".join(json.dumps(job) for job in jobs))
+    partial_inv = tmp_path / "partial.jsonl"  # the run is interrupted after the first chunk
+    partial_inv.write_text("\n".join(json.dumps(job) for job in jobs[:2]))
+    defaults = {"hazard": HAZARD}
+    out = str(tmp_path / "results")
+    cli.run("design_rc_frame", str(partial_inv), out, defaults=defaults, chunk_size=2)
+    with open(out + "/failures.jsonl", "a") as f:  # logged before the interruption, but not stored
+        f.write(json.dumps({"job": 3, "id": "bad2", "reason": "KeyError"}) + "\n")
+    assert cli.read_checkpoint(out)["n_done"] == 2
+    st = store.ResultsStore(out, mode="r")  # partial results are readable
+    assert len(st) == 2
+    assert np.isnan(st["v_base"][1])
+
+    n_jobs, n_failed = cli.run("design_rc_frame", str(inv), out, defaults=defaults, chunk_size=2, resume=True)
+    assert (n_jobs, n_failed) == (5, 2)
+    checkpoint = cli.read_checkpoint(out)
+    assert checkpoint["complete"] and checkpoint["n_done"] == 5
+    full = str(tmp_path / "full")
+    cli.run("design_rc_frame", str(inv), full, defaults=defaults, chunk_size=2)
+    st = store.ResultsStore(out, mode="r")
+    st_full = store.ResultsStore(full, mode="r")
+    assert np.allclose(st["job"], st_full["job"])
+    assert np.allclose(st["v_base"], st_full["v_base"], equal_nan=True)
+    with open(out + "/failures.jsonl") as f:
+        assert [json.loads(line)["id"] for line in f] == ["bad", "bad2"]
+
+
+def test_cli_vectorised_table(tmp_path):
+    from eqdes import inventory
+
+    fb = ml.initialise_frame_building_test_data()
+    fb_light = ml.initialise_frame_building_test_data()
+    fb_light.storey_masses = fb.storey_masses * 0.5
+    bt = inventory.BuildingTable.from_frame_buildings([fb, fb_light, fb, fb_light, fb])
+    bt.to_store(str(tmp_path / "buildings"))
+    defaults = tmp_path / "defaults.json"
+    defaults.write_text(json.dumps({"hazard": HAZARD}))
+    out = str(tmp_path / "results")
+    assert cli.main(["design_rc_frame", str(tmp_path / "buildings"), "-o", out, "--defaults", str(defaults),
+                     "--chunk-size", "2", "--vectorised", "--quiet"]) == 0
+    per_job = str(tmp_path / "per_job")
+    assert cli.main(["design_rc_frame", str(tmp_path / "buildings"), "-o", per_job, "--defaults", str(defaults),
+                     "--chunk-size", "2", "--quiet"]) == 0
+    st = store.ResultsStore(out, mode="r")
+    st_job = store.ResultsStore(per_job, mode="r")
+    assert np.allclose(st["v_base"], st_job["v_base"])
+    assert np.allclose(st["storey_forces"].values, st_job["storey_forces"].values)
+    for path in [out, per_job]:
+        with open(path + "/chunks.jsonl") as f:
+            chunks = [json.loads(line) for line in f]
+        assert [chunk["n_jobs"] for chunk in chunks] == [2, 2, 1]
+        assert chunks[0]["memory"] > 0
+
+
+def test_cli_group_by(tmp_path):
+    from eqdes import aggregators
+
+    jobs = [{"id": "a", "building": BUILDING, "groups": {"archetype": "RC6"}},
+            {"id": "b", "building": {**BUILDING, "storey_masses": [30.0e3] * 6}, "groups": {"archetype": "RC6"}},
+            {"id": "c", "building": BUILDING, "kwargs": {"design_drift": 0.015}, "groups": {"archetype": "RC6L"}}]
+    inv = tmp_path / "jobs.jsonl"
+    inv.write_text("\n".join(json.dumps(job) for job in jobs))
+    defaults = tmp_path / "defaults.json"
+    defaults.write_text(json.dumps({"hazard": HAZARD}))
+    out = str(tmp_path / "results")
+    assert cli.main(["design_rc_frame", str(inv), "-o", out, "--defaults", str(defaults), "--chunk-size", "2",
+                     "--group-by", "archetype", "--quiet"]) == 0
+    st = store.ResultsStore(out, mode="r")
+    with open(out + "/aggregates.json") as f:
+        groups = {group["labels"]["group_archetype"]: group["outputs"] for group in json.load(f)["groups"]}
+    assert groups["RC6"]["v_base"]["count"] == 2
+    assert np.isclose(groups["RC6"]["v_base"]["mean"], np.mean(st["v_base"][:2]))
+    assert np.isclose(groups["RC6L"]["v_base"]["max"], st["v_base"][2])
+    agg = aggregators.aggregate_store(out, ["v_base"], ["group_archetype"], chunk_size=2)
+    assert np.isclose(agg.summary()[("RC6",)]["v_base"]["mean"], groups["RC6"]["v_base"]["mean"])
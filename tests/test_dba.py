@@ -146,3 +146,32 @@ def test_dbd_sfsi_frame_via_millen_et_al_2020():
 
     af = dba.assess_rc_frame_w_sfsi_via_millen_et_al_2020(fb, hz, sp, fd, theta_max=designed_frame.design_drift, otm_max=otm_max_approx)
 
+
+
+def test_capacity_curve_matches_assessment():
+    hz = dm.Hazard()
+    ml.load_hazard_test_data(hz)
+    fb = ml.initialise_frame_building_test_data()
+    frame_dbd = dbd.design_rc_frame(fb, hz)
+    otm_max = np.sum(frame_dbd.storey_forces * frame_dbd.heights)
+    theta_max = 0.04
+    af = dba.assess_rc_frame(frame_dbd, hz, theta_max=theta_max, otm_max=otm_max)
+    curve = dba.calc_capacity_curve(frame_dbd, hz, theta_max, otm_max)
+    i = np.argmin(np.abs(curve['theta'] - af.assessed_drift))
+    assert isclose(curve['v_base'][i], af.v_base, rel_tol=1.0e-6)
+    assert isclose(curve['t_eff'][i], af.t_eff, rel_tol=1.0e-6)
+    assert isclose(curve['xi'][i], af.xi, rel_tol=1.0e-6)
+    point = dba.calc_capacity_spectrum_intersection(curve, hz.corner_disp, hz.corner_period)
+    assert not point['exceeded']
+    assert af.assessed_drift <= point['theta'] <= af.assessed_drift + theta_max / 100
+    points = dba.calc_capacity_spectrum_intersection(curve, hz.corner_disp * np.array([0.5, 1.0, 4.0]),
+                                                     hz.corner_period)
+    assert np.isclose(points['theta'][1], point['theta'])
+    assert np.all(np.diff(points['theta']) > 0)
+    assert list(points['exceeded']) == [False, False, True]
+    # demand less than the capacity at every drift
+    points = dba.calc_capacity_spectrum_intersection(curve, hz.corner_disp * np.array([1.0e-6, 1.0]),
+                                                     hz.corner_period)
+    assert np.all(np.isnan([points[name][0] for name in ['theta', 'delta', 'v_base', 't_eff', 'xi']]))
+    assert not points['exceeded'][0]
+    assert np.isclose(points['theta'][1], point['theta'])
@@ -1,5 +1,6 @@
 
 import numpy as np
+import pytest
 
 import eqdes.nonlinear_foundation
 from tests import models_for_testing as ml
@@ -10,6 +11,7 @@ import sfsimodels as sm
 import geofound as gf
 
 from tests.checking_tools import isclose
+from eqdes.extensions.exceptions import DesignError
 
 
 def test_ddbd_frame_fixed_small():
@@ -91,6 +93,31 @@ def test_ddbd_frame_fixed_large():
     # assert isclose(frame_ddbd.Storey_Forces, StoreyForcesCheck1)
 
 
+def test_design_rc_frame_table():
+    from eqdes import inventory
+    hz = dm.Hazard()
+    ml.load_hazard_test_data(hz)
+    fb = ml.initialise_frame_building_test_data()
+    fb_short = dm.FrameBuilding(n_storeys=4, n_bays=2)
+    fb_short.material = dm.ReinforcedConcrete()
+    fb_short.interstorey_heights = 3.0 * np.ones(4)
+    fb_short.storey_masses = 30.0e3 * np.ones(4)
+    fb_short.floor_length = 12.0
+    fb_short.floor_width = 10.0
+    fb_short.bay_lengths = [5.0, 7.0]
+    fb_short.set_beam_prop("depth", [.5, .6])
+    fb_short.n_seismic_frames = 2
+    fb_short.n_gravity_frames = 0
+    fb_short.horz2vert_mass = 1
+    bt = inventory.BuildingTable.from_frame_buildings([fb, fb_short])
+    res = dbd.design_rc_frame_table(bt, hz)
+    for i, building in enumerate([fb, fb_short]):
+        df = dbd.design_rc_frame(building, hz)
+        for name in ['delta_d', 'mass_eff', 'height_eff', 'mu', 'xi', 't_eff', 'v_base']:
+            assert isclose(res[name][i], getattr(df, name), rel_tol=1.0e-6), name
+        assert np.allclose(res['storey_forces'][i], df.storey_forces)
+
+
 def test_dbd_sfsi_frame_via_millen_et_al_2018():
     n_storeys = 5
     n_bays = 1
@@ -280,6 +307,33 @@ def test_dbd_sfsi_frame_via_millen_et_al_2020():
     assert np.isclose(designed_frame.axial_load_ratio, 4.54454554)
     assert np.isclose(designed_frame.delta_ss, 0.13432764512)
     assert np.isclose(designed_frame.delta_f, 0.0007801446), designed_frame.delta_f
+    n_cols = fb.n_bays + 1
+    assert designed_frame.pads['rot'].shape[0] == n_cols
+    assert np.all(designed_frame.pads['util'] < 1)
+    assert designed_frame.pads['k_tbs'][0, 0] * 2 == designed_frame.pads['k_tbs'][1, 0]
+
+
+def test_design_rc_building_w_sfsi_via_millen_et_al_2020():
+    fb, fd, sp, hz = load_system(n_storeys=3, n_bays=2)
+    fb_w, fd_w, sp_w, hz_w = load_system(n_storeys=3, n_bays=2)  # square plan, same frames in both directions
+    bd = dbd.design_rc_building_w_sfsi_via_millen_et_al_2020(fb, fb_w, hz, sp, fd)
+    designed_frame = dbd.design_rc_frame_w_sfsi_via_millen_et_al_2020(fb, hz, sp, fd)
+    assert np.isclose(bd.length.v_base, designed_frame.v_base)
+    assert np.isclose(bd.width.v_base, designed_frame.v_base, rtol=0.01)
+    summary = bd.summary()
+    assert summary['v_base']['governing'] in ('length', 'width')
+    bd_par = dbd.design_rc_building_w_sfsi_via_millen_et_al_2020(fb, fb_w, hz, sp, fd, n_workers=2)
+    assert np.isclose(bd_par.width.v_base, bd.width.v_base)
+
+
+def test_rotate_foundation():
+    fb, fd, sp, hz = load_system(n_storeys=3, n_bays=3)
+    fd_r = dm.rotate_foundation(fd)
+    assert fd_r.length == fd.width and fd_r.width == fd.length
+    assert fd_r.n_pads_l == fd.n_pads_w and fd_r.n_pads_w == fd.n_pads_l
+    assert fd_r.pad.length == fd.pad.width
+    assert np.allclose(fd_r.pad_pos_in_length_dir, fd.pad_pos_in_width_dir)
+    assert np.isclose(fd_r.mass, fd.mass)
 
 
 def test_case_study_wall_pbd_wall_fixed_base():
@@ -359,8 +413,27 @@ def test_case_study_wall_pbd_wall_w_sfsi():
 
     wb.material = sm.materials.ReinforcedConcreteMaterial()
     # dw = dbd.wall(wb, hz, design_drift=0.025)
+    # foundation rotation without coupling is 0.44 rad, foundation is too small
+    with pytest.raises(DesignError):
+        dbd.design_rc_wall_via_millen_et_al_2020(wb, hz, sl, fd, design_drift=0.025)
+    fd.length = 6.5  # m
     dw = dbd.design_rc_wall_via_millen_et_al_2020(wb, hz, sl, fd, design_drift=0.025)
-    print(dw.delta_d)
+    assert dw.fd_iterations[-1]['error'] < 0.01
+    psi = 0.75 * np.tan(dw.sl.phi_r)
+    theta_f = eqdes.nonlinear_foundation.calc_fd_rot_via_millen_et_al_2020(dw.k_f_0, dw.fd.length, dw.total_weight,
+                                                                           dw.bearing_capacity, psi,
+                                                                           dw.v_base * dw.height_eff, dw.height_eff)
+    assert np.isclose(dw.theta_f, theta_f), (dw.theta_f, theta_f)
+    assert dw.design_drift < 0.025
+
+
+def test_aitken_relaxation():
+    res = np.array([0.1, 0.01])
+    assert dbd.aitken_relaxation(0.7, res, res) == 1.0  # residual did not change
+    assert dbd.aitken_relaxation(0.7, res, np.array([np.nan, 0.0])) == 1.0
+    assert dbd.aitken_relaxation(1.0, res, 0.5 * res) == 2.0
+    assert dbd.aitken_relaxation(1.0, res, -100.0 * res) == 0.05
+    assert np.isclose(dbd.aitken_relaxation(1.0, res, -res), 0.5)
 
 
 def test_ddbd_wall_fixed():
@@ -380,6 +453,35 @@ def test_ddbd_wall_fixed():
     assert isclose(wall_dbd.t_eff, 2.38184, rel_tol=0.001), wall_dbd.t_eff
 
 
+def test_design_rc_wall_w_bracketed_theta_p():
+    hz = dm.Hazard()
+    ml.load_hazard_test_data(hz)
+    hz.corner_period = 4.6
+    wb = ml.initialise_wall_building_test_data()
+    wall_dbd = dbd.design_rc_wall(wb, hz, theta_p_solver='bracket')
+    # design displacement is at the corner displacement of the reduced spectrum
+    assert wall_dbd.design_drift < 0.025
+    assert isclose(wall_dbd.t_eff, hz.corner_period, rel_tol=0.001), wall_dbd.t_eff
+    assert isclose(wall_dbd.delta_d, hz.corner_disp * wall_dbd.eta, rel_tol=0.001), wall_dbd.delta_d
+
+
+def test_design_rc_walls():
+    hz = dm.Hazard()
+    ml.load_hazard_test_data(hz)
+    hz.corner_period = 4.6
+    wbs = []
+    for wall_depth in [2.0, 2.5, 3.0]:
+        wb = ml.initialise_wall_building_test_data()
+        wb.wall_depth = wall_depth
+        wbs.append(wb)
+    dws = dbd.design_rc_walls(wbs, hz)
+    for wb, dw in zip(wbs, dws):
+        wall_dbd = dbd.design_rc_wall(wb, hz, theta_p_solver='bracket')
+        assert isclose(dw.design_drift, wall_dbd.design_drift, rel_tol=0.001)
+        assert isclose(dw.v_base, wall_dbd.v_base, rel_tol=0.001)
+        assert np.allclose(dw.storey_forces, wall_dbd.storey_forces)
+
+
 def test_calculate_rotation_via_millen_et_al_2020():
     mom = 200.
     k_rot = 1000.0e2
@@ -1,3 +1,4 @@
+import numpy as np
 
 from eqdes import dbd_tools as dt
 from tests.checking_tools import isclose
@@ -90,6 +91,55 @@ def test_equivalent_sdof_sfsi():
     assert isclose(delta_fb, delta_sfsi)
 
 
+def test_equivalent_sdof_stacked():
+    profiles = [(np.array([1.0, 1.0, 0.8]), np.array([0.05, 0.1, 0.14]), np.array([3.0, 6.0, 9.0])),
+                (np.array([2.0, 1.5]), np.array([0.02, 0.05]), np.array([4.0, 7.5]))]
+    masses = np.full((2, 3), np.nan)  # (n_items, n_storeys), padded with nan
+    disps = np.full((2, 3), np.nan)
+    heights = np.full((2, 3), np.nan)
+    for i, (m, d, h) in enumerate(profiles):
+        masses[i, :len(m)] = m
+        disps[i, :len(m)] = d
+        heights[i, :len(m)] = h
+    mask = ~np.isnan(masses)
+    delta_d, mass_eff, height_eff = dt.equivalent_sdof(masses, disps, heights, mask=mask, axis=-1)
+    for i, (m, d, h) in enumerate(profiles):
+        expected = dt.equivalent_sdof(m, d, h)
+        assert np.allclose([delta_d[i], mass_eff[i], height_eff[i]], expected)
+
+
+def test_relations_broadcast_to_scalar_results():
+    n_storeys = np.arange(1, 25)
+    for btype in ["frame", "wall"]:
+        factors = dt.cal_higher_mode_factor(n_storeys, btype=btype)
+        assert np.all(factors == [dt.cal_higher_mode_factor(int(n), btype=btype) for n in n_storeys])
+    mu = np.array([0.5, 1.0, 1.5, 3.0])
+    for btype in ["frame", "wall"]:
+        assert np.all(dt.equivalent_viscous_damping(mu, btype=btype) ==
+                      [dt.equivalent_viscous_damping(m, btype=btype) for m in mu])
+    xi = np.array([0.05, 0.1, 0.2])
+    near_field = np.array([0.0, 2.0, 0.0])
+    assert np.all(dt.reduction_factor(xi, near_field) == [dt.reduction_factor(x, nf) for x, nf in zip(xi, near_field)])
+    mu_max = np.array([2.0, 3.0, 4.0, 5.0])
+    assert np.all(dt.bilinear_load_factor(mu, mu_max, 0.05) ==
+                  [dt.bilinear_load_factor(m, m_max, 0.05) for m, m_max in zip(mu, mu_max)])
+    mass_eff = np.array([1.0e5, 1.0e6])
+    v_base = np.array([1.0e5, 1.0e4])
+    assert np.all(dt.p_delta_base_shear(mass_eff, 0.2, 10.0, v_base) ==
+                  [dt.p_delta_base_shear(m, 0.2, 10.0, v) for m, v in zip(mass_eff, v_base)])
+    heights = np.array([3.0, 6.0, 9.0])
+    theta_f = np.array([0.0, 0.01])
+    profiles = dt.displacement_profile_frame(0.02, heights[:, np.newaxis], 0.9, foundation=True, fd_height=1.0,
+                                             theta_f=theta_f)
+    for j, tf in enumerate(theta_f):
+        expected = dt.displacement_profile_frame(0.02, heights, 0.9, foundation=True, fd_height=1.0, theta_f=tf)
+        assert np.all(profiles[:, j] == expected)
+    ss_heights = np.array([[3.0, 3.0], [6.0, 6.0]])
+    heights, masses = dt.add_foundation(ss_heights, 1.0e4 * np.ones((2, 2)), np.array([0.5, 1.0]), 2.0e4)
+    assert np.all(heights[:, 1] == dt.add_foundation([3.0, 6.0], [1.0e4, 1.0e4], 1.0, 2.0e4)[0])
+    assert np.all(masses[0] == 2.0e4)
+
+
 if __name__ == '__main__':
     # test_effective_stiffness()
     # test_equivalent_viscous_damping()
@@ -0,0 +1,32 @@
+import numpy as np
+
+from eqdes import foundation_sizing as fs
+from eqdes import models as dm
+from tests import models_for_testing as ml
+from tests import test_dbd
+
+
+def test_size_raft_foundation():
+    fb = ml.initialise_frame_building_test_data()
+    hz = dm.Hazard()
+    sl = dm.Soil()
+    fd = dm.RaftFoundation()
+    ml.load_hazard_test_data(hz)
+    ml.load_soil_test_data(sl)
+    ml.load_raft_foundation_test_data(fd)
+    fd_sized, df, history = fs.size_raft_foundation(fb, hz, sl, fd, scale_min=0.05, scale_max=1.5, tol=0.02)
+    passed = [h['scale'] for h in history if h['passed']]
+    failed = [h['scale'] for h in history if not h['passed']]
+    assert np.isclose(fd_sized.width, fd.width * min(passed))
+    assert max(failed) < min(passed) < max(failed) * 1.03
+    assert df.theta_f > 0
+
+
+def test_size_pad_foundation_w_tie_beams():
+    fb, fd, sl, hz = test_dbd.load_system(n_storeys=6, n_bays=3)
+    fd_sized, df, history = fs.size_pad_foundation(fb, hz, sl, fd, scale_min=0.5, scale_max=2.0,
+                                                   tie_beam_depths=[0.1, 0.3], tol=0.02, n_workers=2)
+    assert fd_sized.tie_beam_sect_in_length_dir.depth in [0.1, 0.3]
+    assert len(set((h['scale'], h['option']) for h in history)) == len(history)  # no repeated candidates
+    best_vol = fs.calc_foundation_volume(fd_sized)
+    assert best_vol == min(h['volume'] for h in history if h['passed'])
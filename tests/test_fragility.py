@@ -0,0 +1,53 @@
+import numpy as np
+
+from eqdes import fragility
+from eqdes import uncertainty as uc
+from eqdes import dbd
+from eqdes import dba
+from eqdes import models as dm
+from tests import models_for_testing as ml
+
+
+def test_fit_lognormal_fragility():
+    im_levels = np.linspace(0.05, 1.5, 20)
+    medians = np.array([[0.3], [0.7]])
+    betas = np.array([[0.4], [0.6]])
+    probs = uc.norm_cdf(np.log(im_levels / medians) / betas)
+    median, beta = fragility.fit_lognormal_fragility(im_levels, 1000, probs * 1000)
+    assert np.allclose(median, medians[:, 0], rtol=1.0e-4)
+    assert np.allclose(beta, betas[:, 0], rtol=1.0e-4)
+
+
+def test_run_fragility_analysis():
+    hz = dm.Hazard()
+    ml.load_hazard_test_data(hz)
+    fb = ml.initialise_frame_building_test_data()
+    frame_dbd = dbd.design_rc_frame(fb, hz)
+    otm_max = np.sum(frame_dbd.storey_forces * frame_dbd.heights)
+    inputs = {'fb': frame_dbd, 'hz': hz, 'theta_max': 0.05, 'otm_max': otm_max}
+    variables = [uc.RandomVariable('otm_max', 'lognormal', (1.0, 0.3), factor=True)]
+    im_levels = np.linspace(0.1, 1.5, 8)
+    fr = fragility.run_fragility_analysis(dba.assess_rc_frame, inputs, im_levels, [0.01, 0.02],
+                                          variables=variables, n_samples=20, seed=1, n_bootstrap=50)
+    assert fr.drifts.shape == (20, 8)
+    assert np.all(np.diff(fr.fractions, axis=1) >= 0)
+    assert fr.median[0] < fr.median[1]
+    assert np.all(fr.median_bounds[:, 0] <= fr.median) and np.all(fr.median <= fr.median_bounds[:, 1])
+    assert np.allclose(np.diag(fr.probability(fr.median)), 0.5)
+
+
+def test_invalid_samples_excluded_from_fit():
+    im_levels = np.linspace(0.1, 1.5, 8)
+    rng = np.random.default_rng(2)
+    drifts = 0.02 * im_levels * rng.lognormal(0.0, 0.3, size=(30, 1))
+    fr = fragility.FragilityResult(im_levels, [0.01], drifts).fit(n_bootstrap=20, seed=1)
+    invalid = np.zeros((40, 8), dtype=bool)
+    invalid[30:] = True
+    drifts_w_invalid = np.concatenate([drifts, np.full((10, 8), np.nan)])
+    fr_inv = fragility.FragilityResult(im_levels, [0.01], drifts_w_invalid, invalid).fit(n_bootstrap=20, seed=1)
+    assert np.allclose(fr_inv.fractions, fr.fractions)
+    assert np.allclose(fr_inv.median, fr.median)
+    assert not np.any(fr_inv.failed)
+    # counted as failures, the invalid samples exceed all damage states
+    fr_failed = fragility.FragilityResult(im_levels, [0.01], drifts_w_invalid).fit(n_bootstrap=20, seed=1)
+    assert fr_failed.median[0] < fr.median[0]
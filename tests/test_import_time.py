@@ -0,0 +1,26 @@
+import json
+import subprocess
+import sys
+
+HEAVY_MODULES = ["geofound", "scipy", "sfsimodels"]
+
+
+def imported_modules(statement):
+    """Names of the modules in `sys.modules` after running `statement` in a new interpreter"""
+    code = f"import json, sys\n{statement}\nprint(json.dumps(sorted(sys.modules)))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return set(json.loads(out.splitlines()[-1]))
+
+
+def test_import_eqdes_is_lazy():
+    import eqdes
+    modules = imported_modules("import eqdes")
+    for name in HEAVY_MODULES + [f"eqdes.{sub}" for sub in eqdes._submodules]:
+        assert name not in modules, name
+
+
+def test_kernel_imports_are_light():
+    modules = imported_modules("import eqdes.dbd_tools, eqdes.design_spectra, eqdes.nonlinear_foundation, "
+                               "eqdes.inventory")
+    for name in HEAVY_MODULES + ["eqdes.models"]:
+        assert name not in modules, name
@@ -0,0 +1,74 @@
+import numpy as np
+
+from eqdes import inventory
+from eqdes import models as em
+from tests import models_for_testing as ml
+
+
+def build_table():
+    fb = ml.initialise_frame_building_test_data()
+    fb_short = em.FrameBuilding(n_storeys=4, n_bays=2)
+    fb_short.material = em.ReinforcedConcrete()
+    fb_short.interstorey_heights = 3.0 * np.ones(4)
+    fb_short.storey_masses = 30.0e3 * np.ones(4)
+    fb_short.floor_length = 12.0
+    fb_short.floor_width = 10.0
+    fb_short.bay_lengths = [5.0, 7.0]
+    fb_short.set_beam_prop("depth", [.5, .6])
+    fb_short.n_seismic_frames = 2
+    fb_short.n_gravity_frames = 0
+    fb_short.horz2vert_mass = 1
+    return inventory.BuildingTable.from_frame_buildings([fb, fb_short, fb])
+
+
+def test_from_frame_buildings_and_slicing():
+    bt = build_table()
+    assert len(bt) == 3
+    assert np.allclose(bt['n_storeys'], [6, 4, 6])
+    sub = bt[bt['n_storeys'] < 6]
+    assert len(sub) == 1
+    assert np.allclose(sub.get_values('interstorey_heights', 0), 3.0)
+    assert np.allclose(bt[1:].get_values('storey_masses', 1), 40.0e3)
+    padded = bt.padded('interstorey_heights')
+    assert padded.shape == (6, 3)
+    assert np.allclose(padded[:, 1], [3.0, 3.0, 3.0, 3.0, 0.0, 0.0])
+    assert np.allclose(bt.average('beam_depths'), [0.5, 0.55, 0.5])
+
+
+def test_csv_and_npz_round_trip(tmp_path):
+    bt = build_table()
+    bt.to_csv(str(tmp_path / "buildings.csv"))
+    bt_csv = inventory.BuildingTable.from_csv(str(tmp_path / "buildings.csv"))
+    bt.to_npz(str(tmp_path / "buildings.npz"))
+    bt_npz = inventory.BuildingTable.from_npz(str(tmp_path / "buildings.npz"))
+    for other in [bt_csv, bt_npz]:
+        assert np.all(other.records == bt.records)
+        assert np.allclose(other.storey_values['storey_masses'], bt.storey_values['storey_masses'])
+        assert np.allclose(other.bay_values['bay_lengths'], bt.bay_values['bay_lengths'])
+
+
+def test_get_frame_building():
+    bt = build_table()
+    fb = bt.get_frame_building(1)
+    assert fb.n_storeys == 4
+    assert np.allclose(fb.interstorey_heights, 3.0)
+    assert np.allclose(fb.beam_depths[0], [0.5, 0.6])
+    assert fb.material.fy == bt['fy'][1]
+
+
+def test_iter_chunks(tmp_path):
+    bt = build_table()
+    bt = bt[[0, 1, 2, 1, 0, 1, 2]]
+    bt.to_csv(str(tmp_path / "buildings.csv"))
+    bt.to_store(str(tmp_path / "buildings"), chunk_size=3)
+    for fname in ["buildings.csv", "buildings"]:
+        chunks = list(inventory.iter_chunks(str(tmp_path / fname), chunk_size=3))
+        assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+        assert inventory.count_buildings(str(tmp_path / fname)) == 7
+        for k, chunk in enumerate(chunks):
+            expected = bt[3 * k:3 * k + 3]
+            assert np.all(chunk.records == expected.records)
+            for name in inventory.STOREY_FIELDS:
+                assert np.allclose(chunk.storey_values[name], expected.storey_values[name])
+            for name in inventory.BAY_FIELDS:
+                assert np.allclose(chunk.bay_values[name], expected.bay_values[name])
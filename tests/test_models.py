@@ -1,7 +1,11 @@
 __author__ = 'maximmillen'
 
+import numpy as np
+
+from eqdes import batch
 from eqdes import models as dm
 from tests import conftest
+from tests import models_for_testing as ml
 
 
 def test_model_inputs():
@@ -26,5 +30,37 @@ def test_initialse_designed_walls():
     assert dw.sl.unit_dry_weight == sl.unit_dry_weight
 
 
+def test_fingerprint():
+    hz = dm.Hazard()
+    ml.load_hazard_test_data(hz)
+    fb = ml.initialise_frame_building_test_data()
+    fb_same = ml.initialise_frame_building_test_data()
+    fb_same.name = "archetype 2"  # not an input of the design
+    fb_same.storey_masses = fb_same.storey_masses * (1 + 1.0e-12)
+    fb_diff = ml.initialise_frame_building_test_data()
+    fb_diff.material.fy = 500.0e6
+    key = dm.fingerprint(fb, hz, design_drift=0.02)
+    assert dm.fingerprint(fb_same, hz, design_drift=0.02) == key
+    assert dm.fingerprint(fb_diff, hz, design_drift=0.02) != key
+    assert dm.fingerprint(fb, hz, design_drift=0.025) != key
+    keys = [key, dm.fingerprint(fb_diff, hz, design_drift=0.02), dm.fingerprint(fb_same, hz, design_drift=0.02)]
+    unique, inverse = batch.deduplicate(keys)
+    assert np.all(unique == [0, 1])
+    assert np.all(inverse == [0, 1, 0])
+
+
+def test_fingerprint_includes_sections():
+    hz = dm.Hazard()
+    ml.load_hazard_test_data(hz)
+    fbs = [ml.initialise_frame_building_test_data() for i in range(3)]
+    for fb in fbs:
+        for column in fb.columns[0]:
+            column.sections[0].mom_cap = 1.0e6
+    fbs[1].columns[0][0].sections[0].mom_cap = 1.2e6
+    fbs[2].x_offset = 0.5
+    keys = [dm.fingerprint("assess_rc_frame", fb, hz, theta_max=0.02) for fb in fbs]
+    assert len(set(keys)) == 3
+
+
 if __name__ == '__main__':
     test_initialse_designed_walls()
\ No newline at end of file
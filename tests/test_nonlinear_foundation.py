@@ -0,0 +1,87 @@
+import numpy as np
+
+from eqdes import nonlinear_foundation as nf
+
+
+def test_calc_backbone_via_millen_et_al_2020_matches_scalar():
+    k_rot = 1000.0e2
+    psi = 0.4
+    h_eff = 3.0
+    l_in = 3.0
+    n_load = 300.
+    n_cap = 3000.
+    moms, rots, k_secs, xis = nf.calc_backbone_via_millen_et_al_2020(k_rot, l_in, n_load, n_cap, psi, h_eff)
+    assert xis is None
+    assert moms[0] == 0.0 and rots[0] == 0.0
+    assert np.isclose(k_secs[0], k_rot)
+    m_cap = nf.calc_moment_capacity_via_millen_et_al_2020(l_in, n_load, n_cap, psi, h_eff)
+    assert np.isclose(moms[-1], 0.99 * m_cap)
+    for mom, rot in zip(moms[1:], rots[1:]):
+        theta = nf.calc_fd_rot_via_millen_et_al_2020(k_rot, l_in, n_load, n_cap, psi, mom, h_eff)
+        assert np.isclose(theta, rot)
+    assert np.all(np.diff(rots) > 0)
+    assert np.all(np.diff(k_secs) < 0)
+
+
+def test_calc_backbone_via_millen_et_al_2020_many_footings():
+    k_rot = 1000.0e2
+    k_tbs = np.array([0.0, 100.0e2])
+    n_loads = np.array([300., 600.])
+    moms, rots, k_secs, xis = nf.calc_backbone_via_millen_et_al_2020(k_rot, 3.0, n_loads, 3000., 0.4, 3.0,
+                                                                     k_tbs=k_tbs, theta_pseudo_up=0.001, bhr=0.5,
+                                                                     n_points=20)
+    assert moms.shape == (2, 20)
+    assert np.isclose(xis[0, 0], 0.05)
+    assert np.all(np.diff(xis, axis=1) > 0)
+    m_f, rots_tb, _, _ = nf.calc_backbone_via_millen_et_al_2020(k_rot, 3.0, 600., 3000., 0.4, 3.0, n_points=20)
+    assert np.allclose(rots[1], rots_tb)
+    assert np.allclose(moms[1], m_f + k_tbs[1] * np.minimum(rots_tb, 0.03))
+
+
+def test_calc_fd_mom_via_millen_et_al_2020():
+    k_rot = 1000.0e2
+    psi = 0.4
+    h_eff = 3.0
+    l_in = 3.0
+    n_load = 300.
+    n_cap = 3000.
+    mom = nf.calc_fd_mom_via_millen_et_al_2020(k_rot, l_in, n_load, n_cap, psi, 0.0053710398, h_eff)
+    assert np.isclose(mom, 200.), mom
+    assert nf.calc_fd_mom_via_millen_et_al_2020(k_rot, l_in, n_load, n_cap, psi, 0.0, h_eff) == 0.0
+    assert np.isnan(nf.calc_fd_mom_via_millen_et_al_2020(k_rot, l_in, n_load, n_cap, psi, np.nan, h_eff))
+    moms = nf.calc_fd_mom_via_millen_et_al_2020(k_rot, l_in, n_load, n_cap, psi, np.array([np.nan, 0.0053710398]),
+                                                h_eff)
+    assert np.isnan(moms[0]) and np.isclose(moms[1], 200.)
+
+    moms, rots, _, _ = nf.calc_backbone_via_millen_et_al_2020(k_rot, l_in, n_load, n_cap, psi, h_eff)
+    moms_inv = nf.calc_fd_mom_via_millen_et_al_2020(k_rot, l_in, n_load, n_cap, psi, rots, h_eff)
+    assert np.allclose(moms_inv, moms)
+
+
+def test_calc_fd_mom_via_millen_et_al_2020_w_tie_beams():
+    k_rot = 1000.0e2
+    k_tbs = 100.0e2
+    psi = 0.4
+    h_eff = 3.0
+    l_in = 3.0
+    n_load = 300.
+    n_cap = 3000.
+    mom = 308.5
+    theta = nf.calc_fd_rot_via_millen_et_al_2020_w_tie_beams(k_rot, l_in, n_load, n_cap, psi, mom, h_eff,
+                                                              k_tbs=k_tbs)
+    mom_inv = nf.calc_fd_mom_via_millen_et_al_2020_w_tie_beams(k_rot, l_in, n_load, n_cap, psi, theta, h_eff,
+                                                                k_tbs=k_tbs)
+    assert np.isclose(mom_inv, mom, rtol=0.01), mom_inv
+
+
+def test_calc_fd_rots_via_millen_et_al_2020_w_tie_beams_matches_scalar():
+    k_rot = 1000.0e2
+    n_loads = np.array([300., 600., 300.])
+    k_tbs = np.array([100.0e2, 200.0e2, 100.0e2])
+    ms = np.array([150., 250., 1.0e4])
+    rots = nf.calc_fd_rots_via_millen_et_al_2020_w_tie_beams(k_rot, 3.0, n_loads, 3000., 0.4, ms, 3.0, k_tbs=k_tbs)
+    assert np.isnan(rots[2])
+    for i in range(2):
+        rot = nf.calc_fd_rot_via_millen_et_al_2020_w_tie_beams(k_rot, 3.0, n_loads[i], 3000., 0.4, ms[i], 3.0,
+                                                               k_tbs[i])
+        assert np.isclose(rots[i], rot, rtol=0.01)
@@ -0,0 +1,47 @@
+import numpy as np
+
+from eqdes import dbd
+from eqdes import inventory
+from eqdes import models as em
+from eqdes import screening
+from tests import models_for_testing as ml
+
+
+def build_foundation(length):
+    fd = ml.initialise_foundation_test_data()
+    fd.length = length
+    fd.width = length * 16.0 / 18.0
+    return fd
+
+
+def test_screen_sfsi_frames():
+    hz = em.Hazard()
+    ml.load_hazard_test_data(hz)
+    fb = ml.initialise_frame_building_test_data()
+    sl = ml.initialise_soil_test_data()
+    bt = inventory.BuildingTable.from_frame_buildings([fb, fb, fb])
+    fds = [build_foundation(3.0), build_foundation(18.0), build_foundation(3.0)]
+    scr = screening.screen_sfsi_frames(bt, hz, sl, fds)
+    assert np.allclose(scr['static_failure'], [True, False, True])
+    assert np.allclose(scr['feasible'], [False, True, False])
+    assert np.all(scr['moment_capacity'][1] > scr['moment_demand_min'][1])
+
+    df = dbd.design_rc_frame_w_sfsi_via_millen_et_al_2020(fb, hz, sl, fds[1])
+    assert np.isclose(scr['axial_load_ratio'][1], df.axial_load_ratio)
+    assert np.isclose(scr['theta_y'][1], df.theta_y)
+    assert scr['moment_demand_min'][1] < df.v_base * df.height_eff
+
+
+def test_design_sfsi_frames():
+    hz = em.Hazard()
+    ml.load_hazard_test_data(hz)
+    fb = ml.initialise_frame_building_test_data()
+    sl = ml.initialise_soil_test_data()
+    bt = inventory.BuildingTable.from_frame_buildings([fb, fb])
+    fds = [build_foundation(3.0), build_foundation(10.0)]
+    results, reasons = screening.design_sfsi_frames(bt, hz, sl, fds, design_drift=0.025)
+    assert results[0] is None
+    assert reasons[0].startswith('Screened - static failure')
+    assert reasons[1] is None
+    df = dbd.design_rc_frame_w_sfsi_via_millen_et_al_2020(fb, hz, sl, fds[1], design_drift=0.025)
+    assert np.isclose(results[1].v_base, df.v_base)
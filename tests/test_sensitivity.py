@@ -0,0 +1,38 @@
+import numpy as np
+
+from eqdes import sensitivity as sa
+from eqdes import uncertainty as uc
+from eqdes import dbd
+from tests import test_dbd
+
+
+def test_calc_sobol_indices_linear_model():
+    variables = [uc.RandomVariable('x.a', 'uniform', (0, 1)), uc.RandomVariable('x.b', 'uniform', (0, 1))]
+    n = 4000
+    values = sa.saltelli_samples(variables, n, seed=1).reshape(n, 4, 2)
+    f = 3.0 * values[:, :, 0] + 1.0 * values[:, :, 1]
+    indices = sa.calc_sobol_indices(f[:, 0], f[:, 1], f[:, 2:], seed=1)
+    assert np.allclose(indices['S1'], [0.9, 0.1], atol=0.05), indices['S1']
+    assert np.allclose(indices['ST'], [0.9, 0.1], atol=0.05), indices['ST']
+    assert np.all(indices['S1_conf'] > 0)
+
+    values, steps = sa.dgsm_samples(variables, n, seed=1)
+    values = values.reshape(n, 3, 2)
+    f = 3.0 * values[:, :, 0] + 1.0 * values[:, :, 1]
+    dgsm = sa.calc_dgsm_indices(f[:, 0], f[:, 1:], steps)
+    assert np.allclose(dgsm['nu'], [9.0, 1.0])
+    assert np.all(dgsm['ST_bound'] >= [0.9, 0.1])
+
+
+def test_run_sobol_analysis_sfsi_frame():
+    fb, fd, sl, hz = test_dbd.load_system(n_storeys=3, n_bays=2)
+    variables = [uc.RandomVariable('sl.g_mod', 'lognormal', (25.0e6, 0.3)),
+                 uc.RandomVariable('fb.storey_masses', 'normal', (1.0, 0.1), factor=True)]
+    inputs = {'fb': fb, 'hz': hz, 'sl': sl, 'fd': fd}
+    func = dbd.design_rc_frame_w_sfsi_via_millen_et_al_2020
+    indices = sa.run_sobol_analysis(func, inputs, variables, n_samples=8, seed=2, n_bootstrap=10,
+                                    share_fd_static_values=True)
+    assert indices['v_base']['S1'].shape == (2,)
+    assert indices['theta_f']['n_used'] <= 8
+    dgsm = sa.run_dgsm_analysis(func, inputs, variables, n_samples=8, seed=2, n_bootstrap=10)
+    assert dgsm['v_base']['nu'].shape == (2,)
@@ -0,0 +1,99 @@
+import time
+
+import numpy as np
+import pytest
+
+from eqdes import store
+
+
+class Result(object):
+    def __init__(self, v_base, storey_forces):
+        self.v_base = v_base
+        self.storey_forces = storey_forces
+
+
+def test_append_and_read(tmp_path):
+    path = str(tmp_path / "results")
+    st = store.ResultsStore(path)
+    objs = [Result(100.0, np.array([1.0, 2.0])), None, Result(300.0, np.array([3.0, 4.0, 5.0]))]
+    st.append_results(objs, scalars=("v_base",), arrays=("storey_forces",), reasons=[None, "no convergence", None])
+    st.append_results([Result(400.0, np.array([6.0]))], scalars=("v_base",), arrays=("storey_forces",),
+                      reasons=[None])
+    st = store.ResultsStore(path, mode="r")
+    assert len(st) == 4
+    assert np.allclose(st["v_base"], [100.0, np.nan, 300.0, 400.0], equal_nan=True)
+    forces = st["storey_forces"]
+    assert np.allclose(forces.lengths, [2, 0, 3, 1])
+    assert np.allclose(forces[2], [3.0, 4.0, 5.0])
+    assert np.allclose(forces[3], [6.0])
+    assert list(st["reason"]) == [None, "no convergence", None, None]
+    with pytest.raises(IOError):
+        st.append({"v_base": [1.0]})
+
+
+def test_append_rejects_different_columns(tmp_path):
+    st = store.ResultsStore(str(tmp_path))
+    st.append({"v_base": np.ones(3)})
+    with pytest.raises(ValueError):
+        st.append({"theta_f": np.ones(3)})
+
+
+def test_category_integer_labels(tmp_path):
+    path = str(tmp_path / "results")
+    st = store.ResultsStore(path)
+    st.append({"zone": [3, None, 4, 3]}, kinds={"zone": "category"})
+    st.append({"zone": [4, 3]})
+    st = store.ResultsStore(path, mode="r")
+    assert list(st["zone"]) == ["3", None, "4", "3", "4", "3"]
+    assert st.schema["columns"]["zone"]["categories"] == ["3", "4"]
+
+
+def test_first_batch_all_failed(tmp_path):
+    path = str(tmp_path / "results")
+    st = store.ResultsStore(path)
+    st.append_results([None], scalars=("v_base",), arrays=("storey_forces",), reasons=["no convergence"])
+    st.append_results([Result(300.0, np.array([3.0, 4.0, 5.0]))], scalars=("v_base",), arrays=("storey_forces",),
+                      reasons=[None])
+    st = store.ResultsStore(path, mode="r")
+    assert np.allclose(st["v_base"], [np.nan, 300.0], equal_nan=True)
+    forces = st["storey_forces"]
+    assert np.allclose(forces.lengths, [0, 3])
+    assert np.allclose(forces[1], [3.0, 4.0, 5.0])
+
+
+def test_append_rejects_arrays_in_scalar_column(tmp_path):
+    st = store.ResultsStore(str(tmp_path))
+    st.append({"storey_forces": [None]})
+    with pytest.raises(ValueError):
+        st.append({"storey_forces": [np.array([1.0, 2.0])]})
+    assert len(st) == 1
+
+
+def test_million_rows_reload(tmp_path):
+    path = str(tmp_path)
+    st = store.ResultsStore(path)
+    n_chunk = 100000
+    for i in range(10):
+        lengths = np.full(n_chunk, 3)
+        st.append({"v_base": np.arange(n_chunk, dtype=float) + i * n_chunk,
+                   "storey_forces": np.split(np.ones(3 * n_chunk), np.cumsum(lengths)[:-1])})
+    t0 = time.time()
+    st = store.ResultsStore(path, mode="r")
+    assert np.isclose(np.sum(st["v_base"]), 1.0e6 * (1.0e6 - 1) / 2)
+    assert st["storey_forces"].offsets[-1] == 3.0e6
+    assert time.time() - t0 < 5.0
+
+
+def test_interrupted_append_is_removed(tmp_path):
+    path = str(tmp_path / "results")
+    st = store.ResultsStore(path)
+    st.append({"v_base": np.arange(3.0), "storey_forces": [np.ones(2)] * 3})
+    with open(path + "/v_base.bin", "ab") as f:  # data of an append that did not write the schema
+        f.write(np.ones(5).tobytes())
+    with open(path + "/storey_forces.offsets", "ab") as f:
+        f.write(np.arange(5).tobytes())
+    st = store.ResultsStore(path)
+    st.append({"v_base": np.array([7.0]), "storey_forces": [np.ones(4)]})
+    st = store.ResultsStore(path, mode="r")
+    assert np.allclose(st["v_base"], [0.0, 1.0, 2.0, 7.0])
+    assert np.allclose(st["storey_forces"].lengths, [2, 2, 2, 4])
@@ -0,0 +1,67 @@
+import numpy as np
+
+from eqdes import uncertainty as uc
+from eqdes import dbd
+from eqdes import batch
+from tests import test_dbd
+
+
+def test_norm_ppf():
+    assert np.isclose(uc.norm_ppf(0.5), 0.0)
+    assert np.allclose(uc.norm_ppf([0.001, 0.025, 0.975]), [-3.0902323, -1.9599640, 1.9599640])
+
+
+def test_sample_unit_hypercube_lhs():
+    u = uc.sample_unit_hypercube(50, 3, method="lhs", seed=2)
+    for j in range(3):
+        assert np.array_equal(np.sort(np.floor(u[:, j] * 50)), np.arange(50))
+    assert np.array_equal(u, uc.sample_unit_hypercube(50, 3, method="lhs", seed=2))
+
+
+def test_design_error_reason():
+    msg = "Design failed - footing rotation (0.0123) exceeds plastic rotation (~0.008)"
+    assert batch.design_error_reason(msg) == "Design failed - footing rotation exceeds plastic rotation"
+
+
+def test_run_monte_carlo_sfsi_frame():
+    fb, fd, sl, hz = test_dbd.load_system(n_storeys=3, n_bays=2)
+    variables = [uc.RandomVariable('sl.g_mod', 'lognormal', (25.0e6, 0.3)),
+                 uc.RandomVariable('sl.phi', 'normal', (32.0, 2.0)),
+                 uc.RandomVariable('fb.storey_masses', 'normal', (1.0, 0.1), factor=True)]
+    inputs = {'fb': fb, 'hz': hz, 'sl': sl, 'fd': fd}
+    func = dbd.design_rc_frame_w_sfsi_via_millen_et_al_2020
+    mc = uc.run_monte_carlo(func, inputs, variables, n_samples=20, seed=1, chunk_size=7)
+    assert mc.values.shape == (20, 4)
+    assert np.sum(mc.failed) == sum(mc.failures.values())
+    stats = mc.summary()
+    assert stats['v_base']['count'] == 20 - np.sum(mc.failed)
+    assert stats['theta_f']['q0.05'] <= stats['theta_f']['q0.5'] <= stats['theta_f']['q0.95']
+    # input objects are not changed
+    assert sl.g_mod == 25.0e6
+
+    mc_par = uc.run_monte_carlo(func, inputs, variables, n_samples=20, seed=1, chunk_size=5, n_workers=2)
+    assert np.allclose(mc.values, mc_par.values, equal_nan=True)
+
+
+def test_norm_cdf():
+    assert np.isclose(uc.norm_cdf(0.0), 0.5, atol=1.0e-7)
+    x = np.array([-3.0902323, -1.9599640, 1.9599640])
+    assert np.allclose(uc.norm_cdf(x), [0.001, 0.025, 0.975], atol=1.0e-7)
+    assert np.allclose(uc.norm_ppf(uc.norm_cdf(x)), x, atol=1.0e-5)
+
+
+def _sqrt_of_mass(hz, fb):
+    if fb.storey_masses[0] < 0:
+        raise ValueError("math domain error")
+    return type("Result", (), {"v_base": np.sqrt(fb.storey_masses[0]), "t_eff": hz.z_factor})()
+
+
+def test_evaluate_samples_records_invalid_samples():
+    fb, fd, sl, hz = test_dbd.load_system(n_storeys=3, n_bays=2)
+    inputs = {'fb': fb, 'hz': hz}  # passed by name, not in the order of the arguments
+    values = np.array([[1.0], [-1.0]])
+    res, reasons = uc.evaluate_samples(_sqrt_of_mass, inputs, ['fb.storey_masses'], values, ['v_base', 't_eff'],
+                                       factors=[True])
+    assert np.allclose(res[0], [np.sqrt(fb.storey_masses[0]), hz.z_factor])
+    assert np.all(np.isnan(res[1]))
+    assert reasons == [None, "Invalid sample - ValueError: math domain error"]